@@ -1,4 +1,11 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from app.core.database import async_engine, engine
+from app.core.inference_scheduler import inference_scheduler
+from app.core.jobs import jobs
+from app.core.model_registry import model_registry
+from app.core.schema import upgrade_schema
 from app.v1.routes.producao import router as producao_router
 from app.v1.routes.processamento import router as processamento_router
 from app.v1.routes.comercializacao import router as comercializacao_router
@@ -6,11 +13,27 @@ from app.v1.routes.importacao import router as importacao_router
 from app.v1.routes.exportacao import router as exportacao_router
 from app.v1.routes.predicao_producao import router as predicao_producao_router
 from app.v1.routes.predicao_exportacao import router as predicao_exportacao_router
+from app.v1.routes.jobs import router as jobs_router
+from app.v1.routes.metrics import router as metrics_router
+from app.v1.routes.modelos import router as modelos_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    upgrade_schema(engine)
+    model_registry.watch()
+    yield
+    model_registry.stop()
+    inference_scheduler.shutdown()
+    jobs.shutdown()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="Análises EMBRAPA",
     description="Coleta para análise de dados históricos da Viniticultura da EMBRAPA",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.include_router(producao_router)
@@ -20,6 +43,9 @@ app.include_router(importacao_router)
 app.include_router(exportacao_router)
 app.include_router(predicao_producao_router)
 app.include_router(predicao_exportacao_router)
+app.include_router(jobs_router)
+app.include_router(metrics_router)
+app.include_router(modelos_router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,96 @@
+import os
+from typing import AsyncIterator, List, Type, TypeVar
+
+import orjson
+from fastapi import Request
+from pydantic import BaseModel, ValidationError
+
+from app.core.streaming import NDJSON
+
+# Itens por lote de predição (um predict e um INSERT em lote por lote).
+PREDICAO_BATCH_SIZE = int(os.getenv("PREDICAO_BATCH_SIZE", "5000"))
+# Máximo de itens por requisição.
+PREDICAO_BATCH_MAX = int(os.getenv("PREDICAO_BATCH_MAX", "200000"))
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def batch_request_body(schema: Type[BaseModel]) -> dict:
+    """
+    Documentação OpenAPI do corpo das rotas em lote (parâmetro `openapi_extra`):
+    lista JSON ou NDJSON (um objeto por linha) de `schema`.
+    """
+    item = schema.model_json_schema()
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": item}},
+                NDJSON: {"schema": item},
+            },
+        }
+    }
+
+
+async def batch_items(
+        request: Request,
+        schema: Type[M],
+        batch_size: int = PREDICAO_BATCH_SIZE,
+        max_items: int = PREDICAO_BATCH_MAX
+) -> AsyncIterator[List[M]]:
+    """
+    Lê o corpo da requisição, lista JSON ou NDJSON (Content-Type: application/x-ndjson),
+    e devolve os itens validados em lotes de até `batch_size`. O NDJSON é lido à medida
+    que chega, sem carregar o corpo inteiro.
+    :raises ValueError: corpo inválido, item que não valida em `schema` (a mensagem
+        indica o número do item) ou mais de `max_items` itens.
+    """
+    lote: List[M] = []
+    total = 0
+
+    def validar(item) -> M:
+        nonlocal total
+        total += 1
+        if total > max_items:
+            raise ValueError(f"Máximo de {max_items} itens por requisição.")
+        try:
+            return schema.model_validate(item)
+        except ValidationError as e:
+            erros = "; ".join(
+                f"{'.'.join(map(str, erro['loc'])) or 'item'}: {erro['msg']}" for erro in e.errors()
+            )
+            raise ValueError(f"Item {total} inválido: {erros}")
+
+    def decodificar(dado: bytes):
+        try:
+            return orjson.loads(dado)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido no item {total + 1}: {e}")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == NDJSON:
+        resto = b""
+        async for chunk in request.stream():
+            linhas = (resto + chunk).split(b"\n")
+            resto = linhas.pop()
+            for linha in linhas:
+                if linha.strip():
+                    lote.append(validar(decodificar(linha)))
+                    if len(lote) == batch_size:
+                        yield lote
+                        lote = []
+        if resto.strip():
+            lote.append(validar(decodificar(resto)))
+    else:
+        itens = decodificar(await request.body())
+        if not isinstance(itens, list):
+            raise ValueError("O corpo deve ser uma lista JSON ou NDJSON (application/x-ndjson).")
+        for item in itens:
+            lote.append(validar(item))
+            if len(lote) == batch_size:
+                yield lote
+                lote = []
+    if lote:
+        yield lote
+    elif not total:
+        raise ValueError("Nenhum item recebido.")
@@ -0,0 +1,124 @@
+import enum
+import io
+import os
+from typing import AsyncIterator, List, Type
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Boolean, DateTime, Float, Integer, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.streaming import partitions, schema_columns
+
+# Linhas por lote lido do banco; no Parquet, cada lote é um row group.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "65536"))
+# Codec de compressão do Parquet e do Arrow IPC (zstd ou lz4; o Parquet aceita também snappy).
+EXPORT_COMPRESSION = os.getenv("EXPORT_COMPRESSION", "zstd")
+
+PARQUET = "application/vnd.apache.parquet"
+ARROW = "application/vnd.apache.arrow.stream"
+
+
+class ExportFormat(str, enum.Enum):
+    parquet = "parquet"
+    arrow = "arrow"
+
+
+MEDIA_TYPES = {ExportFormat.parquet: PARQUET, ExportFormat.arrow: ARROW}
+
+# Documentação OpenAPI dos formatos de exportação, para o parâmetro `responses` das rotas.
+EXPORT_RESPONSES = {200: {"content": {PARQUET: {}, ARROW: {}}}}
+
+
+def arrow_type(sql_type) -> pa.DataType:
+    if isinstance(sql_type, Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, Integer):
+        return pa.int64()
+    if isinstance(sql_type, Float):
+        return pa.float64()
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+class _Sink(io.RawIOBase):
+    """
+    Destino dos writers do pyarrow que acumula os bytes escritos até serem retirados
+    (take), para enviá-los à resposta a cada lote. Só avança: não aceita seek.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def export_query(
+        db: AsyncSession,
+        query: Select,
+        schema: Type[BaseModel],
+        formato: ExportFormat,
+        filename: str,
+        batch_size: int = EXPORT_BATCH_SIZE,
+        compression: str = EXPORT_COMPRESSION
+) -> StreamingResponse:
+    """
+    Envia o resultado da consulta em Parquet ou Arrow IPC (stream), comprimido, lote a
+    lote: cada lote lido do cursor do banco (ver partitions) vira um RecordBatch, escrito
+    e enviado antes da leitura do próximo. Só as colunas de `schema` são lidas.
+    :param query: SELECT do modelo (ver select_* nos módulos de app.v1.crud).
+    :param filename: nome do arquivo, sem extensão, para o Content-Disposition.
+    """
+    columns, query = schema_columns(query, schema)
+    arrow_schema = pa.schema([
+        pa.field(name, arrow_type(column.type), nullable=bool(getattr(column, "nullable", True)))
+        for name, column in zip(columns, query.selected_columns)
+    ])
+    bind = db.bind
+
+    def open_writer(sink: _Sink):
+        if formato == ExportFormat.parquet:
+            return pq.ParquetWriter(sink, arrow_schema, compression=compression)
+        return pa.ipc.new_stream(
+            sink, arrow_schema, options=pa.ipc.IpcWriteOptions(compression=compression)
+        )
+
+    async def generate() -> AsyncIterator[bytes]:
+        sink = _Sink()
+        writer = open_writer(sink)
+        try:
+            async for rows in partitions(bind, query, batch_size):
+                arrays = [
+                    pa.array(values, type=field.type)
+                    for values, field in zip(zip(*rows), arrow_schema)
+                ]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=arrow_schema))
+                yield sink.take()
+        finally:
+            writer.close()
+        yield sink.take()
+
+    return StreamingResponse(
+        generate(),
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{formato.value}"'},
+    )
@@ -1,16 +1,29 @@
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.metrics import EngineMetrics
 
 load_dotenv()
 
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
+DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME")
 
+# Pool de conexões (valores por engine: o síncrono e o assíncrono têm pools próprios).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Tempo máximo de cada comando no PostgreSQL (statement_timeout); 0 desativa.
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
 
 DATABASE_URL = (
     f"postgresql://{DB_USER}:{DB_PASSWORD}"
@@ -18,9 +31,47 @@ DATABASE_URL = (
     "?sslmode=require"
 )
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Mesmo banco pelo driver asyncpg (que recebe o SSL em `ssl`, não em `sslmode`).
+ASYNC_DATABASE_URL = (
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}"
+    f"@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    "?ssl=require"
+)
+
+POOL_OPTIONS = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+
+engine_metrics = EngineMetrics("sync")
+async_engine_metrics = EngineMetrics("async")
+
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=engine_metrics.pool_class(QueuePool),
+    connect_args=(
+        {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+        if DB_STATEMENT_TIMEOUT_MS else {}
+    ),
+    **POOL_OPTIONS
+)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=async_engine_metrics.pool_class(AsyncAdaptedQueuePool),
+    connect_args=(
+        {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        if DB_STATEMENT_TIMEOUT_MS else {}
+    ),
+    **POOL_OPTIONS
+)
+engine_metrics.instrument(engine)
+async_engine_metrics.instrument(async_engine.sync_engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -31,3 +82,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Sessão assíncrona (asyncpg) para rotas `async def`: a espera pelo banco não ocupa
+    uma thread do threadpool.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
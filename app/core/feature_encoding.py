@@ -0,0 +1,239 @@
+import logging
+import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.base import is_regressor
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model._base import LinearModel
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, OrdinalEncoder, StandardScaler
+
+from app.core.inference_cache import Features
+
+# "0" desativa a codificação direta (todas as predições montam o DataFrame).
+FEATURE_ENCODER = os.getenv("FEATURE_ENCODER", "1") != "0"
+
+logger = logging.getLogger(__name__)
+
+# Preenche as colunas [offset, offset + largura) de X a partir da coluna `posicao` das linhas.
+Encoder = Callable[[np.ndarray, List[Features]], None]
+
+
+class UnsupportedModel(Exception):
+    """
+    Levantada quando o modelo tem uma etapa que a codificação direta não reproduz.
+    """
+
+
+def _column_positions(selecao, nomes: Sequence[str], columns: List[str]) -> List[int]:
+    """
+    Posições, em `columns`, das colunas selecionadas por um transformador do
+    ColumnTransformer (nomes, índices ou máscara booleana das colunas de entrada `nomes`).
+    """
+    if isinstance(selecao, slice) or callable(selecao):
+        raise UnsupportedModel(f"seleção de colunas não suportada: {selecao!r}")
+    if isinstance(selecao, (str, int, np.integer)):
+        selecao = [selecao]
+    selecao = list(selecao)
+    if selecao and isinstance(selecao[0], (bool, np.bool_)):
+        selecao = [nome for nome, usar in zip(nomes, selecao) if usar]
+    posicoes = []
+    for coluna in selecao:
+        nome = nomes[coluna] if isinstance(coluna, (int, np.integer)) else coluna
+        if nome not in columns:
+            raise UnsupportedModel(f"coluna {nome!r} ausente das features")
+        posicoes.append(columns.index(nome))
+    return posicoes
+
+
+def _one_hot(encoder: OneHotEncoder, posicoes: List[int], offset: int) -> Tuple[Encoder, int]:
+    if getattr(encoder, "_infrequent_enabled", False):
+        raise UnsupportedModel("OneHotEncoder com categorias infrequentes")
+    ignorar = encoder.handle_unknown != "error"
+    drop = encoder.drop_idx_ if encoder.drop_idx_ is not None else [None] * len(encoder.categories_)
+    # categoria -> coluna de saída; a categoria removida por `drop` não tem coluna (-1)
+    vocabularios = []
+    largura = 0
+    for categorias, removida in zip(encoder.categories_, drop):
+        vocabulario = {}
+        for i, categoria in enumerate(categorias.tolist()):
+            if removida is not None and i == removida:
+                vocabulario[categoria] = -1
+            else:
+                vocabulario[categoria] = offset + largura
+                largura += 1
+        vocabularios.append(vocabulario)
+
+    def encode(X: np.ndarray, linhas: List[Features]) -> None:
+        for posicao, vocabulario in zip(posicoes, vocabularios):
+            for i, linha in enumerate(linhas):
+                j = vocabulario.get(linha[posicao])
+                if j is None:
+                    if not ignorar:
+                        raise ValueError(f"Categoria desconhecida {linha[posicao]!r} na coluna {posicao}.")
+                elif j >= 0:
+                    X[i, j] = 1.0
+
+    return encode, largura
+
+
+def _ordinal(encoder: OrdinalEncoder, posicoes: List[int], offset: int) -> Tuple[Encoder, int]:
+    if getattr(encoder, "_infrequent_enabled", False):
+        raise UnsupportedModel("OrdinalEncoder com categorias infrequentes")
+    desconhecido = encoder.unknown_value if encoder.handle_unknown == "use_encoded_value" else None
+    vocabularios = [
+        {categoria: float(i) for i, categoria in enumerate(categorias.tolist())}
+        for categorias in encoder.categories_
+    ]
+
+    def encode(X: np.ndarray, linhas: List[Features]) -> None:
+        for k, (posicao, vocabulario) in enumerate(zip(posicoes, vocabularios)):
+            for i, linha in enumerate(linhas):
+                valor = vocabulario.get(linha[posicao], desconhecido)
+                if valor is None:
+                    raise ValueError(f"Categoria desconhecida {linha[posicao]!r} na coluna {posicao}.")
+                X[i, offset + k] = valor
+
+    return encode, len(posicoes)
+
+
+def _numeric(posicoes: List[int], offset: int, scaler: Optional[StandardScaler] = None) -> Tuple[Encoder, int]:
+    media = scaler.mean_ if scaler is not None and scaler.with_mean else 0.0
+    escala = scaler.scale_ if scaler is not None and scaler.with_std else 1.0
+
+    def encode(X: np.ndarray, linhas: List[Features]) -> None:
+        valores = np.array([[linha[posicao] for posicao in posicoes] for linha in linhas], dtype=float)
+        X[:, offset:offset + len(posicoes)] = (valores - media) / escala
+
+    return encode, len(posicoes)
+
+
+def _compile_step(step: Any, posicoes: List[int], offset: int) -> Tuple[Encoder, int]:
+    if isinstance(step, OneHotEncoder):
+        return _one_hot(step, posicoes, offset)
+    if isinstance(step, OrdinalEncoder):
+        return _ordinal(step, posicoes, offset)
+    if isinstance(step, StandardScaler):
+        return _numeric(posicoes, offset, step)
+    if step == "passthrough" or (isinstance(step, FunctionTransformer) and step.func is None):
+        return _numeric(posicoes, offset)
+    raise UnsupportedModel(f"transformador não suportado: {type(step).__name__}")
+
+
+class FeatureEncoder:
+    """
+    Codificação das features de um pipeline do scikit-learn compilada a partir do
+    modelo carregado: os vocabulários dos encoders e a ordem das colunas de saída do
+    primeiro passo (ColumnTransformer ou encoder) viram consultas a dicionários que
+    preenchem diretamente um array NumPy, sem DataFrame nem as validações do
+    transform. O array segue pelas demais etapas do pipeline até o estimador final,
+    que em modelos lineares é aplicado como X @ coef_ + intercept_.
+
+    Suporta OneHotEncoder e OrdinalEncoder (sem categorias infrequentes),
+    StandardScaler e passthrough; outros modelos usam o DataFrame (ver feature_encoder).
+    """
+
+    def __init__(self, model: Pipeline, columns: List[str]) -> None:
+        """
+        :raises UnsupportedModel: modelo com etapa não suportada.
+        """
+        if not isinstance(model, Pipeline) or len(model.steps) < 2:
+            raise UnsupportedModel(f"modelo não é um Pipeline: {type(model).__name__}")
+        self.columns = list(columns)
+        primeiro = model.steps[0][1]
+        self._encoders: List[Encoder] = []
+        self.width = 0
+        if isinstance(primeiro, ColumnTransformer):
+            nomes = list(getattr(primeiro, "feature_names_in_", columns))
+            for _, step, selecao in primeiro.transformers_:
+                if step == "drop":
+                    continue
+                encode, largura = _compile_step(step, _column_positions(selecao, nomes, self.columns), self.width)
+                self._encoders.append(encode)
+                self.width += largura
+        else:
+            encode, self.width = _compile_step(primeiro, list(range(len(self.columns))), 0)
+            self._encoders.append(encode)
+        self._steps = [step for _, step in model.steps[1:-1] if step not in (None, "passthrough")]
+        self.estimator = model.steps[-1][1]
+        self._linear = isinstance(self.estimator, LinearModel) and is_regressor(self.estimator)
+
+    def encode(self, linhas: List[Features]) -> np.ndarray:
+        X = np.zeros((len(linhas), self.width))
+        for encode in self._encoders:
+            encode(X, linhas)
+        return X
+
+    def predict(self, linhas: List[Features]) -> np.ndarray:
+        X = self.encode(linhas)
+        for step in self._steps:
+            X = step.transform(X)
+        if self._linear:
+            return X @ self.estimator.coef_.T + self.estimator.intercept_
+        return self.estimator.predict(X)
+
+
+# Codificadores compilados por modelo carregado (descartados junto com o modelo).
+_encoders: "weakref.WeakKeyDictionary[Any, Dict[Tuple[str, ...], Optional[FeatureEncoder]]]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def _compile(model: Any, columns: List[str]) -> Optional[FeatureEncoder]:
+    """
+    Compila o codificador e confere, com uma linha de cada categoria conhecida, que ele
+    reproduz o predict do modelo com DataFrame.
+    """
+    try:
+        encoder = FeatureEncoder(model, columns)
+        amostra = _sample(model, columns)
+        esperado = np.asarray(model.predict(pd.DataFrame(amostra, columns=columns)), dtype=float)
+        if not np.allclose(np.asarray(encoder.predict(amostra), dtype=float), esperado):
+            raise UnsupportedModel("resultado diferente do predict com DataFrame")
+    except Exception as e:
+        logger.info("Codificação direta indisponível para %s (%s); usando DataFrame.", type(model).__name__, e)
+        return None
+    return encoder
+
+
+def _sample(model: Pipeline, columns: List[str]) -> List[Features]:
+    """
+    Linhas de verificação: as categorias conhecidas de cada coluna categórica (a
+    primeira, repetida, nas demais linhas) e números nas colunas numéricas.
+    """
+    primeiro = model.steps[0][1]
+    categorias: Dict[int, list] = {}
+    steps = primeiro.transformers_ if isinstance(primeiro, ColumnTransformer) else [(None, primeiro, columns)]
+    nomes = list(getattr(primeiro, "feature_names_in_", columns))
+    for _, step, selecao in steps:
+        if isinstance(step, (OneHotEncoder, OrdinalEncoder)):
+            for posicao, valores in zip(_column_positions(selecao, nomes, columns), step.categories_):
+                categorias[posicao] = valores.tolist()
+    total = max([len(valores) for valores in categorias.values()] + [3])
+    return [
+        tuple(
+            categorias[p][min(i, len(categorias[p]) - 1)] if p in categorias else float(i + 1)
+            for p in range(len(columns))
+        )
+        for i in range(total)
+    ]
+
+
+def feature_encoder(model: Any, columns: List[str]) -> Optional[FeatureEncoder]:
+    """
+    Codificador compilado (uma vez por modelo carregado) das features `columns` do
+    modelo, ou None se o modelo não for suportado ou FEATURE_ENCODER=0.
+    """
+    if not FEATURE_ENCODER:
+        return None
+    chave = tuple(columns)
+    with _lock:
+        por_colunas = _encoders.setdefault(model, {})
+        if chave not in por_colunas:
+            por_colunas[chave] = _compile(model, columns)
+        return por_colunas[chave]
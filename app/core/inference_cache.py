@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, List, Optional, Sequence, Tuple
+
+from app.core.model_registry import LoadedModel, model_registry
+
+# Máximo de predições guardadas (cada entrada: as features e um float, poucas centenas de bytes).
+INFERENCE_CACHE_MAX_ENTRIES = int(os.getenv("INFERENCE_CACHE_MAX_ENTRIES", "100000"))
+# Validade (s) de cada predição; 0 desativa o cache.
+INFERENCE_CACHE_TTL = int(os.getenv("INFERENCE_CACHE_TTL", "3600"))
+
+Features = Tuple[Hashable, ...]
+
+
+class InferenceCache:
+    """
+    LRU em memória do processo das predições já calculadas, indexado pelo modelo, pela
+    versão em uso (ver model_registry) e pelas features normalizadas da entrada (a
+    tupla de valores na ordem das colunas do modelo, já convertidos como o modelo os
+    recebe). Um acerto dispensa a codificação das features e o predict.
+
+    Quando um modelo é recarregado, as suas entradas são descartadas (a versão nova
+    já não as encontraria, pois faz parte da chave).
+    """
+
+    def __init__(self, max_entries: int = INFERENCE_CACHE_MAX_ENTRIES, ttl: int = INFERENCE_CACHE_TTL) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[tuple, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, name: str, version: str, features: Features) -> Optional[float]:
+        key = (name, version, features)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, name: str, version: str, features: Features, value: float) -> None:
+        key = (name, version, features)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def predict(
+            self,
+            modelo: LoadedModel,
+            linhas: List[Features],
+            run: Callable[[List[Features]], Sequence[float]]
+    ) -> List[float]:
+        """
+        Predições de `linhas`, do cache ou de uma única chamada `run` com as linhas
+        ausentes (sem repetição), cujos resultados são guardados.
+        :param linhas: features normalizadas de cada entrada (tuplas).
+        :param run: recebe as linhas ausentes e devolve um valor por linha, na mesma ordem.
+        """
+        if not self.enabled:
+            return [float(valor) for valor in run(linhas)]
+        valores, pendentes = self._lookup(modelo, linhas)
+        if pendentes:
+            valores = self._store(modelo, linhas, valores, pendentes, run(pendentes))
+        return valores
+
+    async def predict_async(
+            self,
+            modelo: LoadedModel,
+            linhas: List[Features],
+            run: Callable[[List[Features]], Awaitable[Sequence[float]]]
+    ) -> List[float]:
+        """
+        Como predict, com `run` assíncrono (ex.: inference_scheduler.predict).
+        """
+        if not self.enabled:
+            return [float(valor) for valor in await run(linhas)]
+        valores, pendentes = self._lookup(modelo, linhas)
+        if pendentes:
+            valores = self._store(modelo, linhas, valores, pendentes, await run(pendentes))
+        return valores
+
+    def _lookup(
+            self,
+            modelo: LoadedModel,
+            linhas: List[Features]
+    ) -> Tuple[List[Optional[float]], List[Features]]:
+        """
+        :return: (valor em cache ou None para cada linha, linhas ausentes sem repetição).
+        """
+        valores = [self.get(modelo.name, modelo.version, linha) for linha in linhas]
+        pendentes = list(dict.fromkeys(linha for linha, valor in zip(linhas, valores) if valor is None))
+        return valores, pendentes
+
+    def _store(
+            self,
+            modelo: LoadedModel,
+            linhas: List[Features],
+            valores: List[Optional[float]],
+            pendentes: List[Features],
+            resultados: Sequence[float]
+    ) -> List[float]:
+        """
+        Guarda os `resultados` das linhas `pendentes` e completa `valores` com eles.
+        """
+        previstos = dict(zip(pendentes, (float(valor) for valor in resultados)))
+        for linha, valor in previstos.items():
+            self.set(modelo.name, modelo.version, linha, valor)
+        return [previstos[linha] if valor is None else valor for linha, valor in zip(linhas, valores)]
+
+    def invalidate(self, name: str) -> None:
+        """
+        Descarta as predições do modelo `name`.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == name]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else None,
+                "evictions": self.evictions,
+            }
+
+
+inference_cache = InferenceCache()
+model_registry.on_swap(lambda loaded: inference_cache.invalidate(loaded.name))
@@ -0,0 +1,213 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import joblib
+import pandas as pd
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.feature_encoding import feature_encoder
+from app.core.inference_cache import Features
+from app.core.metrics import Histogram
+from app.core.model_registry import LoadedModel, file_checksum, model_registry
+
+# Espera máxima (ms) do primeiro pedido de um lote por outros pedidos; 0 desativa o
+# agrupamento (cada requisição chama o predict sozinha). Aumentar troca latência por vazão.
+INFERENCE_BATCH_WAIT_MS = float(os.getenv("INFERENCE_BATCH_WAIT_MS", "2"))
+# Linhas que disparam o predict do lote sem esperar INFERENCE_BATCH_WAIT_MS.
+INFERENCE_BATCH_MAX_SIZE = int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "64"))
+# Processos para o predict (fora do GIL do worker da API); 0 usa o threadpool.
+INFERENCE_PROCESSES = int(os.getenv("INFERENCE_PROCESSES", "0"))
+
+# Modelos carregados em cada processo do pool: caminho -> (checksum, modelo).
+_process_models: Dict[str, Tuple[str, Any]] = {}
+
+
+def predict_rows(model: Any, columns: List[str], linhas: List[Features]) -> Sequence[float]:
+    """
+    Aplica o modelo às linhas de features: pela codificação direta em NumPy (ver
+    feature_encoder) ou, se o modelo não for suportado, por um DataFrame com `columns`.
+    """
+    encoder = feature_encoder(model, columns)
+    if encoder is not None:
+        return encoder.predict(linhas)
+    return model.predict(pd.DataFrame(linhas, columns=columns))
+
+
+def _process_predict(
+        path: str,
+        checksum: str,
+        mmap_mode: Optional[str],
+        columns: List[str],
+        linhas: List[Features]
+) -> List[float]:
+    """
+    Executada nos processos do pool: carrega o artefato uma vez por versão (com mmap,
+    os arrays são compartilhados com os demais processos) e aplica o modelo.
+    """
+    cached = _process_models.get(path)
+    if cached is None or cached[0] != checksum:
+        if file_checksum(path) != checksum:
+            raise RuntimeError(f"O artefato {path} mudou; aguarde a recarga do modelo.")
+        cached = _process_models[path] = (checksum, joblib.load(path, mmap_mode=mmap_mode))
+    return [float(valor) for valor in predict_rows(cached[1], columns, linhas)]
+
+
+@dataclass
+class _Lote:
+    modelo: LoadedModel
+    columns: List[str]
+    pedidos: List[Tuple[List[Features], asyncio.Future, float]] = field(default_factory=list)
+    linhas: int = 0
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class InferenceScheduler:
+    """
+    Agrupa as predições de requisições concorrentes (micro-batching): o primeiro pedido
+    de um modelo abre um lote, que é executado com um único predict quando completa
+    `max_batch` linhas ou após `max_wait_ms`, e cada pedido recebe as suas predições.
+
+    Os lotes são por modelo e versão (ver model_registry), no event loop do worker; o
+    predict roda no threadpool ou, com `processes` > 0, em um pool de processos que
+    carrega os artefatos por conta própria.
+    """
+
+    def __init__(
+            self,
+            max_wait_ms: float = INFERENCE_BATCH_WAIT_MS,
+            max_batch: int = INFERENCE_BATCH_MAX_SIZE,
+            processes: int = INFERENCE_PROCESSES
+    ) -> None:
+        self.max_wait_ms = max_wait_ms
+        self.max_batch = max_batch
+        self.processes = processes
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self.batch_sizes: Dict[int, int] = {}
+        self.wait = Histogram()
+        self.predict_time = Histogram()
+        self._lotes: Dict[Tuple[str, str], _Lote] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_wait_ms > 0 and self.max_batch > 1
+
+    async def predict(self, modelo: LoadedModel, columns: List[str], linhas: List[Features]) -> List[float]:
+        """
+        Predições de `linhas` (features na ordem de `columns`), calculadas no próximo
+        lote do modelo.
+        """
+        if not self.enabled:
+            inicio = time.perf_counter()
+            valores = await self._run(modelo, columns, linhas)
+            self._observe(1, len(linhas), inicio)
+            return valores
+
+        loop = asyncio.get_running_loop()
+        key = (modelo.name, modelo.version)
+        lote = self._lotes.get(key)
+        if lote is None:
+            lote = self._lotes[key] = _Lote(modelo, columns)
+            lote.timer = loop.call_later(self.max_wait_ms / 1000, self._flush, key)
+        future = loop.create_future()
+        lote.pedidos.append((linhas, future, time.perf_counter()))
+        lote.linhas += len(linhas)
+        if lote.linhas >= self.max_batch:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Tuple[str, str]) -> None:
+        lote = self._lotes.pop(key, None)
+        if lote is None:
+            return
+        lote.timer.cancel()
+        task = asyncio.get_running_loop().create_task(self._execute(lote))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, lote: _Lote) -> None:
+        inicio = time.perf_counter()
+        for _, _, chegada in lote.pedidos:
+            self.wait.observe((inicio - chegada) * 1000)
+        try:
+            valores = await self._run(
+                lote.modelo, lote.columns, [linha for linhas, _, _ in lote.pedidos for linha in linhas]
+            )
+        except Exception as e:
+            for _, future, _ in lote.pedidos:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self._observe(len(lote.pedidos), lote.linhas, inicio)
+        posicao = 0
+        for linhas, future, _ in lote.pedidos:
+            if not future.done():
+                future.set_result(valores[posicao:posicao + len(linhas)])
+            posicao += len(linhas)
+
+    async def _run(self, modelo: LoadedModel, columns: List[str], linhas: List[Features]) -> List[float]:
+        if self.processes > 0:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool(), _process_predict,
+                modelo.path, modelo.checksum, model_registry.mmap_mode, columns, linhas
+            )
+        valores = await run_in_threadpool(predict_rows, modelo.model, columns, linhas)
+        return [float(valor) for valor in valores]
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: os processos não herdam as threads e conexões do worker da API
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _observe(self, pedidos: int, linhas: int, inicio: float) -> None:
+        self.predict_time.observe((time.perf_counter() - inicio) * 1000)
+        with self._lock:
+            self.batches += 1
+            self.requests += pedidos
+            self.rows += linhas
+            self.batch_sizes[pedidos] = self.batch_sizes.get(pedidos, 0) + 1
+
+    def stats(self) -> dict:
+        """
+        Configuração, distribuição do tamanho dos lotes (requisições por predict),
+        espera dos pedidos até o predict e duração de cada predict.
+        """
+        with self._lock:
+            batches, requests, rows = self.batches, self.requests, self.rows
+            batch_sizes = dict(sorted(self.batch_sizes.items()))
+        return {
+            "enabled": self.enabled,
+            "max_wait_ms": self.max_wait_ms,
+            "max_batch": self.max_batch,
+            "processes": self.processes,
+            "batches": batches,
+            "requests": requests,
+            "rows": rows,
+            "mean_batch_size": requests / batches if batches else None,
+            "batch_sizes": batch_sizes,
+            "wait": self.wait.snapshot(),
+            "predict": self.predict_time.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+inference_scheduler = InferenceScheduler()
@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "2"))
+JOBS_MAX_PENDING = int(os.getenv("JOBS_MAX_PENDING", "20"))
+JOBS_HISTORY = int(os.getenv("JOBS_HISTORY", "100"))
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = {SUCCEEDED, FAILED, CANCELLED}
+
+
+class JobCancelled(Exception):
+    """
+    Levantada dentro do job quando o cancelamento foi solicitado.
+    """
+
+
+class JobQueueFull(Exception):
+    """
+    Levantada em submit quando já há JOBS_MAX_PENDING jobs aguardando execução.
+    """
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass(eq=False)
+class Job:
+    """
+    Execução em segundo plano de um /update, com o seu progresso e as páginas que
+    falharam (app.scraper.controller.FetchFailure).
+    :param dataset: nome do dataset atualizado.
+    :param params: parâmetros da requisição que originou o job.
+    """
+    dataset: str
+    params: dict = field(default_factory=dict)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = PENDING
+    pages_done: int = 0
+    pages_total: Optional[int] = None
+    rows_written: int = 0
+    failures: list = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=_now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        """
+        Interrompe o job (JobCancelled) se o cancelamento foi solicitado. Deve ser chamado
+        entre as etapas do trabalho; após o commit no banco o job não é mais interrompido.
+        """
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def progress(self, done: int, total: int) -> None:
+        """
+        Callback de progresso do scraper (ver app.scraper.scraper.Progress).
+        """
+        self.pages_done = done
+        self.pages_total = total
+        self.check_cancelled()
+
+
+class JobManager:
+    """
+    Fila de jobs executados por um pool limitado de threads.
+
+    Os jobs ficam apenas em memória, no processo que os recebeu: com mais de um worker
+    do uvicorn, as consultas de status devem chegar ao mesmo processo. São mantidos os
+    `history` jobs finalizados mais recentes.
+    """
+
+    def __init__(
+            self,
+            max_workers: int = JOBS_MAX_WORKERS,
+            max_pending: int = JOBS_MAX_PENDING,
+            history: int = JOBS_HISTORY
+    ) -> None:
+        """
+        :param max_workers: número de jobs executados ao mesmo tempo.
+        :param max_pending: número máximo de jobs aguardando na fila.
+        :param history: quantos jobs finalizados manter para consulta.
+        """
+        self.max_pending = max_pending
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, dataset: str, work: Callable[[Job], int], params: Optional[dict] = None) -> Job:
+        """
+        Enfileira `work(job)`, que deve devolver o número de linhas gravadas.
+        :raises JobQueueFull: se a fila já estiver cheia.
+        """
+        job = Job(dataset=dataset, params=params or {})
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status == PENDING)
+            if pending >= self.max_pending:
+                raise JobQueueFull()
+            self._jobs[job.id] = job
+            self._prune()
+            job._future = self._executor.submit(self._run, job, work)
+        return job
+
+    def _run(self, job: Job, work: Callable[[Job], int]) -> None:
+        if job.cancel_requested:
+            job.status = CANCELLED
+            job.finished_at = _now()
+            return
+        job.status = RUNNING
+        job.started_at = _now()
+        try:
+            job.rows_written = work(job)
+            job.status = SUCCEEDED
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            logger.exception("Job %s (%s) falhou", job.id, job.dataset)
+            job.error = str(e) or e.__class__.__name__
+            job.status = FAILED
+        finally:
+            job.finished_at = _now()
+
+    def _prune(self) -> None:
+        finished = [j.id for j in self._jobs.values() if j.status in FINISHED]
+        for job_id in finished[:max(len(finished) - self.history, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def recent(self) -> List[Job]:
+        """
+        Jobs conhecidos, do mais recente para o mais antigo.
+        """
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Solicita o cancelamento do job. Jobs na fila são cancelados imediatamente; jobs em
+        execução param na próxima página processada (ou antes da gravação no banco).
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            job.status = CANCELLED
+            job.finished_at = _now()
+        return job
+
+    def shutdown(self) -> None:
+        """
+        Cancela os jobs pendentes e em execução e aguarda o término das threads.
+        """
+        for job in list(self._jobs.values()):
+            self.cancel(job.id)
+        self._executor.shutdown(wait=True)
+
+
+jobs = JobManager()
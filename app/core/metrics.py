@@ -0,0 +1,226 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Limites (ms) dos buckets dos histogramas; o último bucket é "+inf".
+BUCKETS_MS: Tuple[float, ...] = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# SQLSTATE de consulta cancelada (statement_timeout no PostgreSQL).
+QUERY_CANCELED = "57014"
+
+
+class Histogram:
+    """
+    Histograma de durações em ms, com buckets fixos (BUCKETS_MS).
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS_MS) -> None:
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms: float) -> None:
+        index = next((i for i, limit in enumerate(self.buckets) if ms <= limit), len(self.buckets))
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += ms
+            self.max = max(self.max, ms)
+
+    def _quantile(self, counts: list, count: int, q: float) -> Optional[float]:
+        """
+        Limite superior do bucket que contém o quantil `q` (None se não houver amostras).
+        """
+        if not count:
+            return None
+        target = q * count
+        acumulado = 0
+        for limit, n in zip(self.buckets, counts):
+            acumulado += n
+            if acumulado >= target:
+                return limit
+        return self.max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts, count, total, maximo = list(self._counts), self.count, self.total, self.max
+        labels = [f"<={limit:g}" for limit in self.buckets] + ["+inf"]
+        return {
+            "count": count,
+            "sum_ms": round(total, 3),
+            "mean_ms": round(total / count, 3) if count else None,
+            "max_ms": round(maximo, 3),
+            "p50_ms": self._quantile(counts, count, 0.50),
+            "p95_ms": self._quantile(counts, count, 0.95),
+            "p99_ms": self._quantile(counts, count, 0.99),
+            "buckets": dict(zip(labels, counts)),
+        }
+
+
+class EngineMetrics:
+    """
+    Métricas de um engine, coletadas por eventos do SQLAlchemy e por uma subclasse do
+    pool (pool_class):
+
+    - pool_wait_ms: espera por uma conexão livre no pool;
+    - connect_ms: abertura de novas conexões com o banco;
+    - pre_ping_ms: teste da conexão antes do uso (pool_pre_ping);
+    - checkout_ms: tempo total para obter a conexão (soma das três anteriores);
+    - query_ms: duração de cada comando, também agregada por SQL (statements).
+    """
+
+    def __init__(self, name: str, max_statements: int = 200) -> None:
+        """
+        :param max_statements: número máximo de SQLs distintos acompanhados; os demais
+            entram só em query_ms.
+        """
+        self.name = name
+        self.max_statements = max_statements
+        self.pool_wait = Histogram()
+        self.connect = Histogram()
+        self.pre_ping = Histogram()
+        self.checkout = Histogram()
+        self.query = Histogram()
+        self.pool_timeouts = 0
+        self.invalidations = 0
+        self.errors = 0
+        self.statement_timeouts = 0
+        self._statements: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def pool_class(self, base: Type[QueuePool] = QueuePool) -> Type[QueuePool]:
+        """
+        Subclasse de `base` que mede a espera por conexões, a abertura de conexões e o
+        checkout. Cada engine precisa da sua (passada em create_engine(poolclass=...)).
+        """
+        metrics = self
+
+        class TimedPool(base):
+            def __init__(self, *args, **kwargs) -> None:
+                super().__init__(*args, **kwargs)
+                get = self._pool.get
+
+                def timed_get(*get_args, **get_kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return get(*get_args, **get_kwargs)
+                    finally:
+                        metrics.pool_wait.observe((time.perf_counter() - start) * 1000)
+
+                self._pool.get = timed_get
+
+            def _create_connection(self):
+                start = time.perf_counter()
+                try:
+                    return super()._create_connection()
+                finally:
+                    metrics.connect.observe((time.perf_counter() - start) * 1000)
+
+            def connect(self):
+                start = time.perf_counter()
+                try:
+                    return super().connect()
+                except exc.TimeoutError:
+                    metrics._count("pool_timeouts")
+                    raise
+                finally:
+                    metrics.checkout.observe((time.perf_counter() - start) * 1000)
+
+        TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{base.__name__}"
+        return TimedPool
+
+    def instrument(self, engine: Engine) -> None:
+        """
+        Registra os eventos de comando e de erro no engine (para um AsyncEngine, passe
+        async_engine.sync_engine) e passa a medir o pre-ping do dialeto.
+        """
+        dialect = engine.dialect
+        do_ping = dialect.do_ping
+
+        def timed_ping(dbapi_connection):
+            start = time.perf_counter()
+            try:
+                return do_ping(dbapi_connection)
+            finally:
+                self.pre_ping.observe((time.perf_counter() - start) * 1000)
+
+        dialect.do_ping = timed_ping
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context._metrics_start = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            self._observe_statement(statement, (time.perf_counter() - context._metrics_start) * 1000)
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(context):
+            self._count("errors")
+            original = context.original_exception
+            if QUERY_CANCELED in (getattr(original, "pgcode", None), getattr(original, "sqlstate", None)):
+                self._count("statement_timeouts")
+
+        @event.listens_for(engine, "invalidate")
+        def invalidate(dbapi_connection, connection_record, exception):
+            self._count("invalidations")
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _observe_statement(self, statement: str, ms: float) -> None:
+        self.query.observe(ms)
+        sql = " ".join(statement.split())
+        with self._lock:
+            stats = self._statements.get(sql)
+            if stats is None:
+                if len(self._statements) >= self.max_statements:
+                    return
+                stats = self._statements[sql] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += ms
+            stats[2] = max(stats[2], ms)
+
+    def snapshot(self, engine: Engine, top: int = 20) -> dict:
+        """
+        Estado do pool e métricas acumuladas, com os `top` SQLs de maior tempo total.
+        """
+        pool = engine.pool
+        with self._lock:
+            statements = sorted(self._statements.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            "pool": {
+                "class": type(pool).__name__,
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                # QueuePool.overflow() fica negativo enquanto o pool não atinge pool_size
+                "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else None,
+                "timeouts": self.pool_timeouts,
+                "invalidations": self.invalidations,
+            },
+            "pool_wait_ms": self.pool_wait.snapshot(),
+            "connect_ms": self.connect.snapshot(),
+            "pre_ping_ms": self.pre_ping.snapshot(),
+            "checkout_ms": self.checkout.snapshot(),
+            "query_ms": self.query.snapshot(),
+            "errors": self.errors,
+            "statement_timeouts": self.statement_timeouts,
+            "statements": [
+                {
+                    "sql": sql[:500],
+                    "count": count,
+                    "total_ms": round(total, 3),
+                    "mean_ms": round(total / count, 3),
+                    "max_ms": round(maximo, 3),
+                }
+                for sql, (count, total, maximo) in statements[:top]
+            ],
+        }
@@ -0,0 +1,246 @@
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+MODELS_DIR = os.getenv(
+    "MODELS_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "predict_models")
+)
+# mmap_mode do joblib.load ("r": arrays numpy mapeados do arquivo, compartilhados pelo
+# cache de páginas entre os workers); vazio carrega tudo na memória do processo.
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE", "r") or None
+# Intervalo (s) da verificação dos artefatos para recarga automática; 0 desativa.
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+MODEL_HISTORY = 20
+
+
+class ModelNotFound(LookupError):
+    """
+    Levantada quando o modelo não foi registrado ou o artefato não existe.
+    """
+
+
+class ModelLoadError(RuntimeError):
+    """
+    Levantada quando o artefato existe mas não pode ser carregado.
+    """
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """
+    Versão carregada de um modelo. `version` são os 12 primeiros dígitos do sha256 do
+    artefato, gravada em cada predição (modelo_versao).
+    """
+    name: str
+    path: str
+    model: Any
+    checksum: str
+    size: int
+    mtime_ns: int
+    loaded_at: datetime = field(default_factory=_now)
+
+    @property
+    def version(self) -> str:
+        return self.checksum[:12]
+
+
+class ModelRegistry:
+    """
+    Registro dos modelos de predição, carregados sob demanda (no primeiro uso) com
+    joblib.load e mmap_mode, de artefatos gerados por joblib.dump (sem compressão, para
+    que os arrays possam ser mapeados) ou por pickle.
+
+    A recarga (reload, rota POST /admin/modelos/{nome}/reload ou a verificação periódica
+    de watch) carrega o novo artefato por inteiro e só então troca a referência: as
+    requisições em andamento terminam com a versão que obtiveram em get. Substitua os
+    artefatos de forma atômica (escreva em outro arquivo e use os.replace/mv).
+
+    Cada processo tem o seu registro: com vários workers, use MODEL_WATCH_INTERVAL para
+    que todos recarreguem (a rota de reload atinge só o worker que a recebe).
+    """
+
+    def __init__(self, directory: str = MODELS_DIR, mmap_mode: Optional[str] = MODEL_MMAP_MODE) -> None:
+        self.directory = directory
+        self.mmap_mode = mmap_mode
+        self._files: Dict[str, str] = {}
+        self._loaded: Dict[str, LoadedModel] = {}
+        self._history: Dict[str, List[dict]] = {}
+        self._errors: Dict[str, str] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._listeners: List[Callable[[LoadedModel], None]] = []
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def register(self, name: str, filename: str) -> None:
+        """
+        Registra o modelo `name`, lido de `filename` (relativo a `directory`), sem carregá-lo.
+        """
+        self._files[name] = filename
+        self._locks.setdefault(name, threading.Lock())
+
+    def on_swap(self, callback: Callable[[LoadedModel], None]) -> None:
+        """
+        Registra `callback`, chamado com cada nova versão carregada (ex.: para descartar
+        caches calculados com a versão anterior).
+        """
+        self._listeners.append(callback)
+
+    def path(self, name: str) -> str:
+        if name not in self._files:
+            raise ModelNotFound(f"Modelo não registrado: {name}")
+        return os.path.join(self.directory, self._files[name])
+
+    def get(self, name: str) -> LoadedModel:
+        """
+        Versão atual do modelo, carregada na primeira chamada.
+        :raises ModelNotFound: modelo não registrado ou artefato inexistente.
+        :raises ModelLoadError: artefato inválido.
+        """
+        loaded = self._loaded.get(name)
+        if loaded is not None:
+            return loaded
+        self.path(name)
+        with self._locks[name]:
+            loaded = self._loaded.get(name)
+            if loaded is None:
+                loaded = self._swap(name, self._load(name))
+        return loaded
+
+    def reload(self, name: str, force: bool = False) -> Tuple[LoadedModel, bool]:
+        """
+        Carrega de novo o artefato e troca a versão em uso se o conteúdo mudou (ou se
+        `force`). Em caso de erro, a versão atual continua em uso. Se só a data de
+        modificação ou o tamanho mudaram, eles são atualizados na versão em uso, para que
+        check não volte a calcular o checksum a cada verificação.
+        :return: (versão em uso, se houve troca).
+        """
+        path = self.path(name)
+        with self._locks[name]:
+            atual = self._loaded.get(name)
+            if atual is not None and not force:
+                # stat antes do checksum: uma escrita entre os dois muda o mtime de novo
+                stat = os.stat(path)
+                if file_checksum(path) == atual.checksum:
+                    if (stat.st_mtime_ns, stat.st_size) != (atual.mtime_ns, atual.size):
+                        atual = self._loaded[name] = replace(
+                            atual, mtime_ns=stat.st_mtime_ns, size=stat.st_size
+                        )
+                    return atual, False
+            return self._swap(name, self._load(name)), True
+
+    def _load(self, name: str) -> LoadedModel:
+        path = self.path(name)
+        try:
+            stat = os.stat(path)
+            checksum = file_checksum(path)
+        except FileNotFoundError:
+            raise ModelNotFound(f"Artefato do modelo {name} não encontrado: {path}")
+        try:
+            model = joblib.load(path, mmap_mode=self.mmap_mode)
+        except Exception as e:
+            self._errors[name] = f"{type(e).__name__}: {e}"
+            raise ModelLoadError(f"Não foi possível carregar o modelo {name} ({path}): {e}") from e
+        return LoadedModel(
+            name=name,
+            path=path,
+            model=model,
+            checksum=checksum,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+        )
+
+    def _swap(self, name: str, loaded: LoadedModel) -> LoadedModel:
+        """
+        Publica a nova versão. Deve ser chamado com o lock do modelo.
+        """
+        self._loaded[name] = loaded
+        self._errors.pop(name, None)
+        history = self._history.setdefault(name, [])
+        history.append({"version": loaded.version, "checksum": loaded.checksum, "loaded_at": loaded.loaded_at})
+        del history[:-MODEL_HISTORY]
+        logger.info("Modelo %s carregado: versão %s (%s)", name, loaded.version, loaded.path)
+        for callback in self._listeners:
+            try:
+                callback(loaded)
+            except Exception:
+                logger.warning("Falha ao notificar a troca do modelo %s.", name, exc_info=True)
+        return loaded
+
+    def status(self, name: Optional[str] = None) -> List[dict]:
+        """
+        Estado dos modelos registrados (ou só de `name`): versão em uso, checksum,
+        último erro de carga e histórico das versões carregadas.
+        """
+        nomes = [name] if name is not None else list(self._files)
+        resultado = []
+        for nome in nomes:
+            loaded = self._loaded.get(nome)
+            resultado.append({
+                "name": nome,
+                "path": self.path(nome),
+                "loaded": loaded is not None,
+                "version": loaded.version if loaded else None,
+                "checksum": loaded.checksum if loaded else None,
+                "size": loaded.size if loaded else None,
+                "loaded_at": loaded.loaded_at if loaded else None,
+                "error": self._errors.get(nome),
+                "history": list(self._history.get(nome, [])),
+            })
+        return resultado
+
+    def check(self) -> None:
+        """
+        Recarrega os modelos já carregados cujo artefato mudou (data de modificação ou
+        tamanho) desde a carga.
+        """
+        for name, loaded in list(self._loaded.items()):
+            try:
+                stat = os.stat(loaded.path)
+                if (stat.st_mtime_ns, stat.st_size) != (loaded.mtime_ns, loaded.size):
+                    self.reload(name)
+            except Exception:
+                logger.warning("Falha ao recarregar o modelo %s; mantida a versão atual.", name, exc_info=True)
+
+    def watch(self, interval: float = MODEL_WATCH_INTERVAL) -> None:
+        """
+        Inicia a verificação periódica dos artefatos (ver check) em uma thread.
+        """
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                self.check()
+
+        self._watcher = threading.Thread(target=run, name="model-registry-watch", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+model_registry = ModelRegistry()
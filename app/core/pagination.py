@@ -0,0 +1,63 @@
+import os
+from typing import List, Optional, TypeVar
+
+from fastapi import Query, Request, Response
+from sqlalchemy import Select
+
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "1000"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "10000"))
+
+T = TypeVar("T")
+
+
+class Page:
+    """
+    Parâmetros de paginação por cursor (keyset no id) das rotas de listagem:
+    `limit` registros com id maior que `after`, em ordem de id.
+    """
+
+    def __init__(
+            self,
+            limit: int = Query(
+                PAGE_SIZE, ge=1, le=PAGE_SIZE_MAX, description="Registros por página"
+            ),
+            after: Optional[int] = Query(
+                None, description="Cursor: devolve os registros com id maior que este "
+                                  "(valor de X-Next-Cursor da página anterior)"
+            )
+    ) -> None:
+        self.limit = limit
+        self.after = after
+
+
+def keyset(query: Select, id_column, limit: Optional[int], after: Optional[int]) -> Select:
+    """
+    Aplica a paginação por cursor à consulta: id > after, ordenado por id, até `limit` linhas.
+    """
+    if after is not None:
+        query = query.filter(id_column > after)
+    query = query.order_by(id_column)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def set_next_cursor(request: Request, response: Response, cursor: int, limit: int) -> None:
+    """
+    Informa o cursor da próxima página nos cabeçalhos X-Next-Cursor e Link (rel="next").
+    """
+    response.headers["X-Next-Cursor"] = str(cursor)
+    url = request.url.include_query_params(after=cursor, limit=limit)
+    response.headers["Link"] = f'<{url}>; rel="next"'
+
+
+def next_page(request: Request, response: Response, rows: List[T], page: Page) -> List[T]:
+    """
+    Recebe até `page.limit + 1` registros (ver keyset) e devolve só os da página. Se houver
+    mais registros, informa o cursor da próxima página (ver set_next_cursor).
+    """
+    if len(rows) <= page.limit:
+        return rows
+    rows = rows[:page.limit]
+    set_next_cursor(request, response, rows[-1].id, page.limit)
+    return rows
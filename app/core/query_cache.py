@@ -0,0 +1,300 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Type
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import PAGE_SIZE, Page, set_next_cursor
+from app.core.serialization import json_page
+
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "300"))
+# Backend compartilhado opcional (ex.: redis://localhost:6379/0); vazio usa só a memória local.
+QUERY_CACHE_URL = os.getenv("QUERY_CACHE_URL", "")
+# Timeout (s) de conexão e de cada comando no backend compartilhado; ao estourar, a
+# requisição segue sem o cache.
+QUERY_CACHE_TIMEOUT = float(os.getenv("QUERY_CACHE_TIMEOUT", "0.25"))
+
+logger = logging.getLogger(__name__)
+
+
+class LocalBackend:
+    """
+    LRU em memória do processo, limitado pelo tamanho (bytes) das respostas guardadas.
+    """
+
+    def __init__(self, max_bytes: int = QUERY_CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + ttl, value)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def version(self, table: str) -> int:
+        with self._lock:
+            return self._versions.get(table, 0)
+
+    def bump(self, table: str) -> None:
+        """
+        Troca a versão da tabela (as chaves antigas deixam de ser usadas) e libera
+        a memória das suas entradas.
+        """
+        prefix = f"{table}:"
+        with self._lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        """
+        Remove uma entrada. Deve ser chamado com o lock.
+        """
+        _, value = self._entries.pop(key)
+        self.size -= len(key) + len(value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "local",
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+class RedisBackend:
+    """
+    Backend compartilhado entre processos e réplicas da API, no Redis. As entradas
+    expiram pelo TTL do próprio Redis (e pela política de memória configurada nele);
+    a versão de cada tabela é um contador (INCR) compartilhado.
+
+    O cliente é síncrono (também usado pelas gravações, fora do event loop): nas rotas
+    assíncronas, QueryCache.page o chama no threadpool (`blocking`), e `timeout` limita
+    cada comando para que um Redis lento ou fora do ar não prenda as requisições.
+    """
+
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "query_cache", timeout: float = QUERY_CACHE_TIMEOUT) -> None:
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "QUERY_CACHE_URL requer o pacote redis (pip install redis)."
+            ) from e
+        self.url = url
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(f"{self.prefix}:{key}")
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._client.set(f"{self.prefix}:{key}", value, ex=ttl)
+
+    def version(self, table: str) -> int:
+        return int(self._client.get(f"{self.prefix}:versao:{table}") or 0)
+
+    def bump(self, table: str) -> None:
+        self._client.incr(f"{self.prefix}:versao:{table}")
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "url": self.url}
+
+
+def normalize_filters(filtros: dict, page: Optional[Page] = None) -> dict:
+    """
+    Forma canônica dos filtros de uma consulta: sem filtros vazios (None ou lista vazia)
+    e com as listas ordenadas e sem repetição, para que `?ano=2020&ano=2019` e
+    `?ano=2019&ano=2020&ano=2019` resultem na mesma chave. `limit` só entra na chave
+    quando difere de PAGE_SIZE e `after` só quando informado.
+    """
+    normalizados = {}
+    for nome, valor in filtros.items():
+        if valor is None or valor == []:
+            continue
+        if isinstance(valor, (list, tuple, set)):
+            valor = sorted(set(valor))
+        normalizados[nome] = valor
+    if page is not None:
+        if page.limit != PAGE_SIZE:
+            normalizados["limit"] = page.limit
+        if page.after is not None:
+            normalizados["after"] = page.after
+    return normalizados
+
+
+class QueryCache:
+    """
+    Cache das páginas JSON das rotas de leitura, indexado pela tabela e pelos filtros
+    normalizados (normalize_filters). Guarda o corpo já serializado e o cursor da
+    próxima página, de modo que um acerto não consulta o banco nem serializa de novo.
+
+    Cada tabela tem uma versão que faz parte da chave; `invalidate` troca a versão
+    sempre que a tabela é gravada (create_* e /update). Como a versão é lida antes da
+    consulta, uma leitura concorrente com a gravação nunca é servida depois dela.
+
+    O backend local vale só para o processo: com vários workers sem QUERY_CACHE_URL,
+    as gravações feitas em um worker chegam aos demais em até `ttl` segundos.
+    """
+
+    def __init__(self, backend=None, ttl: int = QUERY_CACHE_TTL) -> None:
+        """
+        :param backend: LocalBackend (padrão) ou outro objeto com get, set, version,
+            bump e stats, como RedisBackend.
+        :param ttl: validade (segundos) de cada entrada.
+        """
+        self.backend = backend if backend is not None else LocalBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and getattr(self.backend, "max_bytes", 1) > 0
+
+    def key(self, table: str, filtros: dict, page: Optional[Page] = None) -> str:
+        texto = json.dumps(normalize_filters(filtros, page), sort_keys=True, default=str)
+        digest = hashlib.sha256(texto.encode()).hexdigest()
+        return f"{table}:{self.backend.version(table)}:{digest}"
+
+    def get(self, key: str) -> Optional[Tuple[bytes, Optional[int]]]:
+        """
+        :return: (corpo JSON, cursor da próxima página ou None), ou None se não estiver em cache.
+        """
+        try:
+            value = self.backend.get(key)
+        except Exception:
+            logger.warning("Falha ao ler o cache de consultas; consultando o banco.", exc_info=True)
+            self._count("errors")
+            value = None
+        if value is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        cursor, body = value.split(b"\n", 1)
+        return body, int(cursor) if cursor else None
+
+    def set(self, key: str, body: bytes, cursor: Optional[int]) -> None:
+        value = (str(cursor) if cursor is not None else "").encode() + b"\n" + body
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception:
+            logger.warning("Falha ao gravar no cache de consultas.", exc_info=True)
+            self._count("errors")
+
+    def invalidate(self, *tables: str) -> None:
+        """
+        Descarta as entradas das tabelas gravadas. Chame após o commit.
+        """
+        for table in tables:
+            try:
+                self.backend.bump(table)
+            except Exception:
+                logger.warning("Falha ao invalidar o cache da tabela %s.", table, exc_info=True)
+                self._count("errors")
+
+    async def page(
+            self,
+            request: Request,
+            db: AsyncSession,
+            table: str,
+            filtros: dict,
+            page: Page,
+            query: Select,
+            schema: Type[BaseModel]
+    ) -> Optional[Response]:
+        """
+        Página JSON da rota, do cache ou da consulta `query` (até `page.limit + 1`
+        registros, ver keyset e json_page), com os cabeçalhos de paginação e X-Cache
+        (HIT/MISS).
+        :return: None se a consulta não tiver registros (não guardado em cache).
+        """
+        key = None
+        if self.enabled:
+            try:
+                key = await self._call(self.key, table, filtros, page)
+            except Exception:
+                logger.warning("Falha ao ler o cache de consultas; consultando o banco.", exc_info=True)
+                self._count("errors")
+        cached = await self._call(self.get, key) if key is not None else None
+        estado = "HIT"
+        if cached is None:
+            cached = await json_page(db, query, schema, page.limit)
+            if cached is None:
+                return None
+            if key is not None:
+                await self._call(self.set, key, *cached)
+            estado = "MISS"
+
+        body, cursor = cached
+        response = Response(body, media_type="application/json", headers={"X-Cache": estado})
+        if cursor is not None:
+            set_next_cursor(request, response, cursor, page.limit)
+        return response
+
+    async def _call(self, funcao, *args):
+        """
+        Executa uma operação do cache a partir do event loop: direto no backend local e
+        no threadpool nos backends de rede (atributo `blocking`, como RedisBackend).
+        """
+        if getattr(self.backend, "blocking", False):
+            return await run_in_threadpool(funcao, *args)
+        return funcao(*args)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> dict:
+        consultas = self.hits + self.misses
+        return {
+            **self.backend.stats(),
+            "enabled": self.enabled,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / consultas, 4) if consultas else None,
+            "errors": self.errors,
+        }
+
+
+query_cache = QueryCache(RedisBackend(QUERY_CACHE_URL) if QUERY_CACHE_URL else None)
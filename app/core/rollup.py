@@ -0,0 +1,249 @@
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import BigInteger, Column, Float, Integer, Select, Table, cast, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+
+FUNCOES = ("sum", "avg", "min", "max", "count")
+METRICA = re.compile(r"^\s*(\w+)\s*(?:\(\s*(\w*|\*)\s*\))?\s*$")
+# Dialetos com INSERT ... ON CONFLICT DO UPDATE (soma incremental em Rollup.add).
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class Rollup:
+    """
+    Tabela de agregados pré-calculados de `model` (materializada), agrupada pelas
+    `dimensoes`: número de registros e soma, mínimo e máximo de cada uma das `metricas`.
+    Chama-se <tabela>_por_<dimensões> e é atualizada na mesma transação das gravações:
+    por add_to_rollups (um registro novo, soma incremental) ou refresh_rollups (lotes e
+    upserts, recálculo dos anos gravados).
+
+    Todas as dimensões começam por `ano`, para que o recálculo seja feito só nos anos
+    gravados.
+    """
+
+    def __init__(self, model: Type[Base], dimensoes: Sequence[str], metricas: Sequence[str]) -> None:
+        if dimensoes[0] != "ano":
+            raise ValueError("As dimensões de um rollup devem começar por ano")
+        self.model = model
+        self.dimensoes = tuple(dimensoes)
+        self.metricas = tuple(metricas)
+        source = model.__table__.c
+        self.table = Table(
+            f"{model.__tablename__}_por_{'_'.join(dimensoes)}",
+            Base.metadata,
+            *(Column(dim, source[dim].type, primary_key=True) for dim in self.dimensoes),
+            Column("registros", BigInteger, nullable=False),
+            *(
+                Column(f"{metrica}_{sufixo}", BigInteger if sufixo == "sum" else Integer, nullable=False)
+                for metrica in self.metricas
+                for sufixo in ("sum", "min", "max")
+            ),
+        )
+
+    def source_query(self) -> Select:
+        """
+        SELECT ... GROUP BY na tabela de origem, nas colunas e na ordem de self.table.
+        """
+        source = self.model.__table__.c
+        return select(
+            *(source[dim] for dim in self.dimensoes),
+            func.count(),
+            *(
+                agregado(source[metrica])
+                for metrica in self.metricas
+                for agregado in (func.sum, func.min, func.max)
+            ),
+        ).group_by(*(source[dim] for dim in self.dimensoes))
+
+    def refresh(self, db: Session, anos: Optional[Iterable[int]] = None) -> None:
+        """
+        Recalcula os agregados dos `anos` informados (todos, se None) na transação de `db`.
+        """
+        query = self.source_query()
+        apagar = delete(self.table)
+        if anos is not None:
+            anos = sorted(set(anos))
+            query = query.where(self.model.__table__.c.ano.in_(anos))
+            apagar = apagar.where(self.table.c.ano.in_(anos))
+        db.execute(apagar)
+        db.execute(insert(self.table).from_select([col.name for col in self.table.c], query))
+
+    def add(self, db: Session, registro: dict) -> None:
+        """
+        Soma um registro novo da tabela de origem ao seu grupo (INSERT ... ON CONFLICT DO
+        UPDATE), sem reler o ano. Nos bancos sem upsert, recalcula o ano do registro.
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect not in UPSERT_INSERTS:
+            self.refresh(db, [registro["ano"]])
+            return
+        valores = {dim: registro[dim] for dim in self.dimensoes}
+        valores["registros"] = 1
+        for metrica in self.metricas:
+            for sufixo in ("sum", "min", "max"):
+                valores[f"{metrica}_{sufixo}"] = registro[metrica]
+        statement = UPSERT_INSERTS[dialect](self.table).values(**valores)
+        # min/max de dois valores: least/greatest no PostgreSQL, min/max escalares no SQLite
+        menor, maior = (func.least, func.greatest) if dialect == "postgresql" else (func.min, func.max)
+        colunas, novos = self.table.c, statement.excluded
+        atualizar = {"registros": colunas.registros + 1}
+        for metrica in self.metricas:
+            soma, minimo, maximo = (f"{metrica}_{sufixo}" for sufixo in ("sum", "min", "max"))
+            atualizar[soma] = colunas[soma] + novos[soma]
+            atualizar[minimo] = menor(colunas[minimo], novos[minimo])
+            atualizar[maximo] = maior(colunas[maximo], novos[maximo])
+        db.execute(statement.on_conflict_do_update(index_elements=list(self.dimensoes), set_=atualizar))
+
+
+def lock_rollups(db: Session, rollups: Sequence[Rollup]) -> None:
+    """
+    Serializa, até o fim da transação, as atualizações dos rollups das tabelas de
+    `rollups`. No PostgreSQL (READ COMMITTED), dois recálculos concorrentes do mesmo ano
+    apagariam as mesmas linhas e o segundo INSERT violaria a chave primária com as
+    linhas que o primeiro acabou de confirmar; com pg_advisory_xact_lock, o segundo
+    espera o commit do primeiro e recalcula já vendo os seus dados. Os demais bancos
+    (SQLite) já serializam as escritas.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for tabela in sorted({rollup.model.__tablename__ for rollup in rollups}):
+        db.execute(select(func.pg_advisory_xact_lock(zlib.crc32(f"rollup:{tabela}".encode()))))
+
+
+def refresh_rollups(db: Session, rollups: Sequence[Rollup], anos: Optional[Iterable[int]] = None) -> None:
+    """
+    Recalcula os rollups de uma tabela depois de uma gravação, antes do commit, para que
+    dados e agregados mudem juntos. Relê todas as linhas dos anos gravados (custo
+    proporcional ao tamanho desses anos): use-a em lotes e upserts, e add_to_rollups
+    para um registro novo.
+    :param anos: anos gravados; None recalcula tudo.
+    """
+    db.flush()
+    lock_rollups(db, rollups)
+    anos = None if anos is None else list(anos)
+    for rollup in rollups:
+        rollup.refresh(db, anos)
+
+
+def add_to_rollups(db: Session, rollups: Sequence[Rollup], registro: dict) -> None:
+    """
+    Soma aos rollups um registro recém-inserido na tabela de origem (não um upsert),
+    antes do commit, sem recalcular o ano inteiro.
+    :param registro: valores das colunas do registro (dimensões e métricas).
+    """
+    db.flush()
+    lock_rollups(db, rollups)
+    for rollup in rollups:
+        rollup.add(db, registro)
+
+
+def parse_metricas(metricas: Iterable[str], colunas: Sequence[str]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Interpreta métricas como `sum(valor_dolar)`, `avg(quantidade_kg)` ou `count`, que podem
+    vir repetidas ou separadas por vírgula.
+    :return: lista de (função, coluna); a coluna é None em count.
+    """
+    resultado = []
+    for texto in (item for valor in metricas for item in valor.split(",") if item.strip()):
+        match = METRICA.match(texto)
+        funcao, coluna = (match.group(1).lower(), match.group(2)) if match else (None, None)
+        if funcao not in FUNCOES:
+            raise ValueError(
+                f"Métrica inválida: {texto.strip()}. Use {', '.join(FUNCOES)}, como sum({colunas[0]})."
+            )
+        if funcao == "count":
+            coluna = None
+        elif coluna not in colunas:
+            raise ValueError(
+                f"Coluna inválida em {texto.strip()}. Colunas disponíveis: {', '.join(colunas)}."
+            )
+        if (funcao, coluna) not in resultado:
+            resultado.append((funcao, coluna))
+    if not resultado:
+        raise ValueError("Informe ao menos uma métrica.")
+    return resultado
+
+
+def parse_dimensoes(por: Iterable[str], dimensoes: Dict[str, str]) -> List[str]:
+    """
+    Nomes (da API) das dimensões pedidas em `por`, que podem vir repetidas ou separadas
+    por vírgula. `dimensoes` mapeia o nome na API para a coluna (ex.: pais -> paises).
+    """
+    resultado = []
+    for nome in (item.strip() for valor in por for item in valor.split(",") if item.strip()):
+        if nome not in dimensoes:
+            raise ValueError(f"Dimensão inválida: {nome}. Use {', '.join(dimensoes)}.")
+        if nome not in resultado:
+            resultado.append(nome)
+    return resultado
+
+
+def _metrica(colunas, funcao: str, coluna: Optional[str], pre_agregada: bool):
+    """
+    Expressão SQL da métrica, na tabela de origem ou (pre_agregada) em um rollup, onde
+    as somas, mínimos, máximos e contagens dos grupos são combinados de novo.
+    """
+    if funcao == "count":
+        return cast(func.sum(colunas.registros) if pre_agregada else func.count(), BigInteger)
+    if not pre_agregada:
+        if funcao == "avg":
+            return cast(func.avg(colunas[coluna]), Float)
+        if funcao == "sum":
+            return cast(func.sum(colunas[coluna]), BigInteger)
+        return getattr(func, funcao)(colunas[coluna])
+    if funcao == "avg":
+        return cast(func.sum(colunas[f"{coluna}_sum"]), Float) / func.sum(colunas.registros)
+    if funcao == "sum":
+        return cast(func.sum(colunas[f"{coluna}_sum"]), BigInteger)
+    return getattr(func, funcao)(colunas[f"{coluna}_{funcao}"])
+
+
+def aggregate(
+        model: Type[Base],
+        rollups: Sequence[Rollup],
+        dimensoes: Dict[str, str],
+        por: List[str],
+        metricas: List[Tuple[str, Optional[str]]],
+        filtros: Dict[str, Optional[List]],
+        ano_inicio: Optional[int] = None,
+        ano_fim: Optional[int] = None
+) -> Tuple[Select, str]:
+    """
+    Monta o SELECT ... GROUP BY das métricas por `por` (ver parse_dimensoes e parse_metricas).
+    Usa o menor rollup que contenha as dimensões agrupadas e filtradas; se nenhum servir,
+    agrega a própria tabela.
+    :param filtros: valores aceitos por dimensão (nome na API); None ou [] não filtra.
+    :return: (consulta, nome da tabela lida).
+    """
+    filtros = {nome: valores for nome, valores in filtros.items() if valores}
+    usadas = {dimensoes[nome] for nome in [*por, *filtros]}
+    if ano_inicio is not None or ano_fim is not None:
+        usadas.add("ano")
+    rollup = next(
+        (r for r in sorted(rollups, key=lambda r: len(r.dimensoes)) if usadas <= set(r.dimensoes)),
+        None,
+    )
+
+    colunas = (rollup.table if rollup is not None else model.__table__).c
+    selecionadas = [colunas[dimensoes[nome]].label(nome) for nome in por]
+    for funcao, coluna in metricas:
+        nome = "count" if funcao == "count" else f"{funcao}_{coluna}"
+        expressao = _metrica(colunas, funcao, coluna, pre_agregada=rollup is not None)
+        selecionadas.append(expressao.label(nome))
+
+    query = select(*selecionadas)
+    for nome, valores in filtros.items():
+        query = query.where(colunas[dimensoes[nome]].in_(valores))
+    if ano_inicio is not None:
+        query = query.where(colunas.ano >= ano_inicio)
+    if ano_fim is not None:
+        query = query.where(colunas.ano <= ano_fim)
+    if por:
+        agrupadas = [colunas[dimensoes[nome]] for nome in por]
+        query = query.group_by(*agrupadas).order_by(*agrupadas)
+    return query, (rollup.table if rollup is not None else model.__table__).name
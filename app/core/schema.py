@@ -0,0 +1,29 @@
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.engine import Engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
+
+
+def alembic_config() -> Config:
+    """
+    Configuração do Alembic (alembic.ini na raiz do projeto, migrações em app/migrations).
+    """
+    config = Config(os.path.abspath(ALEMBIC_INI))
+    # mantém a configuração de logging da aplicação (uvicorn)
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def upgrade_schema(engine: Engine, revision: str = "head") -> None:
+    """
+    Aplica as migrações pendentes no banco do engine. Bancos criados antes das
+    migrações (por create_all) são ajustados sem perda: as tabelas existentes são
+    mantidas e só recebem as chaves naturais, o ano inteiro e os índices.
+    """
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
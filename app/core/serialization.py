@@ -0,0 +1,50 @@
+from typing import List, Optional, Sequence, Tuple, Type
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.streaming import schema_columns
+
+
+def row_query(query: Select, schema: Type[BaseModel]) -> Tuple[List[str], Select]:
+    """
+    SELECT das colunas de `schema` (ver schema_columns), acrescido do id quando o schema
+    não o inclui, já que o cursor da paginação é o id.
+    :return: (nomes das colunas do schema, consulta).
+    """
+    columns, rows_query = schema_columns(query, schema)
+    if "id" not in columns:
+        model = query.column_descriptions[0]["entity"]
+        rows_query = rows_query.add_columns(model.id)
+    return columns, rows_query
+
+
+def dump_rows(columns: Sequence[str], rows: Sequence[Sequence]) -> bytes:
+    """
+    Lista JSON de objetos com as `columns` de cada linha (tuplas), codificada pelo
+    orjson. Colunas a mais no fim da linha são ignoradas.
+    """
+    return orjson.dumps([dict(zip(columns, row)) for row in rows])
+
+
+async def json_page(
+        db: AsyncSession,
+        query: Select,
+        schema: Type[BaseModel],
+        limit: int
+) -> Optional[Tuple[bytes, Optional[int]]]:
+    """
+    Executa a consulta de uma página (até `limit + 1` registros, ver keyset) e devolve o
+    corpo JSON da resposta, no mesmo formato de response_model=List[schema], sem criar
+    objetos ORM nem validar cada linha no pydantic: as colunas vêm em tuplas e vão
+    direto para o orjson.
+    :return: (corpo JSON, cursor da próxima página ou None), ou None se não houver registros.
+    """
+    columns, query = row_query(query, schema)
+    rows = (await db.execute(query)).all()
+    if not rows:
+        return None
+    cursor = rows[limit - 1].id if len(rows) > limit else None
+    return dump_rows(columns, rows[:limit]), cursor
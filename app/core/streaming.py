@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, List, Optional, Tuple, Type
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+
+NDJSON = "application/x-ndjson"
+CSV = "text/csv"
+STREAM_MEDIA_TYPES = (NDJSON, CSV)
+
+# Documentação OpenAPI dos formatos de streaming, para o parâmetro `responses` das rotas.
+STREAM_RESPONSES = {200: {"content": {NDJSON: {}, CSV: {}}}}
+
+
+def stream_format(request: Request) -> Optional[str]:
+    """
+    Formato de streaming pedido no cabeçalho Accept (application/x-ndjson ou text/csv),
+    ou None para a resposta JSON paginada.
+    """
+    accept = request.headers.get("accept", "")
+    media_types = [item.split(";")[0].strip().lower() for item in accept.split(",")]
+    for media_type in media_types:
+        if media_type in STREAM_MEDIA_TYPES:
+            return media_type
+    return None
+
+
+def _ndjson(columns: List[str], rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows
+    )
+
+
+def _csv(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
+
+
+def schema_columns(query: Select, schema: Type[BaseModel]) -> Tuple[List[str], Select]:
+    """
+    Restringe o SELECT do modelo às colunas de `schema`, na ordem do schema, para que o
+    resultado venha em tuplas, sem objetos ORM.
+    :return: (nomes das colunas, consulta).
+    """
+    columns = list(schema.model_fields)
+    model = query.column_descriptions[0]["entity"]
+    return columns, query.with_only_columns(*(getattr(model, col) for col in columns))
+
+
+async def partitions(bind, query: Select, batch_size: int) -> AsyncIterator[list]:
+    """
+    Percorre o resultado da consulta em lotes de até `batch_size` linhas, com
+    AsyncSession.stream e yield_per (no asyncpg, um cursor do lado do servidor), em uma
+    sessão própria aberta em `bind`.
+    """
+    async with AsyncSession(bind=bind) as stream_db:
+        result = await stream_db.stream(query, execution_options={"yield_per": batch_size})
+        async for rows in result.partitions():
+            yield rows
+
+
+def stream_query(
+        db: AsyncSession,
+        query: Select,
+        schema: Type[BaseModel],
+        media_type: str,
+        batch_size: int = STREAM_BATCH_SIZE
+) -> StreamingResponse:
+    """
+    Envia todas as linhas da consulta em NDJSON ou CSV, lote a lote, sem carregá-las
+    na memória: só as colunas de `schema` são lidas (ver schema_columns) e o resultado
+    é percorrido em lotes (ver partitions).
+
+    A consulta roda em uma sessão própria, aberta no mesmo banco de `db`, que dura
+    enquanto a resposta é enviada (a sessão da requisição é fechada antes disso).
+    :param query: SELECT do modelo (ver select_* nos módulos de app.v1.crud).
+    :param schema: schema de saída da rota; define as colunas e a sua ordem.
+    """
+    columns, query = schema_columns(query, schema)
+    bind = db.bind
+
+    async def generate() -> AsyncIterator[str]:
+        if media_type == CSV:
+            yield _csv([columns])
+        async for rows in partitions(bind, query, batch_size):
+            yield _csv(rows) if media_type == CSV else _ndjson(columns, rows)
+
+    return StreamingResponse(generate(), media_type=media_type)
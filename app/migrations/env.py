@@ -0,0 +1,66 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.core.database import Base, engine
+from app.v1.models import (  # noqa: F401 (registra as tabelas em Base.metadata)
+    comercializacao,
+    exportacao,
+    importacao,
+    predicao_exportacao,
+    predicao_producao,
+    processamento,
+    producao,
+    scrape_estado,
+)
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _configure(**kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        compare_type=True,
+        # SQLite não altera colunas/constraints com ALTER TABLE: recria a tabela.
+        render_as_batch=True,
+        **kwargs
+    )
+
+
+def run_migrations_offline() -> None:
+    """
+    Gera o SQL das migrações sem conectar ao banco (alembic upgrade head --sql).
+    """
+    url = config.get_main_option("sqlalchemy.url") or engine.url.render_as_string(hide_password=False)
+    _configure(url=url, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """
+    Aplica as migrações na conexão recebida de app.core.schema.upgrade_schema ou,
+    pela linha de comando, no engine de app.core.database.
+    """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    with engine.connect() as connection:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
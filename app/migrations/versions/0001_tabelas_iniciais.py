@@ -0,0 +1,112 @@
+"""tabelas iniciais
+
+Esquema criado até aqui por Base.metadata.create_all, sem as chaves naturais.
+Bancos já existentes (criados por create_all) mantêm as suas tabelas: só as que
+faltam são criadas.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 11:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _id() -> sa.Column:
+    return sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True)
+
+
+def _created_at() -> sa.Column:
+    return sa.Column(
+        "created_at", sa.DateTime(timezone=False), server_default=sa.func.now(), nullable=False
+    )
+
+
+TABELAS = {
+    "producao": lambda: [
+        _id(),
+        sa.Column("produto", sa.String(), nullable=False),
+        sa.Column("quantidade_l", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(), nullable=False),
+        sa.Column("ano", sa.String(), nullable=False),
+    ],
+    "processamento": lambda: [
+        _id(),
+        sa.Column("cultivar", sa.String(), nullable=False),
+        sa.Column("quantidade_kg", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(), nullable=False),
+        sa.Column("caracteristica", sa.String(), nullable=False),
+        sa.Column("ano", sa.String(), nullable=False),
+    ],
+    "comercializacao": lambda: [
+        _id(),
+        sa.Column("produto", sa.String(), nullable=False),
+        sa.Column("quantidade_l", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(), nullable=False),
+        sa.Column("ano", sa.String(), nullable=False),
+    ],
+    "importacao": lambda: [
+        _id(),
+        sa.Column("paises", sa.String(), nullable=False),
+        sa.Column("quantidade_kg", sa.Integer(), nullable=False),
+        sa.Column("valor_dolar", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(), nullable=False),
+        sa.Column("ano", sa.String(), nullable=False),
+    ],
+    "exportacao": lambda: [
+        _id(),
+        sa.Column("paises", sa.String(), nullable=False),
+        sa.Column("quantidade_kg", sa.Integer(), nullable=False),
+        sa.Column("valor_dolar", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(), nullable=False),
+        sa.Column("ano", sa.String(), nullable=False),
+    ],
+    "predicao_producao": lambda: [
+        _id(),
+        sa.Column("produto", sa.String(), nullable=False),
+        sa.Column("tipo", sa.String(), nullable=False),
+        sa.Column("ano", sa.String(), nullable=False),
+        sa.Column("valor_previsto", sa.Float(), nullable=False),
+        _created_at(),
+    ],
+    "predicao_exportacao": lambda: [
+        _id(),
+        sa.Column("pais", sa.String(), nullable=False),
+        sa.Column("quantidade_kg", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(), nullable=False),
+        sa.Column("valor_previsto", sa.Float(), nullable=False),
+        _created_at(),
+    ],
+    "scrape_estado": lambda: [
+        _id(),
+        sa.Column("dataset", sa.String(), nullable=False),
+        sa.Column("subopcao", sa.String(), nullable=False),
+        sa.Column("ano", sa.Integer(), nullable=False),
+        sa.Column("content_hash", sa.String(64), nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=False), server_default=sa.func.now(), nullable=False
+        ),
+        sa.UniqueConstraint("dataset", "subopcao", "ano"),
+    ],
+}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for nome, colunas in TABELAS.items():
+        if inspector.has_table(nome):
+            continue
+        op.create_table(nome, *colunas())
+        op.create_index(f"ix_{nome}_id", nome, ["id"])
+
+
+def downgrade() -> None:
+    for nome in reversed(list(TABELAS)):
+        op.drop_table(nome)
@@ -0,0 +1,56 @@
+"""chaves naturais dos datasets
+
+Antes de criar cada UniqueConstraint, remove as linhas duplicadas acumuladas pelos
+/update antigos, mantendo a mais recente (maior id) de cada chave. Tabelas que já
+têm a chave (criadas por create_all depois das chaves naturais) não são alteradas.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 11:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHAVES = {
+    "producao": ["produto", "tipo", "ano"],
+    "processamento": ["cultivar", "tipo", "caracteristica", "ano"],
+    "comercializacao": ["produto", "tipo", "ano"],
+    "importacao": ["paises", "tipo", "ano"],
+    "exportacao": ["paises", "tipo", "ano"],
+}
+
+
+def _existentes(inspector, tabela: str) -> set:
+    nomes = {uc["name"] for uc in inspector.get_unique_constraints(tabela)}
+    return nomes | {ix["name"] for ix in inspector.get_indexes(tabela) if ix["unique"]}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    preparer = bind.dialect.identifier_preparer
+    for tabela, colunas in CHAVES.items():
+        nome = f"uq_{tabela}_chave_natural"
+        if nome in _existentes(inspector, tabela):
+            continue
+        quoted = preparer.quote(tabela)
+        grupo = ", ".join(preparer.quote(col) for col in colunas)
+        op.execute(
+            f"DELETE FROM {quoted} WHERE id NOT IN "
+            f"(SELECT MAX(id) FROM {quoted} GROUP BY {grupo})"
+        )
+        with op.batch_alter_table(tabela) as batch:
+            batch.create_unique_constraint(nome, colunas)
+
+
+def downgrade() -> None:
+    for tabela in CHAVES:
+        with op.batch_alter_table(tabela) as batch:
+            batch.drop_constraint(f"uq_{tabela}_chave_natural", type_="unique")
@@ -0,0 +1,59 @@
+"""ano inteiro e índices compostos dos filtros
+
+Converte `ano` dos datasets de texto para inteiro (permitindo os filtros por
+intervalo anoInicio/anoFim) e cria os índices usados pelos filtros das rotas GET:
+
+- a chave natural (produto/cultivar/paises, tipo, ..., ano) já atende aos filtros
+  que começam pelo produto ou país;
+- (tipo, ano) atende aos filtros por tipo, com ou sem ano/intervalo;
+- (ano) atende aos filtros só por ano ou intervalo de anos.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABELAS = ["producao", "processamento", "comercializacao", "importacao", "exportacao"]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for tabela in TABELAS:
+        colunas = {col["name"]: col for col in inspector.get_columns(tabela)}
+        indices = {ix["name"] for ix in inspector.get_indexes(tabela)}
+        with op.batch_alter_table(tabela) as batch:
+            if not isinstance(colunas["ano"]["type"], sa.Integer):
+                batch.alter_column(
+                    "ano",
+                    type_=sa.Integer(),
+                    existing_type=sa.String(),
+                    existing_nullable=False,
+                    postgresql_using="ano::integer"
+                )
+        if f"ix_{tabela}_tipo_ano" not in indices:
+            op.create_index(f"ix_{tabela}_tipo_ano", tabela, ["tipo", "ano"])
+        if f"ix_{tabela}_ano" not in indices:
+            op.create_index(f"ix_{tabela}_ano", tabela, ["ano"])
+
+
+def downgrade() -> None:
+    for tabela in TABELAS:
+        op.drop_index(f"ix_{tabela}_ano", table_name=tabela)
+        op.drop_index(f"ix_{tabela}_tipo_ano", table_name=tabela)
+        with op.batch_alter_table(tabela) as batch:
+            batch.alter_column(
+                "ano",
+                type_=sa.String(),
+                existing_type=sa.Integer(),
+                existing_nullable=False,
+                postgresql_using="ano::varchar"
+            )
@@ -0,0 +1,66 @@
+"""rollups de exportação, importação e comercialização
+
+Tabelas de agregados materializados (ver app.core.rollup) usadas por GET
+/<dataset>/agregado: por (ano, tipo) e por (ano, país/produto), com o número de
+registros e a soma, o mínimo e o máximo de cada métrica. São preenchidas aqui com os
+dados já existentes e recalculadas a cada gravação.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tabela de origem -> (dimensões de cada rollup, métricas)
+ROLLUPS = {
+    "exportacao": ([("ano", "tipo"), ("ano", "paises")], ["quantidade_kg", "valor_dolar"]),
+    "importacao": ([("ano", "tipo"), ("ano", "paises")], ["quantidade_kg", "valor_dolar"]),
+    "comercializacao": ([("ano", "tipo"), ("ano", "produto")], ["quantidade_l"]),
+}
+
+
+def _nome(tabela: str, dimensoes: Sequence[str]) -> str:
+    return f"{tabela}_por_{'_'.join(dimensoes)}"
+
+
+def upgrade() -> None:
+    for tabela, (rollups, metricas) in ROLLUPS.items():
+        for dimensoes in rollups:
+            nome = _nome(tabela, dimensoes)
+            op.create_table(
+                nome,
+                *(
+                    sa.Column(dim, sa.Integer() if dim == "ano" else sa.String(), nullable=False)
+                    for dim in dimensoes
+                ),
+                sa.Column("registros", sa.BigInteger(), nullable=False),
+                *(
+                    sa.Column(f"{metrica}_{sufixo}", sa.BigInteger() if sufixo == "sum" else sa.Integer(),
+                              nullable=False)
+                    for metrica in metricas
+                    for sufixo in ("sum", "min", "max")
+                ),
+                sa.PrimaryKeyConstraint(*dimensoes),
+            )
+            grupo = ", ".join(dimensoes)
+            agregados = ", ".join(
+                f"SUM({m}), MIN({m}), MAX({m})" for m in metricas
+            )
+            op.execute(
+                f"INSERT INTO {nome} SELECT {grupo}, COUNT(*), {agregados} "
+                f"FROM {tabela} GROUP BY {grupo}"
+            )
+
+
+def downgrade() -> None:
+    for tabela, (rollups, _) in ROLLUPS.items():
+        for dimensoes in rollups:
+            op.drop_table(_nome(tabela, dimensoes))
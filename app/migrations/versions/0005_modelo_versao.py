@@ -0,0 +1,36 @@
+"""versão do modelo nas predições
+
+Adiciona `modelo_versao` a predicao_exportacao e predicao_producao: a versão
+(prefixo do sha256 do artefato, ver app.core.model_registry) do modelo que gerou
+cada predição. Fica nula nas predições anteriores.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 18:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABELAS = ["predicao_exportacao", "predicao_producao"]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for tabela in TABELAS:
+        colunas = {col["name"] for col in inspector.get_columns(tabela)}
+        if "modelo_versao" not in colunas:
+            with op.batch_alter_table(tabela) as batch:
+                batch.add_column(sa.Column("modelo_versao", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    for tabela in TABELAS:
+        with op.batch_alter_table(tabela) as batch:
+            batch.drop_column("modelo_versao")
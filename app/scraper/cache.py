@@ -0,0 +1,281 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+CACHE_DIR = os.getenv("SCRAPER_CACHE_DIR", ".cache/vitibrasil")
+CACHE_MAX_BYTES = int(os.getenv("SCRAPER_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CACHE_TTL = int(os.getenv("SCRAPER_CACHE_TTL", "3600"))
+CACHE_ANOS_ABERTOS = int(os.getenv("SCRAPER_CACHE_ANOS_ABERTOS", "3"))
+# Idade mínima (s) de um blob sem referência para ser apagado: um blob recém-gravado por
+# outro processo ainda pode estar à espera da sua entrada no índice.
+CACHE_ORPHAN_GRACE = int(os.getenv("SCRAPER_CACHE_ORPHAN_GRACE", "300"))
+
+
+@dataclass
+class CacheEntry:
+    """
+    Metadados de uma resposta armazenada. `expires_at` igual a None indica
+    entrada imutável (ano já fechado), que nunca volta à rede.
+    """
+    url: str
+    content_hash: str
+    stored_at: float
+    expires_at: Optional[float] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def immutable(self) -> bool:
+        return self.expires_at is None
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        if self.immutable:
+            return True
+        return (now if now is not None else time.time()) < self.expires_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        Cabeçalhos para revalidação condicional (ETag/Last-Modified), se houver.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Cache em disco das páginas do vitibrasil, endereçado por conteúdo.
+
+    - index/<sha256(url)>.json guarda os metadados (CacheEntry) de cada URL;
+    - blobs/<sha256(html)> guarda o HTML, compartilhado entre URLs de mesmo conteúdo.
+
+    Anos anteriores aos `anos_abertos` mais recentes são gravados como imutáveis;
+    os demais expiram após `ttl` segundos e são revalidados com ETag/Last-Modified.
+    Quando o tamanho dos blobs passa de `max_bytes`, as entradas usadas há mais
+    tempo são removidas.
+
+    Dentro de um processo, use uma única instância por diretório (ver default_cache):
+    o lock e o tamanho contabilizado são por instância.
+    """
+
+    def __init__(
+            self,
+            directory: str = CACHE_DIR,
+            max_bytes: int = CACHE_MAX_BYTES,
+            ttl: int = CACHE_TTL,
+            anos_abertos: int = CACHE_ANOS_ABERTOS,
+            orphan_grace: int = CACHE_ORPHAN_GRACE
+    ) -> None:
+        """
+        :param directory: diretório raiz do cache.
+        :param max_bytes: tamanho máximo ocupado pelos blobs antes da remoção de entradas antigas.
+        :param ttl: validade padrão (segundos) das páginas de anos ainda abertos.
+        :param anos_abertos: quantos anos mais recentes (incluindo o corrente) ainda podem mudar.
+        :param orphan_grace: idade mínima (segundos) para apagar um blob sem referência.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.anos_abertos = anos_abertos
+        self.orphan_grace = orphan_grace
+        self._index_dir = os.path.join(directory, "index")
+        self._blob_dir = os.path.join(directory, "blobs")
+        os.makedirs(self._index_dir, exist_ok=True)
+        os.makedirs(self._blob_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size = self._blobs_size()
+
+    @staticmethod
+    def _hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _index_path(self, url: str) -> str:
+        return os.path.join(self._index_dir, f"{self._hash(url.encode())}.json")
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self._blob_dir, content_hash)
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _blobs_size(self) -> int:
+        size = 0
+        for entry in os.scandir(self._blob_dir):
+            try:
+                size += entry.stat().st_size
+            except FileNotFoundError:
+                continue
+        return size
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        """
+        Apaga o arquivo e retorna o seu tamanho; 0 se outro processo já o removeu.
+        """
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+        return size
+
+    def is_closed_year(self, url: str) -> bool:
+        """
+        Indica se a URL se refere a um ano fechado (cujo conteúdo não muda mais).
+        """
+        anos = parse_qs(urlparse(url).query).get("ano")
+        if not anos or not anos[0].isdigit():
+            return False
+        return int(anos[0]) <= datetime.now().year - self.anos_abertos
+
+    def _expires_at(self, url: str, ttl: Optional[int]) -> Optional[float]:
+        if ttl is None:
+            if self.is_closed_year(url):
+                return None
+            ttl = self.ttl
+        return time.time() + ttl
+
+    def _save_entry(self, entry: CacheEntry) -> None:
+        self._write_atomic(
+            self._index_path(entry.url), json.dumps(asdict(entry)).encode()
+        )
+
+    def lookup(self, url: str) -> Optional[Tuple[CacheEntry, str]]:
+        """
+        Retorna (metadados, HTML) da URL, fresca ou não, ou None se não estiver em cache.
+        """
+        index_path = self._index_path(url)
+        try:
+            with open(index_path, "rb") as f:
+                entry = CacheEntry(**json.loads(f.read()))
+            with open(self._blob_path(entry.content_hash), "rb") as f:
+                body = f.read().decode("utf-8")
+        except (OSError, ValueError, TypeError):
+            return None
+        try:
+            os.utime(index_path)
+        except OSError:
+            pass
+        return entry, body
+
+    def store(
+            self,
+            url: str,
+            body: str,
+            etag: Optional[str] = None,
+            last_modified: Optional[str] = None,
+            ttl: Optional[int] = None
+    ) -> CacheEntry:
+        """
+        Grava uma resposta 200 no cache.
+        :param ttl: (opcional) validade em segundos; por padrão aplica a regra de anos fechados.
+        """
+        data = body.encode("utf-8")
+        entry = CacheEntry(
+            url=url,
+            content_hash=self._hash(data),
+            stored_at=time.time(),
+            expires_at=self._expires_at(url, ttl),
+            etag=etag,
+            last_modified=last_modified,
+        )
+        blob_path = self._blob_path(entry.content_hash)
+        with self._lock:
+            if not os.path.exists(blob_path):
+                self._write_atomic(blob_path, data)
+                self._size += len(data)
+            self._save_entry(entry)
+            if self._size > self.max_bytes:
+                self._evict()
+        return entry
+
+    def revalidated(self, entry: CacheEntry, ttl: Optional[int] = None) -> CacheEntry:
+        """
+        Renova a validade de uma entrada após resposta 304 (Not Modified).
+        """
+        entry.stored_at = time.time()
+        entry.expires_at = self._expires_at(entry.url, ttl)
+        with self._lock:
+            self._save_entry(entry)
+        return entry
+
+    def _evict(self) -> None:
+        """
+        Remove as entradas menos usadas recentemente até caber em max_bytes
+        e apaga os blobs que ficaram sem referência há mais de `orphan_grace` segundos.
+        O tamanho é recalculado a partir do disco, já que outros processos podem gravar
+        e remover blobs no mesmo diretório. Deve ser chamado com o lock.
+        """
+        self._size = self._blobs_size()
+        if self._size <= self.max_bytes:
+            return
+
+        entries = []
+        for item in os.scandir(self._index_dir):
+            try:
+                with open(item.path, "rb") as f:
+                    content_hash = json.loads(f.read())["content_hash"]
+                entries.append((item.stat().st_mtime, item.path, content_hash))
+            except (OSError, ValueError, KeyError):
+                continue
+        entries.sort()
+
+        referenced: Dict[str, int] = {}
+        for _, _, content_hash in entries:
+            referenced[content_hash] = referenced.get(content_hash, 0) + 1
+
+        for _, index_path, content_hash in entries:
+            if self._size <= self.max_bytes:
+                break
+            self._remove(index_path)
+            referenced[content_hash] -= 1
+            if referenced[content_hash] == 0:
+                self._size -= self._remove(self._blob_path(content_hash))
+
+        limite = time.time() - self.orphan_grace
+        for item in os.scandir(self._blob_dir):
+            if item.name in referenced:
+                continue
+            try:
+                if item.stat().st_mtime > limite:
+                    continue
+            except FileNotFoundError:
+                continue
+            self._size -= self._remove(item.path)
+
+
+_caches: Dict[str, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def default_cache() -> Optional[ResponseCache]:
+    """
+    Cache padrão usado pelo EmbrapaScraper; desativado se SCRAPER_CACHE_DIR estiver vazio.
+    Retorna sempre a mesma instância para o diretório, compartilhada pelos scrapers das
+    rotas (e pelos jobs de /update que rodam em paralelo).
+    """
+    if not CACHE_DIR:
+        return None
+    directory = os.path.abspath(CACHE_DIR)
+    with _caches_lock:
+        if directory not in _caches:
+            _caches[directory] = ResponseCache(directory)
+        return _caches[directory]
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+INITIAL_CONCURRENCY = int(os.getenv("SCRAPER_INITIAL_CONCURRENCY", "4"))
+MIN_CONCURRENCY = int(os.getenv("SCRAPER_MIN_CONCURRENCY", "1"))
+TARGET_LATENCY = float(os.getenv("SCRAPER_TARGET_LATENCY", "2.0"))
+RETRIES = int(os.getenv("SCRAPER_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("SCRAPER_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("SCRAPER_BACKOFF_MAX", "10"))
+BREAKER_THRESHOLD = int(os.getenv("SCRAPER_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("SCRAPER_BREAKER_COOLDOWN", "30"))
+
+# Respostas que indicam sobrecarga/instabilidade do servidor: reduzem a concorrência e
+# são repetidas. Demais status (inclusive 4xx) não são repetidos.
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """
+    Levantada ao pedir vaga para um host cujo circuit breaker está aberto.
+    """
+
+
+@dataclass
+class FetchFailure:
+    """
+    Falha definitiva (após as tentativas) ao buscar uma página.
+    :param reason: 'status' (resposta HTTP inesperada), 'timeout', 'connection'
+        ou 'circuit_open' (host suspenso pelo circuit breaker).
+    """
+    url: str
+    reason: str
+    attempts: int
+    status_code: Optional[int] = None
+    detail: Optional[str] = None
+
+
+def backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Espera antes da próxima tentativa: Retry-After do servidor, se houver, ou
+    backoff exponencial com jitter completo (entre 0 e BACKOFF_BASE * 2^tentativa).
+    """
+    if retry_after and retry_after.strip().isdigit():
+        return min(float(retry_after), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class HostController:
+    """
+    Limite de requisições simultâneas a um host, ajustado por AIMD: cada resposta
+    dentro da latência alvo aumenta o limite em 1/limite (cerca de +1 por "rodada"),
+    respostas lentas o reduzem em 25% e erros (timeout, conexão, 429/5xx) pela metade.
+    Só uma redução é aplicada por rodada: requisições iniciadas antes da última redução
+    não reduzem de novo.
+
+    Inclui um circuit breaker: após `breaker_threshold` erros seguidos o host fica
+    suspenso por `breaker_cooldown` segundos; depois disso uma única requisição de
+    teste decide se ele volta a ser usado. Requisições iniciadas antes da abertura que
+    terminam depois dela só liberam a vaga e ajustam o limite.
+
+    É compartilhado entre threads e event loops (cada job roda o seu asyncio.run).
+    """
+
+    def __init__(
+            self,
+            host: str,
+            max_limit: int,
+            initial: int = INITIAL_CONCURRENCY,
+            min_limit: int = MIN_CONCURRENCY,
+            target_latency: float = TARGET_LATENCY,
+            breaker_threshold: int = BREAKER_THRESHOLD,
+            breaker_cooldown: float = BREAKER_COOLDOWN
+    ) -> None:
+        self.host = host
+        self.max_limit = max(max_limit, 1)
+        self.min_limit = max(min(min_limit, self.max_limit), 1)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.target_latency = target_latency
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.state = CLOSED
+        self.consecutive_errors = 0
+        self.requests = 0
+        self.errors = 0
+        self._opened_at = 0.0
+        # início (token) da requisição de teste em andamento no estado HALF_OPEN
+        self._probe: Optional[float] = None
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def _admit(self) -> Optional[float]:
+        """
+        Tenta ocupar uma vaga. Deve ser chamado com o lock.
+        :return: instante de início da requisição (no estado HALF_OPEN, o token da
+            requisição de teste) ou None, se não houver vaga.
+        :raises CircuitOpen: se o host estiver suspenso.
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.breaker_cooldown:
+                raise CircuitOpen(self.host)
+            self.state = HALF_OPEN
+            self._probe = None
+        if self.state == HALF_OPEN and self._probe is not None:
+            raise CircuitOpen(self.host)
+        if self.in_flight >= int(self.limit):
+            return None
+        self.in_flight += 1
+        self.requests += 1
+        started = time.monotonic()
+        if self.state == HALF_OPEN:
+            self._probe = started
+        return started
+
+    def _is_probe(self, started: float) -> bool:
+        return self._probe is not None and started == self._probe
+
+    def acquire(self) -> float:
+        """
+        Aguarda uma vaga (versão bloqueante, para requests).
+        :return: instante de início da requisição, a ser passado para release/abandon.
+        """
+        with self._cond:
+            while True:
+                started = self._admit()
+                if started is not None:
+                    return started
+                self._cond.wait()
+
+    async def acquire_async(self) -> float:
+        """
+        Aguarda uma vaga sem bloquear o event loop.
+        :return: instante de início da requisição, a ser passado para release/abandon.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                started = self._admit()
+                if started is not None:
+                    return started
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            finally:
+                with self._cond:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+
+    def release(self, started: float, ok: bool) -> None:
+        """
+        Libera a vaga e ajusta o limite pelo resultado da requisição. Requisições
+        iniciadas antes da última abertura do circuit breaker não mudam o seu estado:
+        após a abertura, só a requisição de teste decide.
+        :param started: valor retornado por acquire/acquire_async.
+        :param ok: False para timeout, erro de conexão ou status em RETRY_STATUS.
+        """
+        now = time.monotonic()
+        latency = now - started
+        with self._cond:
+            self.in_flight -= 1
+            probe = self._is_probe(started)
+            if probe:
+                self._probe = None
+            if not probe and started < self._opened_at:
+                # iniciada antes da última abertura do circuit breaker
+                if ok:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                else:
+                    self.errors += 1
+                    self._decrease(started, now, 0.5)
+            elif ok:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+                self.consecutive_errors = 0
+                if self.state == HALF_OPEN:
+                    self.state = CLOSED
+                    logger.info("Circuit breaker fechado para %s", self.host)
+                if latency > self.target_latency:
+                    self._decrease(started, now, 0.75)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            else:
+                self.errors += 1
+                self.consecutive_errors += 1
+                self._decrease(started, now, 0.5)
+                if self.state == HALF_OPEN or self.consecutive_errors >= self.breaker_threshold:
+                    if self.state != OPEN:
+                        logger.warning(
+                            "Circuit breaker aberto para %s após %d erros seguidos",
+                            self.host, self.consecutive_errors
+                        )
+                    self.state = OPEN
+                    self._opened_at = now
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        _wake_all(waiters)
+
+    def abandon(self, started: float) -> None:
+        """
+        Libera a vaga de uma requisição cancelada, sem afetar o limite. Se era a
+        requisição de teste, a próxima admitida passa a ser o teste.
+        :param started: valor retornado por acquire/acquire_async.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if self._is_probe(started):
+                self._probe = None
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        _wake_all(waiters)
+
+    def _decrease(self, started: float, now: float, factor: float) -> None:
+        if started < self._last_decrease:
+            return
+        self.limit = max(float(self.min_limit), self.limit * factor)
+        self._last_decrease = now
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "host": self.host,
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "latency_s": None if self.latency is None else round(self.latency, 3),
+                "state": self.state,
+                "requests": self.requests,
+                "errors": self.errors,
+            }
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def _wake_all(waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]) -> None:
+    for loop, waiter in waiters:
+        try:
+            loop.call_soon_threadsafe(_wake, waiter)
+        except RuntimeError:
+            # event loop já encerrado (asyncio.run terminou)
+            pass
+
+
+class RequestController:
+    """
+    Registro dos HostController, um por host, compartilhado por todas as instâncias
+    de EmbrapaScraper do processo.
+    """
+
+    def __init__(self, **host_kwargs) -> None:
+        """
+        :param host_kwargs: parâmetros repassados a cada HostController criado.
+        """
+        self._host_kwargs = host_kwargs
+        self._hosts: Dict[str, HostController] = {}
+        self._lock = threading.Lock()
+
+    def host(self, url: str, max_limit: int) -> HostController:
+        """
+        Controlador do host da URL; `max_limit` só é usado na criação.
+        """
+        netloc = urlparse(url).netloc
+        with self._lock:
+            controller = self._hosts.get(netloc)
+            if controller is None:
+                controller = HostController(netloc, max_limit, **self._host_kwargs)
+                self._hosts[netloc] = controller
+            return controller
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            hosts = list(self._hosts.values())
+        return [host.snapshot() for host in hosts]
+
+
+_default_controller = RequestController()
+
+
+def default_controller() -> RequestController:
+    return _default_controller
@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+BASE_URL = "http://vitibrasil.cnpuv.embrapa.br/index.php"
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """
+    Configuração de scrape de uma aba do vitibrasil usada pelas rotas /update.
+    :param nome: nome do dataset (prefixo da rota).
+    :param main_cols: coluna principal da tabela (produto, cultivar, paises).
+    :param numeric_cols: colunas numéricas a limpar.
+    :param queries: mapeamento tipo -> query string da subopção (tipo None quando vem da tabela).
+    :param caracteristica: grava o 'item' da tabela na coluna 'caracteristica'.
+    """
+    nome: str
+    main_cols: str
+    numeric_cols: List[str]
+    queries: Dict[Optional[str], str]
+    caracteristica: bool = False
+
+    def urls(self, base_url: str = BASE_URL) -> Dict[Optional[str], str]:
+        """
+        Retorna o mapeamento tipo -> URL completa (sem o parâmetro ano).
+        """
+        return {tipo: f"{base_url}?{query}" for tipo, query in self.queries.items()}
+
+
+DATASETS: Dict[str, Dataset] = {
+    "producao": Dataset(
+        nome="producao",
+        main_cols="produto",
+        numeric_cols=["quantidade_l"],
+        queries={None: "opcao=opt_02"},
+    ),
+    "processamento": Dataset(
+        nome="processamento",
+        main_cols="cultivar",
+        numeric_cols=["quantidade_kg"],
+        queries={
+            "vinifera": "opcao=opt_03&subopcao=subopt_01",
+            "americanas_e_hibridas": "opcao=opt_03&subopcao=subopt_02",
+            "uvas_de_mesa": "opcao=opt_03&subopcao=subopt_03",
+        },
+        caracteristica=True,
+    ),
+    "comercializacao": Dataset(
+        nome="comercializacao",
+        main_cols="produto",
+        numeric_cols=["quantidade_l"],
+        queries={None: "opcao=opt_04"},
+    ),
+    "importacao": Dataset(
+        nome="importacao",
+        main_cols="paises",
+        numeric_cols=["quantidade_kg", "valor_dolar"],
+        queries={
+            "vinhos_de_mesa": "opcao=opt_05&subopcao=subopt_01",
+            "espumantes": "opcao=opt_05&subopcao=subopt_02",
+            "uvas_frescas": "opcao=opt_05&subopcao=subopt_03",
+            "uvas_passas": "opcao=opt_05&subopcao=subopt_04",
+            "suco_de_uva": "opcao=opt_05&subopcao=subopt_05",
+        },
+    ),
+    "exportacao": Dataset(
+        nome="exportacao",
+        main_cols="paises",
+        numeric_cols=["quantidade_kg", "valor_dolar"],
+        queries={
+            "vinhos_de_mesa": "opcao=opt_06&subopcao=subopt_01",
+            "espumantes": "opcao=opt_06&subopcao=subopt_02",
+            "uvas_frescas": "opcao=opt_06&subopcao=subopt_03",
+            "suco_de_uva": "opcao=opt_06&subopcao=subopt_04",
+        },
+    ),
+}
@@ -1,73 +1,259 @@
+import hashlib
 import logging
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
 import numpy as np
 import pandas as pd
 from unidecode import unidecode
 
-from app.scraper.scraper import EmbrapaScraper
+from app.scraper.datasets import BASE_URL, Dataset
+from app.scraper.controller import FetchFailure
+from app.scraper.scraper import EmbrapaScraper, Progress
 
 logger = logging.getLogger(__name__)
 
+NULL_VALUES = ["-", "nd", "*"]
 
-def create_dataframe(
+Page = Tuple[Optional[str], int, Optional[str]]
+
+
+@lru_cache(maxsize=None)
+def _normalize_text(value: str) -> str:
+    return value.lower()
+
+
+@lru_cache(maxsize=None)
+def _normalize_pais(value: str) -> str:
+    return unidecode(value.lower()).replace(" ", "_")
+
+
+def _map_distinct(series: pd.Series, func: Callable[[str], str]) -> pd.Series:
+    """
+    Aplica `func` uma única vez por valor distinto da coluna e propaga o resultado.
+    """
+    mapping = {value: func(value) for value in series.unique()}
+    return series.map(mapping)
+
+
+def fetch_pages(
         scraper: EmbrapaScraper,
-        url: str,
+        urls: Dict[Optional[str], str],
+        anos: list
+) -> List[Page]:
+    """
+    Busca em um único lote todas as páginas (url, ano) de cada tipo.
+    :param urls: mapeamento tipo -> URL da subopção (tipo None quando vem da própria tabela).
+    :return: lista de (tipo, ano, html) na ordem tipo/ano; html é None se a página falhou.
+    """
+    jobs = [(tipo, ano) for tipo in urls for ano in anos]
+    pages = scraper.request_many([f"{urls[tipo]}&ano={ano}" for tipo, ano in jobs])
+    return [(tipo, ano, page) for (tipo, ano), page in zip(jobs, pages)]
+
+
+def tag_frames(
+        jobs: List[Tuple[Optional[str], int]],
+        tables: List[Optional[pd.DataFrame]]
+) -> List[pd.DataFrame]:
+    """
+    Marca as linhas de cada tabela com o tipo e o ano de origem (colunas internas
+    '__tipo' e 'ano'). Páginas ausentes ou sem linhas são ignoradas.
+    """
+    frames = []
+    for (tipo, ano), raw_data in zip(jobs, tables):
+        if raw_data is None:
+            logger.warning("Página não obtida para tipo=%s ano=%s; ignorada.", tipo, ano)
+            continue
+        if raw_data.empty:
+            continue
+        raw_data['__tipo'] = tipo
+        raw_data['ano'] = f"{ano}"
+        frames.append(raw_data)
+    return frames
+
+
+def parse_pages(scraper: EmbrapaScraper, pages: List[Page]) -> List[pd.DataFrame]:
+    """
+    Extrai a tabela de cada página obtida por fetch_pages (ver tag_frames).
+    """
+    jobs = [(tipo, ano) for tipo, ano, _ in pages]
+    tables = [None if page is None else scraper.extract_data(page) for _, _, page in pages]
+    return tag_frames(jobs, tables)
+
+
+def assemble_dataframe(
+        frames: List[pd.DataFrame],
         main_cols: str,
-        anos: list,
         numeric_cols: list = [],
         other_cols: list = ['tipo', 'ano'],
-        tipo: str = None,
         caracteristica: bool = False
-):
+) -> pd.DataFrame:
     """
-    Extrai dados da tabela class='tb_base tb_dados' em um BeautifulSoup e
-    retorna um DataFrame. Agora, marca cada linha com o 'item' correspondente
-    (via coluna interna '__item'), mas só adiciona o item como linha se não houver subitems.
+    Concatena as tabelas das páginas uma única vez e aplica, em passadas vetorizadas,
+    a limpeza das colunas numéricas e a normalização (lowercase/unidecode) do texto.
+    O 'tipo' vem do tipo da URL ou, se ausente, do 'item' da tabela ('__item');
+    com `caracteristica`, o 'item' também é gravado na coluna 'caracteristica'.
     """
     pd.set_option('future.no_silent_downcasting', True)
 
     columns = [main_cols] + numeric_cols + other_cols
-    df = pd.DataFrame(columns=columns)
-
-    for ano in anos:
-        scraper.request_data(f"{url}&ano={ano}")
-        raw_data = scraper.extract_data()
-
-        for col in numeric_cols:
-            raw_data[col] = (
-                raw_data[col]
-                .str.replace(".", "", regex=False)
-                .replace("-", np.nan)
-                .replace("nd", np.nan)
-                .replace("*", np.nan)
-                .astype(float)
-            )
-        raw_data = raw_data.dropna(subset=numeric_cols, how="all")
-        if raw_data.empty:
-            continue
+    if caracteristica and 'caracteristica' not in columns:
+        columns.append('caracteristica')
+    if not frames:
+        return pd.DataFrame(columns=columns)
 
-        if '__item' in raw_data.columns:
-            if tipo:
-                raw_data['tipo'] = tipo
-            else:
-                raw_data['tipo'] = raw_data['__item']
-            if caracteristica:
-                raw_data['caracteristica'] = raw_data['__item']
-        else:
-            if tipo:
-                raw_data['tipo'] = tipo
-            else:
-                raw_data['tipo'] = None
-            if caracteristica:
-                raw_data['caracteristica'] = None
+    df = pd.concat(frames, ignore_index=True)
 
-        raw_data['ano'] = f"{ano}"
-        raw_data[main_cols] = [line.lower() for line in raw_data[main_cols]]
+    for col in numeric_cols:
+        df[col] = (
+            df[col]
+            .str.replace(".", "", regex=False)
+            .replace(NULL_VALUES, np.nan)
+            .astype(float)
+        )
+    df = df.dropna(subset=numeric_cols, how="all").reset_index(drop=True)
 
-        if '__item' in raw_data.columns:
-            raw_data = raw_data.drop(columns=['__item'])
+    item = df['__item'] if '__item' in df.columns else pd.Series(None, index=df.index)
+    item = item.astype(object).where(item.notna(), None)
+    df['tipo'] = df['__tipo'].where(df['__tipo'].notna(), item)
+    if caracteristica:
+        df['caracteristica'] = item
 
-        df = pd.concat([df, raw_data], ignore_index=True)
-        if "paises" in df.columns:
-            df["paises"] = df["paises"].apply(lambda x: unidecode(x).replace(" ", "_"))
+    if main_cols == "paises":
+        df[main_cols] = _map_distinct(df[main_cols], _normalize_pais)
+    else:
+        df[main_cols] = _map_distinct(df[main_cols], _normalize_text)
 
-    return df
+    return df[columns]
+
+
+def create_dataframe_tipos(
+        scraper: EmbrapaScraper,
+        urls: Dict[Optional[str], str],
+        main_cols: str,
+        anos: list,
+        numeric_cols: list = [],
+        other_cols: list = ['tipo', 'ano'],
+        caracteristica: bool = False,
+        progress: Optional[Progress] = None,
+        failures: Optional[List[FetchFailure]] = None
+) -> pd.DataFrame:
+    """
+    Faz o scrape de todas as subopções (tipo -> URL) para todos os anos em um único lote
+    de requisições paralelas, extraindo cada tabela assim que a página chega, e retorna
+    um DataFrame consolidado.
+    :param progress: (opcional) callback (páginas concluídas, total) chamado a cada página.
+    :param failures: (opcional) lista onde registrar as páginas que falharam.
+    """
+    jobs = [(tipo, ano) for tipo in urls for ano in anos]
+    tables = scraper.scrape_many(
+        [f"{urls[tipo]}&ano={ano}" for tipo, ano in jobs], progress=progress, failures=failures
+    )
+    frames = tag_frames(jobs, tables)
+    return assemble_dataframe(frames, main_cols, numeric_cols, other_cols, caracteristica)
+
+
+def create_dataset_dataframe(
+        scraper: EmbrapaScraper,
+        dataset: Dataset,
+        anos: list,
+        base_url: str = BASE_URL,
+        progress: Optional[Progress] = None,
+        failures: Optional[List[FetchFailure]] = None
+) -> pd.DataFrame:
+    """
+    Faz o scrape de todas as subopções de um dataset configurado em DATASETS.
+    """
+    return create_dataframe_tipos(
+        scraper=scraper,
+        urls=dataset.urls(base_url),
+        main_cols=dataset.main_cols,
+        anos=anos,
+        numeric_cols=dataset.numeric_cols,
+        caracteristica=dataset.caracteristica,
+        progress=progress,
+        failures=failures
+    )
+
+
+def table_hash(table: pd.DataFrame) -> str:
+    """
+    Hash do conteúdo da tabela extraída (independente do restante do HTML da página).
+    """
+    return hashlib.sha256(table.to_csv(index=False).encode("utf-8")).hexdigest()
+
+
+def create_dataset_dataframe_incremental(
+        scraper: EmbrapaScraper,
+        dataset: Dataset,
+        anos: list,
+        hashes: Dict[Tuple[str, int], str],
+        base_url: str = BASE_URL,
+        progress: Optional[Progress] = None,
+        failures: Optional[List[FetchFailure]] = None
+) -> Tuple[pd.DataFrame, Dict[Tuple[str, int], str]]:
+    """
+    Variante incremental de create_dataset_dataframe: só devolve as linhas das páginas
+    novas ou cujo conteúdo mudou em relação a `hashes` ((subopcao, ano) -> hash).
+    Páginas já importadas de anos fechados (ver ResponseCache.is_closed_year) nem são
+    buscadas; as demais saem do cache em disco ou são revalidadas.
+    :return: (DataFrame com as páginas alteradas, novos hashes dessas páginas).
+    """
+    urls = dataset.urls(base_url)
+    jobs = []
+    for tipo in urls:
+        for ano in anos:
+            url = f"{urls[tipo]}&ano={ano}"
+            fechado = scraper.cache is not None and scraper.cache.is_closed_year(url)
+            if (tipo or "", ano) in hashes and fechado:
+                continue
+            jobs.append((tipo, ano))
+
+    tables = scraper.scrape_many(
+        [f"{urls[tipo]}&ano={ano}" for tipo, ano in jobs], progress=progress, failures=failures
+    )
+
+    alterados: Dict[Tuple[str, int], str] = {}
+    changed_jobs, changed_tables = [], []
+    for (tipo, ano), table in zip(jobs, tables):
+        if table is None:
+            logger.warning("Página não obtida para tipo=%s ano=%s; ignorada.", tipo, ano)
+            continue
+        content_hash = table_hash(table)
+        if hashes.get((tipo or "", ano)) == content_hash:
+            continue
+        alterados[(tipo or "", ano)] = content_hash
+        changed_jobs.append((tipo, ano))
+        changed_tables.append(table)
+
+    frames = tag_frames(changed_jobs, changed_tables)
+    df = assemble_dataframe(
+        frames, dataset.main_cols, dataset.numeric_cols, ['tipo', 'ano'], dataset.caracteristica
+    )
+    return df, alterados
+
+
+def create_dataframe(
+        scraper: EmbrapaScraper,
+        url: str,
+        main_cols: str,
+        anos: list,
+        numeric_cols: list = [],
+        other_cols: list = ['tipo', 'ano'],
+        tipo: str = None,
+        caracteristica: bool = False
+):
+    """
+    Extrai dados da tabela class='tb_base tb_dados' de cada ano e
+    retorna um DataFrame. Agora, marca cada linha com o 'item' correspondente
+    (via coluna interna '__item'), mas só adiciona o item como linha se não houver subitems.
+    """
+    return create_dataframe_tipos(
+        scraper=scraper,
+        urls={tipo: url},
+        main_cols=main_cols,
+        anos=anos,
+        numeric_cols=numeric_cols,
+        other_cols=other_cols,
+        caracteristica=caracteristica
+    )
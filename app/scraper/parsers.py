@@ -0,0 +1,281 @@
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from bs4 import BeautifulSoup
+from unidecode import unidecode
+
+TABLE_CLASS = "tb_base tb_dados"
+TABLE_START_RE = re.compile(r"<table\b[^>]*\btb_base\s+tb_dados", re.IGNORECASE)
+
+# Tags que o html.parser do BeautifulSoup trata como vazias (sem tag de fechamento).
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+    "menuitem", "meta", "param", "source", "track", "wbr", "basefont", "bgsound",
+    "command", "frame", "image", "isindex", "nextid", "spacer",
+}
+
+Cell = Tuple[List[str], str]
+
+
+@dataclass
+class TableData:
+    """
+    Representação intermediária da tabela 'tb_base tb_dados', independente do parser:
+    textos dos <th> do <thead> e, para cada <tr> do <tbody>, as classes e o texto de cada <td>.
+    `header`/`body` ficam None quando a página não tem <thead>/<tbody>.
+    """
+    header: Optional[List[str]] = None
+    body: Optional[List[List[Cell]]] = None
+
+
+def parse_table_bs4(html: str) -> Optional[TableData]:
+    """
+    Lê a tabela construindo a árvore completa com BeautifulSoup (implementação original).
+    :return: TableData ou None, caso a página não tenha a tabela.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    table_soup = soup.find('table', {'class': TABLE_CLASS})
+    if not table_soup:
+        return None
+
+    table = TableData()
+    thead = table_soup.find('thead')
+    if not thead:
+        return table
+    table.header = [
+        th.get_text(strip=True)
+        for row in thead.find_all('tr')
+        for th in row.find_all('th')
+    ]
+
+    tbody = table_soup.find('tbody')
+    if not tbody:
+        return table
+    table.body = [
+        [(td.get("class") or [], td.get_text(strip=True)) for td in row.find_all('td')]
+        for row in tbody.find_all('tr')
+    ]
+    return table
+
+
+@dataclass(eq=False)
+class _Node:
+    tag: str
+    classes: List[str] = field(default_factory=list)
+    strings: List[str] = field(default_factory=list)
+    cells: List["_Node"] = field(default_factory=list)
+    kind: Optional[str] = None
+
+    def text(self) -> str:
+        return "".join(self.strings)
+
+
+class _TableDone(Exception):
+    pass
+
+
+class _TableParser(HTMLParser):
+    """
+    Parser em fluxo que acompanha apenas a primeira tabela 'tb_base tb_dados',
+    sem montar a árvore do documento. Reproduz as regras de aninhamento do
+    html.parser do BeautifulSoup (uma tag de fechamento fecha tudo que estiver
+    aberto acima da tag correspondente), de modo que find_all/get_text(strip=True)
+    produzam os mesmos resultados.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.stack: List[_Node] = []
+        self.table: Optional[_Node] = None
+        self.thead: Optional[_Node] = None
+        self.tbody: Optional[_Node] = None
+        self.header_rows: List[_Node] = []
+        self.body_rows: List[_Node] = []
+        self._buffer: List[str] = []
+
+    def _open(self, kind: str) -> List[_Node]:
+        return [node for node in self.stack if node.kind == kind]
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        text = "".join(self._buffer).strip()
+        self._buffer = []
+        if text:
+            for node in self.stack:
+                if node.kind == "cell":
+                    node.strings.append(text)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._flush()
+        node = _Node(tag)
+        inside = self.table is not None and self.table in self.stack
+
+        if tag == "table" and self.table is None:
+            class_attr = dict(attrs).get("class") or ""
+            if " ".join(class_attr.split()) == TABLE_CLASS:
+                self.table = node
+                inside = True
+        elif inside and tag == "thead" and self.thead is None:
+            self.thead = node
+            node.kind = "thead"
+        elif inside and tag == "tbody" and self.tbody is None:
+            self.tbody = node
+            node.kind = "tbody"
+        elif inside and tag == "tr":
+            if self.thead is not None and self.thead in self.stack:
+                self.header_rows.append(node)
+                node.kind = "row"
+            if self.tbody is not None and self.tbody in self.stack:
+                self.body_rows.append(node)
+                node.kind = "row"
+        elif inside and tag in ("th", "td"):
+            node.kind = "cell"
+            node.classes = (dict(attrs).get("class") or "").split()
+            for row in self._open("row"):
+                row.cells.append(node)
+
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        self._flush()
+        for pos in range(len(self.stack) - 1, -1, -1):
+            if self.stack[pos].tag == tag:
+                closed = self.stack[pos:]
+                del self.stack[pos:]
+                if self.table is not None and self.table in closed:
+                    raise _TableDone()
+                return
+
+    def handle_data(self, data: str) -> None:
+        self._buffer.append(data)
+
+    def handle_comment(self, data: str) -> None:
+        self._flush()
+
+    def handle_decl(self, decl: str) -> None:
+        self._flush()
+
+    def handle_pi(self, data: str) -> None:
+        self._flush()
+
+    def unknown_decl(self, data: str) -> None:
+        self._flush()
+
+
+def parse_table_stream(html: str) -> Optional[TableData]:
+    """
+    Lê a tabela com um parser em fluxo (html.parser da biblioteca padrão),
+    começando no início da tabela e parando assim que ela é fechada.
+    :return: TableData ou None, caso a página não tenha a tabela.
+    """
+    match = TABLE_START_RE.search(html)
+    parser = _TableParser()
+    try:
+        parser.feed(html[match.start():] if match else html)
+        parser.close()
+    except _TableDone:
+        pass
+    parser._flush()
+
+    if parser.table is None:
+        return None
+    table = TableData()
+    if parser.thead is None:
+        return table
+    table.header = [
+        cell.text()
+        for row in parser.header_rows
+        for cell in row.cells
+        if cell.tag == "th"
+    ]
+    if parser.tbody is None:
+        return table
+    table.body = [
+        [(cell.classes, cell.text()) for cell in row.cells if cell.tag == "td"]
+        for row in parser.body_rows
+    ]
+    return table
+
+
+PARSERS: Dict[str, Callable[[str], Optional[TableData]]] = {
+    "bs4": parse_table_bs4,
+    "stream": parse_table_stream,
+}
+
+
+def build_dataframe(table: Optional[TableData]) -> pd.DataFrame:
+    """
+    Monta o DataFrame a partir da tabela lida. Ajusta para lidar com páginas que têm
+    apenas linhas simples (sem classes 'tb_item' ou 'tb_subitem'), como importação/exportação,
+    e marca cada linha com o 'item' correspondente (coluna interna '__item'), só adicionando
+    o item como linha se não houver subitems.
+    """
+    if table is None or table.header is None:
+        return pd.DataFrame()
+
+    col_names: List[str] = [
+        unidecode(text.lower())
+        .replace(" ", "_").replace("(", "").replace(")", "").replace(".", "")
+        for text in table.header
+    ]
+
+    if table.body is None:
+        return pd.DataFrame(columns=col_names)
+
+    rows_data: List[List[str]] = []
+    current_item: str | None = None
+    skip_item_row = False
+
+    trs = table.body
+    i = 0
+    while i < len(trs):
+        tds = trs[i]
+
+        if not tds[0][0]:
+            cols = [text.replace(".", "").replace(",", "") for _, text in tds]
+            rows_data.append(cols)
+        else:
+            if len(tds) > 1:
+                raw_nome = tds[0][1]
+                raw_qtd = tds[1][1]
+                nome_fmt = unidecode(raw_nome).replace(" ", "_").lower()
+                td_classes = tds[0][0]
+
+                if "tb_item" in td_classes:
+                    current_item = nome_fmt
+
+                    skip_item_row = False
+                    if i + 1 < len(trs):
+                        next_td_classes = trs[i + 1][0][0]
+                        if "tb_subitem" in next_td_classes:
+                            skip_item_row = True
+
+                    if not skip_item_row:
+                        row_list: List[str] = [nome_fmt, raw_qtd, current_item]
+                        rows_data.append(row_list)
+
+                elif "tb_subitem" in td_classes:
+                    row_list: List[str] = [nome_fmt, raw_qtd, current_item]
+                    rows_data.append(row_list)
+
+        i += 1
+
+    if rows_data and not trs[0][0][0]:
+        df = pd.DataFrame(rows_data, columns=col_names)
+    else:
+        final_cols = col_names + ["__item"]
+        df = pd.DataFrame(rows_data, columns=final_cols)
+
+    if 'valor_us$' in df.columns:
+        df = df.rename(columns={'valor_us$': 'valor_dolar'})
+    return df
@@ -1,123 +1,404 @@
-from typing import List, Optional
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict
+from typing import Callable, List, Mapping, Optional, Tuple, TypeVar
 
+import httpx
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
-from unidecode import unidecode
+from requests.adapters import HTTPAdapter
+
+from app.scraper.cache import CacheEntry, ResponseCache, default_cache
+from app.scraper.controller import (
+    RETRIES,
+    RETRY_STATUS,
+    CircuitOpen,
+    FetchFailure,
+    RequestController,
+    backoff,
+    default_controller
+)
+from app.scraper.datasets import BASE_URL
+from app.scraper.parsers import PARSERS, build_dataframe
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/125.0.0.0 Safari/537.36"
+    )
+}
+MAX_CONCURRENCY = int(os.getenv("SCRAPER_MAX_CONCURRENCY", "10"))
+PARSER = os.getenv("SCRAPER_PARSER", "stream")
+TIMEOUT = float(os.getenv("SCRAPER_TIMEOUT", "30"))
+CONNECT_TIMEOUT = float(os.getenv("SCRAPER_CONNECT_TIMEOUT", "5"))
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Chamado após cada página processada com (páginas concluídas, total de páginas).
+Progress = Callable[[int, int], None]
 
 
 class EmbrapaScraper:
     """
     Classe responsável por realizar o scrape de dados do site vitibrasil.cnpuv.embrapa.br
     conforme configurações fornecidas em CLASSIFICATIONS.
+
+    A instância não guarda estado entre chamadas: cada método devolve a página ou o
+    DataFrame obtido, de modo que uma mesma instância pode ser usada por várias
+    threads (rotas síncronas do FastAPI) ao mesmo tempo.
     """
 
-    def __init__(self, session: Optional[requests.Session] = None) -> None:
+    def __init__(
+            self,
+            session: Optional[requests.Session] = None,
+            max_concurrency: int = MAX_CONCURRENCY,
+            cache: Optional[ResponseCache] = None,
+            parser: str = PARSER,
+            controller: Optional[RequestController] = None,
+            retries: int = RETRIES
+    ) -> None:
         """
-        :param session: (opcional) objeto requests.Session para otimização de conexões.
+        :param session: (opcional) requests.Session compartilhada por todas as threads;
+            por padrão cada thread usa a sua própria sessão, com pool de conexões.
+        :param max_concurrency: número máximo de requisições simultâneas no modo assíncrono
+            e tamanho do pool de conexões de cada sessão.
+        :param cache: (opcional) cache de respostas em disco; por padrão usa default_cache().
+        :param parser: backend de leitura da tabela ('stream' ou 'bs4').
+        :param controller: (opcional) controle de concorrência/circuit breaker por host;
+            por padrão usa o compartilhado por todo o processo (default_controller()).
+        :param retries: número de novas tentativas após timeout, erro de conexão ou 429/5xx.
         """
-        self.soup = None
-        self.session = session if session else requests.Session()
-        self.url = "http://vitibrasil.cnpuv.embrapa.br/index.php"
+        if parser not in PARSERS:
+            raise ValueError(f"Parser desconhecido: {parser}")
+        self.parser = parser
+        self._session = session
+        self._local = threading.local()
+        self.url = BASE_URL
+        self.max_concurrency = max_concurrency
+        self.cache = cache if cache is not None else default_cache()
+        self.controller = controller if controller is not None else default_controller()
+        self.retries = retries
 
-    def request_data(self, url: str) -> Optional[BeautifulSoup]:
+    @property
+    def session(self) -> requests.Session:
         """
-        Realiza requisição GET à URL desejada e retorna um objeto BeautifulSoup, se sucesso.
+        Sessão HTTP da thread atual (ou a sessão compartilhada, se informada).
+        """
+        if self._session is not None:
+            return self._session
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=self.max_concurrency
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def _cached(self, url: str) -> Optional[Tuple[CacheEntry, str]]:
+        """
+        Retorna a entrada em cache da URL (fresca ou não), se houver cache configurado.
+        """
+        return self.cache.lookup(url) if self.cache else None
+
+    def _request_headers(self, cached: Optional[Tuple[CacheEntry, str]]) -> dict:
+        if cached is None:
+            return HEADERS
+        return {**HEADERS, **cached[0].conditional_headers()}
+
+    @staticmethod
+    def _fail(failure: FetchFailure, failures: Optional[List[FetchFailure]]) -> None:
+        """
+        Registra a falha definitiva de uma página (log estruturado e, se informada,
+        a lista `failures` do chamador).
+        """
+        logger.warning(
+            "Falha ao buscar %s (%s, %d tentativa(s))", failure.url, failure.reason,
+            failure.attempts, extra={"fetch_failure": asdict(failure)}
+        )
+        if failures is not None:
+            failures.append(failure)
+
+    @staticmethod
+    def _circuit_open(
+            url: str,
+            attempts: int,
+            last: Optional[FetchFailure]
+    ) -> FetchFailure:
+        """
+        Falha de uma página recusada pelo circuit breaker, preservando o erro da
+        última tentativa, se houve alguma.
+        """
+        detail = None
+        if last is not None:
+            detail = f"{last.reason}: {last.detail or last.status_code}"
+        return FetchFailure(url, "circuit_open", attempts, detail=detail)
+
+    def _handle_response(
+            self,
+            url: str,
+            status_code: int,
+            text: str,
+            headers: Mapping[str, str],
+            cached: Optional[Tuple[CacheEntry, str]],
+            attempts: int = 1,
+            failures: Optional[List[FetchFailure]] = None
+    ) -> Optional[str]:
+        """
+        Trata a resposta HTTP: 304 reaproveita o HTML em cache e 200 atualiza o cache.
+        Falhas ao gravar no cache são apenas registradas: a página obtida é retornada.
+        :return: HTML da página ou None, caso a resposta seja inesperada.
+        """
+        if status_code == 304 and cached is not None:
+            try:
+                self.cache.revalidated(cached[0])
+            except OSError:
+                logger.warning("Falha ao renovar %s no cache.", url, exc_info=True)
+            return cached[1]
+        if status_code == 200:
+            if self.cache:
+                try:
+                    self.cache.store(
+                        url, text, headers.get("ETag"), headers.get("Last-Modified")
+                    )
+                except OSError:
+                    logger.warning("Falha ao gravar %s no cache.", url, exc_info=True)
+            return text
+        self._fail(FetchFailure(url, "status", attempts, status_code=status_code), failures)
+        return None
+
+    def request_data(
+            self,
+            url: str,
+            failures: Optional[List[FetchFailure]] = None
+    ) -> Optional[str]:
+        """
+        Realiza requisição GET à URL desejada e retorna o HTML da página, se sucesso.
+        Timeouts, erros de conexão e respostas 429/5xx são repetidos com backoff
+        exponencial (ver app.scraper.controller).
         :param url: URL completa para scrape.
-        :return: Objeto BeautifulSoup ou None, caso falhe.
-        """
-        try:
-            headers = {
-                "User-Agent": (
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/125.0.0.0 Safari/537.36"
+        :param failures: (opcional) lista onde registrar a falha, se houver.
+        :return: HTML da página ou None, caso falhe.
+        """
+        cached = self._cached(url)
+        if cached is not None and cached[0].is_fresh():
+            return cached[1]
+
+        host = self.controller.host(url, self.max_concurrency)
+        attempt = 0
+        failure = None
+        while True:
+            try:
+                started = host.acquire()
+            except CircuitOpen:
+                return self._fail(self._circuit_open(url, attempt, failure), failures)
+            attempt += 1
+            retry_after = None
+            try:
+                response = self.session.get(
+                    url,
+                    headers=self._request_headers(cached),
+                    timeout=(CONNECT_TIMEOUT, TIMEOUT),
+                    verify=False
                 )
-            }
-            response = self.session.get(url, headers=headers, timeout=30, verify=False)
-            if response.status_code == 200:
-                self.soup = BeautifulSoup(response.text, 'html.parser')
-                return None
-            else:
-                print(f"Resposta HTTP inesperada ({response.status_code}) para {url}")
-                return None
-        except requests.RequestException as e:
-            print(f"Erro ao requisitar {url}: {e}")
-            return None
-
-    def extract_data(self) -> pd.DataFrame:
-        """
-        Extrai dados da tabela class='tb_base tb_dados' em um BeautifulSoup e
-        retorna um DataFrame. Ajusta para lidar com páginas que têm apenas linhas simples
-        (sem classes 'tb_item' ou 'tb_subitem'), como importação/exportação.
-        """
-        table_soup = self.soup.find('table', {'class': 'tb_base tb_dados'})
-        if not table_soup:
-            return pd.DataFrame()
-
-        thead = table_soup.find('thead')
-        if not thead:
-            return pd.DataFrame()
-
-        col_names: List[str] = []
-        for row in thead.find_all('tr'):
-            data_cols = [
-                unidecode(th.get_text(strip=True).lower())
-                .replace(" ", "_").replace("(", "").replace(")", "").replace(".", "")
-                for th in row.find_all('th')
-            ]
-            col_names.extend(data_cols)
-
-        tbody = table_soup.find('tbody')
-        if not tbody:
-            return pd.DataFrame(columns=col_names)
-
-        rows_data: List[List[str]] = []
-        current_item: str | None = None
-        skip_item_row = False
-
-        trs = tbody.find_all('tr')
-        i = 0
-        while i < len(trs):
-            row = trs[i]
-            tds = row.find_all('td')
-
-            if not tds[0].get("class"):
-                cols = [td.get_text(strip=True).replace(".", "").replace(",", "") for td in tds]
-                rows_data.append(cols)
+            except requests.RequestException as e:
+                host.release(started, ok=False)
+                reason = "timeout" if isinstance(e, requests.Timeout) else "connection"
+                failure = FetchFailure(url, reason, attempt, detail=str(e))
+            except BaseException:
+                host.abandon(started)
+                raise
             else:
-                if len(tds) > 1:
-                    raw_nome = tds[0].get_text(strip=True)
-                    raw_qtd = tds[1].get_text(strip=True)
-                    nome_fmt = unidecode(raw_nome).replace(" ", "_").lower()
-                    td_classes = tds[0].get("class", [])
+                host.release(started, ok=response.status_code not in RETRY_STATUS)
+                if response.status_code not in RETRY_STATUS:
+                    return self._handle_response(
+                        url, response.status_code, response.text, response.headers,
+                        cached, attempt, failures
+                    )
+                failure = FetchFailure(url, "status", attempt, status_code=response.status_code)
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt > self.retries:
+                return self._fail(failure, failures)
+            time.sleep(backoff(attempt, retry_after))
+
+    async def _fetch_async(
+            self,
+            client: httpx.AsyncClient,
+            semaphore: asyncio.Semaphore,
+            url: str,
+            failures: Optional[List[FetchFailure]] = None
+    ) -> Optional[str]:
+        """
+        Realiza uma requisição GET assíncrona respeitando o limite de concorrência
+        da chamada e o do host, com as mesmas regras de repetição de request_data.
+        Páginas frescas no cache não vão à rede.
+        :return: HTML da página ou None, caso falhe.
+        """
+        cached = self._cached(url)
+        if cached is not None and cached[0].is_fresh():
+            return cached[1]
 
-                    if "tb_item" in td_classes:
-                        current_item = nome_fmt
+        host = self.controller.host(url, self.max_concurrency)
+        attempt = 0
+        failure = None
+        while True:
+            retry_after = None
+            async with semaphore:
+                try:
+                    started = await host.acquire_async()
+                except CircuitOpen:
+                    return self._fail(self._circuit_open(url, attempt, failure), failures)
+                attempt += 1
+                try:
+                    response = await client.get(url, headers=self._request_headers(cached))
+                except httpx.HTTPError as e:
+                    host.release(started, ok=False)
+                    reason = "timeout" if isinstance(e, httpx.TimeoutException) else "connection"
+                    failure = FetchFailure(url, reason, attempt, detail=str(e))
+                except BaseException:
+                    host.abandon(started)
+                    raise
+                else:
+                    host.release(started, ok=response.status_code not in RETRY_STATUS)
+                    if response.status_code not in RETRY_STATUS:
+                        return self._handle_response(
+                            url, response.status_code, response.text, response.headers,
+                            cached, attempt, failures
+                        )
+                    failure = FetchFailure(
+                        url, "status", attempt, status_code=response.status_code
+                    )
+                    retry_after = response.headers.get("Retry-After")
 
-                        skip_item_row = False
-                        if i + 1 < len(trs):
-                            next_td_classes = trs[i + 1].find_all('td')[0].get("class", [])
-                            if "tb_subitem" in next_td_classes:
-                                skip_item_row = True
+            if attempt > self.retries:
+                return self._fail(failure, failures)
+            await asyncio.sleep(backoff(attempt, retry_after))
 
-                        if not skip_item_row:
-                            row_list: List[str] = [nome_fmt, raw_qtd, current_item]
-                            rows_data.append(row_list)
+    async def _gather(
+            self,
+            urls: List[str],
+            transform: Callable[[str], T],
+            max_concurrency: Optional[int] = None,
+            progress: Optional[Progress] = None,
+            failures: Optional[List[FetchFailure]] = None
+    ) -> List[Optional[T]]:
+        """
+        Busca todas as URLs em paralelo usando um único httpx.AsyncClient com pool de conexões,
+        aplicando `transform` a cada página assim que ela chega.
+        :param progress: (opcional) callback chamado a cada página concluída (ou falha); se ele
+            levantar uma exceção, as requisições pendentes são canceladas e a exceção propagada.
+        :param failures: (opcional) lista onde registrar as páginas que falharam.
+        :return: lista de resultados (ou None, se a página falhou), na mesma ordem de `urls`.
+        """
+        limit = max_concurrency or self.max_concurrency
+        semaphore = asyncio.Semaphore(limit)
+        limits = httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
+        done = 0
 
-                    elif "tb_subitem" in td_classes:
-                        row_list: List[str] = [nome_fmt, raw_qtd, current_item]
-                        rows_data.append(row_list)
+        async def fetch(client: httpx.AsyncClient, url: str) -> Optional[T]:
+            nonlocal done
+            html = await self._fetch_async(client, semaphore, url, failures)
+            result = None if html is None else transform(html)
+            done += 1
+            if progress is not None:
+                progress(done, len(urls))
+            return result
 
-            i += 1
+        if progress is not None:
+            progress(0, len(urls))
+        async with httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT),
+            verify=False,
+            limits=limits
+        ) as client:
+            tasks = [asyncio.ensure_future(fetch(client, url)) for url in urls]
+            try:
+                return await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
 
-        if rows_data and not trs[0].find_all('td')[0].get("class"):
-            df = pd.DataFrame(rows_data, columns=col_names)
-        else:
-            final_cols = col_names + ["__item"]
-            df = pd.DataFrame(rows_data, columns=final_cols)
+    async def request_many_async(
+            self,
+            urls: List[str],
+            max_concurrency: Optional[int] = None,
+            failures: Optional[List[FetchFailure]] = None
+    ) -> List[Optional[str]]:
+        """
+        Busca todas as URLs em paralelo.
+        :param urls: lista de URLs completas para scrape.
+        :param max_concurrency: (opcional) sobrescreve o limite de requisições simultâneas.
+        :param failures: (opcional) lista onde registrar as páginas que falharam.
+        :return: lista com o HTML de cada página (ou None), na mesma ordem de `urls`.
+        """
+        return await self._gather(urls, lambda html: html, max_concurrency, failures=failures)
 
-        if 'valor_us$' in df.columns:
-            df = df.rename(columns={'valor_us$': 'valor_dolar'})
-        return df
+    def request_many(
+            self,
+            urls: List[str],
+            max_concurrency: Optional[int] = None,
+            failures: Optional[List[FetchFailure]] = None
+    ) -> List[Optional[str]]:
+        """
+        Versão síncrona de request_many_async, para uso nas rotas (executadas fora de um event loop).
+        """
+        return asyncio.run(self.request_many_async(urls, max_concurrency, failures))
 
+    async def scrape_many_async(
+            self,
+            urls: List[str],
+            max_concurrency: Optional[int] = None,
+            progress: Optional[Progress] = None,
+            failures: Optional[List[FetchFailure]] = None
+    ) -> List[Optional[pd.DataFrame]]:
+        """
+        Busca as URLs em paralelo e extrai a tabela de cada página enquanto as demais
+        requisições ainda estão em andamento.
+        :param progress: (opcional) callback de progresso (ver _gather).
+        :param failures: (opcional) lista onde registrar as páginas que falharam.
+        :return: lista de DataFrames (ou None), na mesma ordem de `urls`.
+        """
+        return await self._gather(urls, self.extract_data, max_concurrency, progress, failures)
+
+    def scrape_many(
+            self,
+            urls: List[str],
+            max_concurrency: Optional[int] = None,
+            progress: Optional[Progress] = None,
+            failures: Optional[List[FetchFailure]] = None
+    ) -> List[Optional[pd.DataFrame]]:
+        """
+        Versão síncrona de scrape_many_async.
+        """
+        return asyncio.run(self.scrape_many_async(urls, max_concurrency, progress, failures))
+
+    def scrape(
+            self,
+            url: str,
+            failures: Optional[List[FetchFailure]] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Busca uma única URL e retorna a tabela extraída (ou None, caso a requisição falhe).
+        """
+        html = self.request_data(url, failures)
+        return None if html is None else self.extract_data(html)
+
+    def extract_data(self, html: str) -> pd.DataFrame:
+        """
+        Extrai dados da tabela class='tb_base tb_dados' da página e retorna um DataFrame,
+        usando o parser configurado em `self.parser` (ver app.scraper.parsers.PARSERS).
+        :param html: HTML da página.
+        """
+        return build_dataframe(PARSERS[self.parser](html))
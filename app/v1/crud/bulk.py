@@ -0,0 +1,237 @@
+import io
+import os
+from typing import Iterator, List, Optional, Sequence, Type
+
+import pandas as pd
+from sqlalchemy import Integer, String, UniqueConstraint, insert, or_, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "5000"))
+# 'auto' usa COPY no PostgreSQL (psycopg2) e INSERT em lote nos demais bancos.
+BULK_METHOD = os.getenv("BULK_METHOD", "auto")
+
+# Dialetos com INSERT ... ON CONFLICT DO UPDATE.
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _chunks(rows: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def natural_key(model: Type[Base]) -> List[str]:
+    """
+    Colunas da chave natural do modelo (a UniqueConstraint declarada em __table_args__).
+    """
+    for constraint in model.__table__.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            return [column.name for column in constraint.columns]
+    raise ValueError(f"{model.__name__} não declara chave natural (UniqueConstraint)")
+
+
+def coerce_dataframe(model: Type[Base], df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte as colunas do DataFrame para os tipos das colunas do modelo
+    (Integer -> int64, String -> str), como faziam os schemas pydantic das rotas.
+    """
+    types = {}
+    for column in model.__table__.columns:
+        if column.name not in df.columns:
+            continue
+        if isinstance(column.type, Integer):
+            types[column.name] = "int64"
+        elif isinstance(column.type, String):
+            types[column.name] = str
+    return df.astype(types)
+
+
+def _copy_supported(db: Session) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+
+def _copy(db: Session, target: str, df: pd.DataFrame, chunk_size: int) -> None:
+    connection = db.connection()
+    preparer = connection.dialect.identifier_preparer
+    columns = ", ".join(preparer.quote(col) for col in df.columns)
+    sql = f"COPY {target} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+    with connection.connection.dbapi_connection.cursor() as cursor:
+        for start in range(0, len(df), chunk_size):
+            buffer = io.StringIO()
+            df.iloc[start:start + chunk_size].to_csv(
+                buffer, index=False, header=False, na_rep="\\N"
+            )
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+
+
+def copy_dataframe(
+        db: Session,
+        model: Type[Base],
+        df: pd.DataFrame,
+        chunk_size: int = BULK_CHUNK_SIZE
+) -> int:
+    """
+    Grava o DataFrame com COPY ... FROM STDIN (PostgreSQL/psycopg2), em blocos de
+    `chunk_size` linhas, na transação da sessão (sem commit). Nulos vão como \\N,
+    para que textos vazios não virem NULL.
+    :return: número de linhas gravadas.
+    """
+    preparer = db.get_bind().dialect.identifier_preparer
+    _copy(db, preparer.format_table(model.__table__), df, chunk_size)
+    return len(df)
+
+
+def insert_dataframe(
+        db: Session,
+        model: Type[Base],
+        df: pd.DataFrame,
+        chunk_size: int = BULK_CHUNK_SIZE,
+        method: str = BULK_METHOD
+) -> int:
+    """
+    Grava as linhas do DataFrame direto na tabela do modelo, sem montar objetos ORM
+    e sem commit. Usa COPY quando disponível ('auto'/'copy') e, caso contrário,
+    INSERT com vários registros por comando ('insert').
+    :param df: DataFrame com as colunas do modelo (demais colunas são ignoradas).
+    :return: número de linhas gravadas.
+    """
+    columns = [col.name for col in model.__table__.columns if col.name in df.columns]
+    df = coerce_dataframe(model, df[columns])
+    if df.empty:
+        return 0
+    if method == "copy" or (method == "auto" and _copy_supported(db)):
+        return copy_dataframe(db, model, df, chunk_size)
+
+    rows = df.to_dict(orient="records")
+    statement = insert(model.__table__)
+    for chunk in _chunks(rows, chunk_size):
+        db.execute(statement, chunk)
+    return len(rows)
+
+
+def _upsert_statement(db: Session, model: Type[Base], only_changed: bool = True):
+    """
+    INSERT ... ON CONFLICT (chave natural) DO UPDATE das demais colunas. Com
+    `only_changed`, linhas já gravadas com os mesmos valores não são reescritas.
+    :raises ValueError: banco sem suporte a upsert (ver UPSERT_INSERTS).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise ValueError(f"Upsert não suportado para o banco {dialect}")
+    table = model.__table__
+    key = natural_key(model)
+    statement = UPSERT_INSERTS[dialect](table)
+    updated = [col for col in table.c if not col.primary_key and col.name not in key]
+    if not updated:
+        return statement.on_conflict_do_nothing(index_elements=key)
+    where = None
+    if only_changed:
+        where = or_(*(col.is_distinct_from(statement.excluded[col.name]) for col in updated))
+    return statement.on_conflict_do_update(
+        index_elements=key,
+        set_={col.name: statement.excluded[col.name] for col in updated},
+        where=where
+    )
+
+
+def _copy_upsert(db: Session, model: Type[Base], df: pd.DataFrame, chunk_size: int) -> None:
+    """
+    COPY para uma tabela temporária e INSERT ... SELECT ... ON CONFLICT DO UPDATE
+    dela para a tabela do modelo.
+    """
+    preparer = db.get_bind().dialect.identifier_preparer
+    table = model.__table__
+    target = preparer.format_table(table)
+    staging = preparer.quote(f"_carga_{table.name}")
+    key = natural_key(model)
+    columns = ", ".join(preparer.quote(col) for col in df.columns)
+    updated = [col for col in df.columns if col not in key]
+
+    db.execute(text(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {columns} FROM {target} WITH NO DATA"
+    ))
+    _copy(db, staging, df, chunk_size)
+    assignments = ", ".join(
+        f"{preparer.quote(col)} = EXCLUDED.{preparer.quote(col)}" for col in updated
+    )
+    changed = " OR ".join(
+        f"{target}.{preparer.quote(col)} IS DISTINCT FROM EXCLUDED.{preparer.quote(col)}"
+        for col in updated
+    )
+    conflict = ", ".join(preparer.quote(col) for col in key)
+    action = f"DO UPDATE SET {assignments} WHERE {changed}" if updated else "DO NOTHING"
+    db.execute(text(
+        f"INSERT INTO {target} ({columns}) SELECT {columns} FROM {staging} "
+        f"ON CONFLICT ({conflict}) {action}"
+    ))
+    db.execute(text(f"DROP TABLE {staging}"))
+
+
+def upsert_dataframe(
+        db: Session,
+        model: Type[Base],
+        df: pd.DataFrame,
+        chunk_size: int = BULK_CHUNK_SIZE,
+        method: str = BULK_METHOD
+) -> int:
+    """
+    Como insert_dataframe, mas idempotente: linhas cuja chave natural já existe são
+    atualizadas (INSERT ... ON CONFLICT DO UPDATE) em vez de duplicadas. Linhas
+    repetidas no próprio DataFrame ficam com a última ocorrência. No PostgreSQL os
+    dados passam por COPY para uma tabela temporária antes do upsert.
+    :return: número de linhas recebidas (inseridas ou já existentes).
+    """
+    columns = [col.name for col in model.__table__.columns if col.name in df.columns]
+    df = coerce_dataframe(model, df[columns]).drop_duplicates(
+        subset=natural_key(model), keep="last"
+    )
+    if df.empty:
+        return 0
+    if method == "copy" or (method == "auto" and _copy_supported(db)):
+        _copy_upsert(db, model, df, chunk_size)
+        return len(df)
+
+    rows = df.to_dict(orient="records")
+    statement = _upsert_statement(db, model)
+    for chunk in _chunks(rows, chunk_size):
+        db.execute(statement, chunk)
+    return len(rows)
+
+
+def insert_returning(
+        db: Session,
+        model: Type[Base],
+        rows: Sequence[dict],
+        chunk_size: int = BULK_CHUNK_SIZE,
+        columns: Optional[List[str]] = None,
+        upsert: bool = False
+) -> List[Row]:
+    """
+    Insere as linhas com INSERT ... VALUES (...), (...) RETURNING em blocos de
+    `chunk_size`, sem commit, e devolve as linhas gravadas (com id) na ordem de `rows`.
+    As linhas devolvidas não são objetos da sessão, então não expiram no commit
+    nem precisam de refresh.
+    :param columns: (opcional) colunas devolvidas; por padrão todas as do modelo.
+    :param upsert: atualiza as linhas cuja chave natural já existe (ON CONFLICT DO UPDATE);
+        repetições da mesma chave em `rows` ficam com a última ocorrência.
+    """
+    table = model.__table__
+    returned = [table.c[name] for name in columns] if columns else list(table.c)
+    if upsert:
+        key = natural_key(model)
+        rows = list({tuple(row[col] for col in key): row for row in rows}.values())
+        statement = _upsert_statement(db, model, only_changed=False)
+    else:
+        statement = insert(table)
+    statement = statement.returning(*returned, sort_by_parameter_order=True)
+    result: List[Row] = []
+    for chunk in _chunks(rows, chunk_size):
+        result.extend(db.execute(statement, list(chunk)).all())
+    return result
@@ -1,31 +1,35 @@
-from typing import List, Optional, Type
+from typing import List, Optional, Tuple, Type
+from sqlalchemy.engine import Row
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.v1.models.comercializacao import Comercializacao
+from app.core.pagination import keyset
+from app.core.query_cache import query_cache
+from app.core.rollup import add_to_rollups, aggregate, refresh_rollups
+from app.v1.crud.bulk import insert_returning
+from app.v1.models.comercializacao import ROLLUPS, Comercializacao
 from app.v1.schemas.comercializacao import ComercializacaoBase
 
+# Dimensões de GET /comercializacao/agregado (nome na API -> coluna).
+DIMENSOES_AGREGADO = {"ano": "ano", "tipo": "tipo", "produto": "produto"}
+
 
 def create_comercializacoes(
     db: Session,
     registros: List[ComercializacaoBase]
-) -> List[Comercializacao]:
+) -> List[Row]:
     """
     Insere em lote todos os registros de ComercializacaoBase no banco.
-    Retorna a lista de objetos Comercializacao (já com id).
+    Retorna as linhas de Comercializacao inseridas (já com id), gravadas com INSERT em lote
+    (vários registros por comando, com RETURNING), sem um refresh por objeto.
+    Registros cuja chave natural já existe são atualizados em vez de duplicados.
     """
-    objetos = []
-    for item in registros:
-        obj = Comercializacao(
-            produto=item.produto,
-            quantidade_l=item.quantidade_l,
-            tipo=item.tipo,
-            ano=item.ano,
-        )
-        db.add(obj)
-        objetos.append(obj)
-
+    objetos = insert_returning(
+        db, Comercializacao, [item.model_dump() for item in registros], upsert=True
+    )
+    refresh_rollups(db, ROLLUPS, {item.ano for item in registros})
     db.commit()
-    for obj in objetos:
-        db.refresh(obj)
+    query_cache.invalidate(Comercializacao.__tablename__)
     return objetos
 
 
@@ -43,24 +47,30 @@ def create_comercializacao(
         ano=registro.ano,
     )
     db.add(obj)
+    add_to_rollups(db, ROLLUPS, registro.model_dump())
     db.commit()
+    query_cache.invalidate(Comercializacao.__tablename__)
     db.refresh(obj)
     return obj
 
 
-def get_comercializacoes(
-    db: Session,
+def select_comercializacoes(
     produtos: Optional[List[str]] = None,
     tipos: Optional[List[str]] = None,
     quantidade_minima: Optional[int] = None,
     quantidade_maxima: Optional[int] = None,
     anos: Optional[List[int]] = None,
-) -> list[Type[Comercializacao]]:
+    ano_inicio: Optional[int] = None,
+    ano_fim: Optional[int] = None,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+) -> Select:
     """
-    Retorna todos os registros que atendem aos filtros fornecidos.
+    Monta o SELECT (sem executar) dos registros que atendem aos filtros fornecidos.
     Se um parâmetro for None ou lista vazia, esse filtro é ignorado.
+    Com `limit`/`after`, devolve uma página em ordem de id (keyset: id > after).
     """
-    query = db.query(Comercializacao)
+    query = select(Comercializacao)
 
     if produtos:
         query = query.filter(Comercializacao.produto.in_(produtos))
@@ -71,7 +81,50 @@ def get_comercializacoes(
     if quantidade_maxima is not None:
         query = query.filter(Comercializacao.quantidade_l <= quantidade_maxima)
     if anos:
-        anos_str = [str(a) for a in anos]
-        query = query.filter(Comercializacao.ano.in_(anos_str))
+        query = query.filter(Comercializacao.ano.in_(anos))
+    if ano_inicio is not None:
+        query = query.filter(Comercializacao.ano >= ano_inicio)
+    if ano_fim is not None:
+        query = query.filter(Comercializacao.ano <= ano_fim)
+
+    return keyset(query, Comercializacao.id, limit, after)
+
+
+def get_comercializacoes(db: Session, **filtros) -> list[Type[Comercializacao]]:
+    """
+    Retorna os registros de select_comercializacoes (mesmos filtros e paginação).
+    """
+    return db.scalars(select_comercializacoes(**filtros)).all()
+
 
-    return query.all()
+async def get_comercializacoes_async(db: AsyncSession, **filtros) -> list[Type[Comercializacao]]:
+    """
+    Versão assíncrona de get_comercializacoes.
+    """
+    return (await db.scalars(select_comercializacoes(**filtros))).all()
+
+
+def select_comercializacoes_agregado(
+    por: List[str],
+    metricas: List[Tuple[str, Optional[str]]],
+    produtos: Optional[List[str]] = None,
+    tipos: Optional[List[str]] = None,
+    anos: Optional[List[int]] = None,
+    ano_inicio: Optional[int] = None,
+    ano_fim: Optional[int] = None,
+) -> Tuple[Select, str]:
+    """
+    Monta o SELECT ... GROUP BY das `metricas` agrupadas por `por` (nomes de
+    DIMENSOES_AGREGADO), lendo os rollups de Comercializacao sempre que possível.
+    :return: (consulta, nome da tabela lida).
+    """
+    return aggregate(
+        Comercializacao,
+        ROLLUPS,
+        DIMENSOES_AGREGADO,
+        por,
+        metricas,
+        {"produto": produtos, "tipo": tipos, "ano": anos},
+        ano_inicio,
+        ano_fim
+    )
@@ -1,32 +1,35 @@
-from typing import List, Optional, Type
+from typing import List, Optional, Tuple, Type
+from sqlalchemy.engine import Row
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.v1.models.exportacao import Exportacao
+from app.core.pagination import keyset
+from app.core.query_cache import query_cache
+from app.core.rollup import add_to_rollups, aggregate, refresh_rollups
+from app.v1.crud.bulk import insert_returning
+from app.v1.models.exportacao import ROLLUPS, Exportacao
 from app.v1.schemas.exportacao import ExportacaoBase
 
+# Dimensões de GET /exportacao/agregado (nome na API -> coluna).
+DIMENSOES_AGREGADO = {"ano": "ano", "tipo": "tipo", "pais": "paises"}
+
 
 def create_exportacoes(
     db: Session,
     registros: List[ExportacaoBase]
-) -> List[Exportacao]:
+) -> List[Row]:
     """
     Insere em lote todos os registros de ExportacaoBase no banco.
-    Retorna a lista de objetos Exportacao (já com id).
+    Retorna as linhas de Exportacao inseridas (já com id), gravadas com INSERT em lote
+    (vários registros por comando, com RETURNING), sem um refresh por objeto.
+    Registros cuja chave natural já existe são atualizados em vez de duplicados.
     """
-    objetos = []
-    for item in registros:
-        obj = Exportacao(
-            paises=item.paises,
-            quantidade_kg=item.quantidade_kg,
-            valor_dolar=item.valor_dolar,
-            tipo=item.tipo,
-            ano=item.ano,
-        )
-        db.add(obj)
-        objetos.append(obj)
-
+    objetos = insert_returning(
+        db, Exportacao, [item.model_dump() for item in registros], upsert=True
+    )
+    refresh_rollups(db, ROLLUPS, {item.ano for item in registros})
     db.commit()
-    for obj in objetos:
-        db.refresh(obj)
+    query_cache.invalidate(Exportacao.__tablename__)
     return objetos
 
 
@@ -45,13 +48,14 @@ def create_exportacao(
         ano=registro.ano,
     )
     db.add(obj)
+    add_to_rollups(db, ROLLUPS, registro.model_dump())
     db.commit()
+    query_cache.invalidate(Exportacao.__tablename__)
     db.refresh(obj)
     return obj
 
 
-def get_exportacoes(
-    db: Session,
+def select_exportacoes(
     paises: Optional[List[str]] = None,
     tipos: Optional[List[str]] = None,
     quantidade_minima: Optional[int] = None,
@@ -59,12 +63,17 @@ def get_exportacoes(
     valor_minimo: Optional[int] = None,
     valor_maximo: Optional[int] = None,
     anos: Optional[List[int]] = None,
-) -> list[Type[Exportacao]]:
+    ano_inicio: Optional[int] = None,
+    ano_fim: Optional[int] = None,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+) -> Select:
     """
-    Retorna todos os registros que atendem aos filtros fornecidos.
+    Monta o SELECT (sem executar) dos registros que atendem aos filtros fornecidos.
     Se um parâmetro for None ou lista vazia, esse filtro é ignorado.
+    Com `limit`/`after`, devolve uma página em ordem de id (keyset: id > after).
     """
-    query = db.query(Exportacao)
+    query = select(Exportacao)
 
     if paises:
         query = query.filter(Exportacao.paises.in_(paises))
@@ -79,7 +88,50 @@ def get_exportacoes(
     if valor_maximo is not None:
         query = query.filter(Exportacao.valor_dolar <= valor_maximo)
     if anos:
-        anos_str = [str(a) for a in anos]
-        query = query.filter(Exportacao.ano.in_(anos_str))
+        query = query.filter(Exportacao.ano.in_(anos))
+    if ano_inicio is not None:
+        query = query.filter(Exportacao.ano >= ano_inicio)
+    if ano_fim is not None:
+        query = query.filter(Exportacao.ano <= ano_fim)
+
+    return keyset(query, Exportacao.id, limit, after)
+
+
+def get_exportacoes(db: Session, **filtros) -> list[Type[Exportacao]]:
+    """
+    Retorna os registros de select_exportacoes (mesmos filtros e paginação).
+    """
+    return db.scalars(select_exportacoes(**filtros)).all()
+
 
-    return query.all()
+async def get_exportacoes_async(db: AsyncSession, **filtros) -> list[Type[Exportacao]]:
+    """
+    Versão assíncrona de get_exportacoes.
+    """
+    return (await db.scalars(select_exportacoes(**filtros))).all()
+
+
+def select_exportacoes_agregado(
+    por: List[str],
+    metricas: List[Tuple[str, Optional[str]]],
+    paises: Optional[List[str]] = None,
+    tipos: Optional[List[str]] = None,
+    anos: Optional[List[int]] = None,
+    ano_inicio: Optional[int] = None,
+    ano_fim: Optional[int] = None,
+) -> Tuple[Select, str]:
+    """
+    Monta o SELECT ... GROUP BY das `metricas` agrupadas por `por` (nomes de
+    DIMENSOES_AGREGADO), lendo os rollups de Exportacao sempre que possível.
+    :return: (consulta, nome da tabela lida).
+    """
+    return aggregate(
+        Exportacao,
+        ROLLUPS,
+        DIMENSOES_AGREGADO,
+        por,
+        metricas,
+        {"pais": paises, "tipo": tipos, "ano": anos},
+        ano_inicio,
+        ano_fim
+    )
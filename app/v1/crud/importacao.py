@@ -1,33 +1,35 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from app.v1.models.importacao import Importacao
+from sqlalchemy import Select, and_, select
+from app.core.pagination import keyset
+from app.core.query_cache import query_cache
+from app.core.rollup import add_to_rollups, aggregate, refresh_rollups
+from app.v1.crud.bulk import insert_returning
+from app.v1.models.importacao import ROLLUPS, Importacao
 from app.v1.schemas.importacao import ImportacaoBase
 
+# Dimensões de GET /importacao/agregado (nome na API -> coluna).
+DIMENSOES_AGREGADO = {"ano": "ano", "tipo": "tipo", "pais": "paises"}
+
 
 def create_importacoes(
     db: Session,
     importacoes: List[ImportacaoBase]
-) -> List[Importacao]:
+) -> List[Row]:
     """
     Recebe uma lista de ImportacaoBase (Pydantic) e insere todas no banco.
-    Retorna a lista de objetos Importacao inseridos (com id preenchido).
+    Retorna as linhas de Importacao inseridas (com id preenchido), gravadas com INSERT
+    em lote (vários registros por comando, com RETURNING), sem um refresh por objeto.
+    Registros cuja chave natural já existe são atualizados em vez de duplicados.
     """
-    objetos = []
-    for item in importacoes:
-        obj = Importacao(
-            paises=item.paises,
-            quantidade_kg=item.quantidade_kg,
-            valor_dolar=item.valor_dolar,
-            tipo=item.tipo,
-            ano=item.ano,
-        )
-        db.add(obj)
-        objetos.append(obj)
-
+    objetos = insert_returning(
+        db, Importacao, [item.model_dump() for item in importacoes], upsert=True
+    )
+    refresh_rollups(db, ROLLUPS, {item.ano for item in importacoes})
     db.commit()
-    for obj in objetos:
-        db.refresh(obj)
+    query_cache.invalidate(Importacao.__tablename__)
     return objetos
 
 
@@ -46,13 +48,14 @@ def create_importacao(
         ano=importacao.ano,
     )
     db.add(obj)
+    add_to_rollups(db, ROLLUPS, importacao.model_dump())
     db.commit()
+    query_cache.invalidate(Importacao.__tablename__)
     db.refresh(obj)
     return obj
 
 
-def get_importacoes(
-    db: Session,
+def select_importacoes(
     paises: Optional[List[str]] = None,
     tipos: Optional[List[str]] = None,
     quantidade_minima: Optional[int] = None,
@@ -60,13 +63,18 @@ def get_importacoes(
     valor_minimo: Optional[int] = None,
     valor_maximo: Optional[int] = None,
     anos: Optional[List[int]] = None,
-) -> List[Importacao]:
+    ano_inicio: Optional[int] = None,
+    ano_fim: Optional[int] = None,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+) -> Select:
     """
-    Retorna todos os registros que atendem aos filtros fornecidos.
+    Monta o SELECT (sem executar) dos registros que atendem aos filtros fornecidos.
     Se um parâmetro for None ou lista vazia, ignora esse filtro.
+    Com `limit`/`after`, devolve uma página em ordem de id (keyset: id > after).
     """
 
-    query = db.query(Importacao)
+    query = select(Importacao)
     if paises:
         query = query.filter(Importacao.paises.in_(paises))
     if tipos:
@@ -80,8 +88,50 @@ def get_importacoes(
     if valor_maximo is not None:
         query = query.filter(Importacao.valor_dolar <= valor_maximo)
     if anos:
-        anos_str = [str(a) for a in anos]
-        query = query.filter(Importacao.ano.in_(anos_str))
+        query = query.filter(Importacao.ano.in_(anos))
+    if ano_inicio is not None:
+        query = query.filter(Importacao.ano >= ano_inicio)
+    if ano_fim is not None:
+        query = query.filter(Importacao.ano <= ano_fim)
+
+    return keyset(query, Importacao.id, limit, after)
+
+
+def get_importacoes(db: Session, **filtros) -> List[Importacao]:
+    """
+    Retorna os registros de select_importacoes (mesmos filtros e paginação).
+    """
+    return db.scalars(select_importacoes(**filtros)).all()
+
 
-    resultados = query.all()
-    return resultados
+async def get_importacoes_async(db: AsyncSession, **filtros) -> List[Importacao]:
+    """
+    Versão assíncrona de get_importacoes.
+    """
+    return (await db.scalars(select_importacoes(**filtros))).all()
+
+
+def select_importacoes_agregado(
+    por: List[str],
+    metricas: List[Tuple[str, Optional[str]]],
+    paises: Optional[List[str]] = None,
+    tipos: Optional[List[str]] = None,
+    anos: Optional[List[int]] = None,
+    ano_inicio: Optional[int] = None,
+    ano_fim: Optional[int] = None,
+) -> Tuple[Select, str]:
+    """
+    Monta o SELECT ... GROUP BY das `metricas` agrupadas por `por` (nomes de
+    DIMENSOES_AGREGADO), lendo os rollups de Importacao sempre que possível.
+    :return: (consulta, nome da tabela lida).
+    """
+    return aggregate(
+        Importacao,
+        ROLLUPS,
+        DIMENSOES_AGREGADO,
+        por,
+        metricas,
+        {"pais": paises, "tipo": tipos, "ano": anos},
+        ano_inicio,
+        ano_fim
+    )
@@ -1,5 +1,7 @@
-from typing import List, Type
+from typing import List, Optional, Sequence, Type
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
+from app.v1.crud.bulk import insert_returning
 from app.v1.models.predicao_exportacao import PredicaoExportacao
 from app.v1.schemas.predicao_exportacao import PredicaoExportacaoCreate
 
@@ -7,7 +9,8 @@ from app.v1.schemas.predicao_exportacao import PredicaoExportacaoCreate
 def create_predicao_exportacao(
     db: Session,
     predicao_in: PredicaoExportacaoCreate,
-    valor_previsto: float
+    valor_previsto: float,
+    modelo_versao: Optional[str] = None
 ) -> PredicaoExportacao:
     """
     Insere no banco uma predição de exportação, contendo pais, quantidade_kg, tipo e valor_previsto.
@@ -17,7 +20,8 @@ def create_predicao_exportacao(
         pais=predicao_in.pais,
         quantidade_kg=predicao_in.quantidade_kg,
         tipo=predicao_in.tipo,
-        valor_previsto=valor_previsto
+        valor_previsto=valor_previsto,
+        modelo_versao=modelo_versao
     )
     db.add(obj)
     db.commit()
@@ -25,6 +29,26 @@ def create_predicao_exportacao(
     return obj
 
 
+def create_predicoes_exportacao(
+    db: Session,
+    predicoes_in: List[PredicaoExportacaoCreate],
+    valores_previstos: Sequence[float],
+    modelo_versao: Optional[str] = None,
+    columns: Optional[List[str]] = None
+) -> List[Row]:
+    """
+    Insere em lote (sem commit) as predições de exportacao, uma por item de `predicoes_in`
+    com o valor correspondente de `valores_previstos`, com INSERT em lote e RETURNING.
+    :param modelo_versao: (opcional) versão do modelo que gerou os valores.
+    :param columns: (opcional) colunas devolvidas; por padrão todas as do modelo.
+    """
+    rows = [
+        {**predicao.model_dump(), "valor_previsto": float(valor), "modelo_versao": modelo_versao}
+        for predicao, valor in zip(predicoes_in, valores_previstos)
+    ]
+    return insert_returning(db, PredicaoExportacao, rows, columns=columns)
+
+
 def get_predicoes_exportacao(
     db: Session
 ) -> list[Type[PredicaoExportacao]]:
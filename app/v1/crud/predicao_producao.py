@@ -1,5 +1,7 @@
-from typing import List, Type
+from typing import List, Optional, Sequence, Type
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
+from app.v1.crud.bulk import insert_returning
 from app.v1.models.predicao_producao import PredicaoProducao
 from app.v1.schemas.predicao_producao import PredicaoProducaoCreate
 
@@ -7,7 +9,8 @@ from app.v1.schemas.predicao_producao import PredicaoProducaoCreate
 def create_predicao_producao(
     db: Session,
     predicao_in: PredicaoProducaoCreate,
-    valor_previsto: float
+    valor_previsto: float,
+    modelo_versao: Optional[str] = None
 ) -> PredicaoProducao:
     """
     Insere no banco uma predição de produção, contendo produto, tipo, ano e valor_previsto.
@@ -17,7 +20,8 @@ def create_predicao_producao(
         produto=predicao_in.produto,
         tipo=predicao_in.tipo,
         ano=predicao_in.ano,
-        valor_previsto=valor_previsto
+        valor_previsto=valor_previsto,
+        modelo_versao=modelo_versao
     )
     db.add(obj)
     db.commit()
@@ -25,6 +29,26 @@ def create_predicao_producao(
     return obj
 
 
+def create_predicoes_producao(
+    db: Session,
+    predicoes_in: List[PredicaoProducaoCreate],
+    valores_previstos: Sequence[float],
+    modelo_versao: Optional[str] = None,
+    columns: Optional[List[str]] = None
+) -> List[Row]:
+    """
+    Insere em lote (sem commit) as predições de producao, uma por item de `predicoes_in`
+    com o valor correspondente de `valores_previstos`, com INSERT em lote e RETURNING.
+    :param modelo_versao: (opcional) versão do modelo que gerou os valores.
+    :param columns: (opcional) colunas devolvidas; por padrão todas as do modelo.
+    """
+    rows = [
+        {**predicao.model_dump(), "valor_previsto": float(valor), "modelo_versao": modelo_versao}
+        for predicao, valor in zip(predicoes_in, valores_previstos)
+    ]
+    return insert_returning(db, PredicaoProducao, rows, columns=columns)
+
+
 def get_predicoes_producao(
     db: Session
 ) -> list[Type[PredicaoProducao]]:
@@ -1,5 +1,11 @@
 from typing import List, Optional, Type
+from sqlalchemy.engine import Row
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core.pagination import keyset
+from app.core.query_cache import query_cache
+from app.v1.crud.bulk import insert_returning
 from app.v1.models.processamento import Processamento
 from app.v1.schemas.processamento import ProcessamentoBase
 
@@ -7,26 +13,18 @@ from app.v1.schemas.processamento import ProcessamentoBase
 def create_processamentos(
     db: Session,
     registros: List[ProcessamentoBase]
-) -> List[Processamento]:
+) -> List[Row]:
     """
     Insere em lote todos os registros de ProcessamentoBase no banco.
-    Retorna a lista de objetos Processamento (já com id).
+    Retorna as linhas de Processamento inseridas (já com id), gravadas com INSERT em lote
+    (vários registros por comando, com RETURNING), sem um refresh por objeto.
+    Registros cuja chave natural já existe são atualizados em vez de duplicados.
     """
-    objetos = []
-    for item in registros:
-        obj = Processamento(
-            cultivar=item.cultivar,
-            quantidade_kg=item.quantidade_kg,
-            tipo=item.tipo,
-            caracteristica=item.caracteristica,
-            ano=item.ano,
-        )
-        db.add(obj)
-        objetos.append(obj)
-
+    objetos = insert_returning(
+        db, Processamento, [item.model_dump() for item in registros], upsert=True
+    )
     db.commit()
-    for obj in objetos:
-        db.refresh(obj)
+    query_cache.invalidate(Processamento.__tablename__)
     return objetos
 
 
@@ -46,24 +44,29 @@ def create_processamento(
     )
     db.add(obj)
     db.commit()
+    query_cache.invalidate(Processamento.__tablename__)
     db.refresh(obj)
     return obj
 
 
-def get_processamentos(
-    db: Session,
+def select_processamentos(
     cultivares: Optional[List[str]] = None,
     tipos: Optional[List[str]] = None,
     caracteristicas: Optional[List[str]] = None,
     quantidade_minima: Optional[int] = None,
     quantidade_maxima: Optional[int] = None,
     anos: Optional[List[int]] = None,
-) -> list[Type[Processamento]]:
+    ano_inicio: Optional[int] = None,
+    ano_fim: Optional[int] = None,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+) -> Select:
     """
-    Retorna todos os registros que atendem aos filtros fornecidos.
+    Monta o SELECT (sem executar) dos registros que atendem aos filtros fornecidos.
     Se um parâmetro for None ou lista vazia, esse filtro é ignorado.
+    Com `limit`/`after`, devolve uma página em ordem de id (keyset: id > after).
     """
-    query = db.query(Processamento)
+    query = select(Processamento)
 
     if cultivares:
         query = query.filter(Processamento.cultivar.in_(cultivares))
@@ -76,7 +79,24 @@ def get_processamentos(
     if quantidade_maxima is not None:
         query = query.filter(Processamento.quantidade_kg <= quantidade_maxima)
     if anos:
-        anos_str = [str(a) for a in anos]
-        query = query.filter(Processamento.ano.in_(anos_str))
+        query = query.filter(Processamento.ano.in_(anos))
+    if ano_inicio is not None:
+        query = query.filter(Processamento.ano >= ano_inicio)
+    if ano_fim is not None:
+        query = query.filter(Processamento.ano <= ano_fim)
 
-    return query.all()
+    return keyset(query, Processamento.id, limit, after)
+
+
+def get_processamentos(db: Session, **filtros) -> list[Type[Processamento]]:
+    """
+    Retorna os registros de select_processamentos (mesmos filtros e paginação).
+    """
+    return db.scalars(select_processamentos(**filtros)).all()
+
+
+async def get_processamentos_async(db: AsyncSession, **filtros) -> list[Type[Processamento]]:
+    """
+    Versão assíncrona de get_processamentos.
+    """
+    return (await db.scalars(select_processamentos(**filtros))).all()
@@ -1,5 +1,11 @@
 from typing import List, Optional, Type
+from sqlalchemy.engine import Row
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core.pagination import keyset
+from app.core.query_cache import query_cache
+from app.v1.crud.bulk import insert_returning
 from app.v1.models.producao import Producao
 from app.v1.schemas.producao import ProducaoBase
 
@@ -7,25 +13,18 @@ from app.v1.schemas.producao import ProducaoBase
 def create_producoes(
     db: Session,
     registros: List[ProducaoBase]
-) -> List[Producao]:
+) -> List[Row]:
     """
     Insere em lote todos os registros de ProducaoBase no banco.
-    Retorna a lista de objetos Producao (já com id).
+    Retorna as linhas de Producao inseridas (já com id), gravadas com INSERT em lote
+    (vários registros por comando, com RETURNING), sem um refresh por objeto.
+    Registros cuja chave natural já existe são atualizados em vez de duplicados.
     """
-    objetos = []
-    for item in registros:
-        obj = Producao(
-            produto=item.produto,
-            quantidade_l=item.quantidade_l,
-            tipo=item.tipo,
-            ano=item.ano,
-        )
-        db.add(obj)
-        objetos.append(obj)
-
+    objetos = insert_returning(
+        db, Producao, [item.model_dump() for item in registros], upsert=True
+    )
     db.commit()
-    for obj in objetos:
-        db.refresh(obj)
+    query_cache.invalidate(Producao.__tablename__)
     return objetos
 
 
@@ -44,23 +43,28 @@ def create_producao(
     )
     db.add(obj)
     db.commit()
+    query_cache.invalidate(Producao.__tablename__)
     db.refresh(obj)
     return obj
 
 
-def get_producoes(
-    db: Session,
+def select_producoes(
     produtos: Optional[List[str]] = None,
     tipos: Optional[List[str]] = None,
     quantidade_minima: Optional[int] = None,
     quantidade_maxima: Optional[int] = None,
     anos: Optional[List[int]] = None,
-) -> list[Type[Producao]]:
+    ano_inicio: Optional[int] = None,
+    ano_fim: Optional[int] = None,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+) -> Select:
     """
-    Retorna todos os registros que atendem aos filtros fornecidos.
+    Monta o SELECT (sem executar) dos registros que atendem aos filtros fornecidos.
     Se um parâmetro for None ou lista vazia, esse filtro é ignorado.
+    Com `limit`/`after`, devolve uma página em ordem de id (keyset: id > after).
     """
-    query = db.query(Producao)
+    query = select(Producao)
 
     if produtos:
         query = query.filter(Producao.produto.in_(produtos))
@@ -71,7 +75,24 @@ def get_producoes(
     if quantidade_maxima is not None:
         query = query.filter(Producao.quantidade_l <= quantidade_maxima)
     if anos:
-        anos_str = [str(a) for a in anos]
-        query = query.filter(Producao.ano.in_(anos_str))
+        query = query.filter(Producao.ano.in_(anos))
+    if ano_inicio is not None:
+        query = query.filter(Producao.ano >= ano_inicio)
+    if ano_fim is not None:
+        query = query.filter(Producao.ano <= ano_fim)
 
-    return query.all()
+    return keyset(query, Producao.id, limit, after)
+
+
+def get_producoes(db: Session, **filtros) -> list[Type[Producao]]:
+    """
+    Retorna os registros de select_producoes (mesmos filtros e paginação).
+    """
+    return db.scalars(select_producoes(**filtros)).all()
+
+
+async def get_producoes_async(db: AsyncSession, **filtros) -> list[Type[Producao]]:
+    """
+    Versão assíncrona de get_producoes.
+    """
+    return (await db.scalars(select_producoes(**filtros))).all()
@@ -0,0 +1,50 @@
+from typing import Dict, Tuple, Type
+from sqlalchemy.orm import Session
+from app.core.database import Base
+from app.v1.models.scrape_estado import ScrapeEstado
+
+Pagina = Tuple[str, int]
+
+
+def get_hashes(db: Session, dataset: str) -> Dict[Pagina, str]:
+    """
+    Retorna o hash de conteúdo de cada página (subopcao, ano) já importada do dataset.
+    """
+    registros = db.query(ScrapeEstado).filter(ScrapeEstado.dataset == dataset).all()
+    return {(r.subopcao, r.ano): r.content_hash for r in registros}
+
+
+def save_hashes(db: Session, dataset: str, hashes: Dict[Pagina, str]) -> None:
+    """
+    Grava (insere ou atualiza, sem commit) o hash de conteúdo das páginas importadas,
+    para que seja confirmado na mesma transação das linhas.
+    """
+    if not hashes:
+        return
+    existentes = {
+        (r.subopcao, r.ano): r
+        for r in db.query(ScrapeEstado).filter(ScrapeEstado.dataset == dataset).all()
+    }
+    for (subopcao, ano), content_hash in hashes.items():
+        registro = existentes.get((subopcao, ano))
+        if registro is None:
+            db.add(ScrapeEstado(
+                dataset=dataset, subopcao=subopcao, ano=ano, content_hash=content_hash
+            ))
+        else:
+            registro.content_hash = content_hash
+
+
+def delete_paginas(db: Session, model: Type[Base], paginas: Dict[Pagina, str]) -> int:
+    """
+    Remove (sem commit) as linhas do dataset vindas das páginas informadas, para que
+    sejam substituídas pela nova leitura. Subopção vazia indica que o 'tipo' vem da
+    própria tabela, então todas as linhas do ano são removidas.
+    """
+    removidos = 0
+    for subopcao, ano in paginas:
+        query = db.query(model).filter(model.ano == ano)
+        if subopcao:
+            query = query.filter(model.tipo == subopcao)
+        removidos += query.delete(synchronize_session=False)
+    return removidos
@@ -1,12 +1,25 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, UniqueConstraint
 from app.core.database import Base
+from app.core.rollup import Rollup
 
 
 class Comercializacao(Base):
     __tablename__ = "comercializacao"
+    __table_args__ = (
+        UniqueConstraint("produto", "tipo", "ano", name="uq_comercializacao_chave_natural"),
+        Index("ix_comercializacao_tipo_ano", "tipo", "ano"),
+        Index("ix_comercializacao_ano", "ano"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     produto = Column(String, nullable=False)
     quantidade_l = Column(Integer, nullable=False)
     tipo = Column(String, nullable=False)
-    ano = Column(String, nullable=False)
+    ano = Column(Integer, nullable=False)
+
+
+# Agregados materializados de GET /comercializacao/agregado (ver app.core.rollup).
+ROLLUPS = [
+    Rollup(Comercializacao, ("ano", "tipo"), ("quantidade_l",)),
+    Rollup(Comercializacao, ("ano", "produto"), ("quantidade_l",)),
+]
@@ -1,12 +1,25 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, UniqueConstraint
 from app.core.database import Base
+from app.core.rollup import Rollup
 
 class Exportacao(Base):
     __tablename__ = "exportacao"
+    __table_args__ = (
+        UniqueConstraint("paises", "tipo", "ano", name="uq_exportacao_chave_natural"),
+        Index("ix_exportacao_tipo_ano", "tipo", "ano"),
+        Index("ix_exportacao_ano", "ano"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     paises = Column(String, nullable=False)
     quantidade_kg = Column(Integer, nullable=False)
     valor_dolar = Column(Integer, nullable=False)
     tipo = Column(String, nullable=False)
-    ano = Column(String, nullable=False)
+    ano = Column(Integer, nullable=False)
+
+
+# Agregados materializados de GET /exportacao/agregado (ver app.core.rollup).
+ROLLUPS = [
+    Rollup(Exportacao, ("ano", "tipo"), ("quantidade_kg", "valor_dolar")),
+    Rollup(Exportacao, ("ano", "paises"), ("quantidade_kg", "valor_dolar")),
+]
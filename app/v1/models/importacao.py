@@ -1,13 +1,26 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, UniqueConstraint
 from app.core.database import Base
+from app.core.rollup import Rollup
 
 
 class Importacao(Base):
     __tablename__ = "importacao"
+    __table_args__ = (
+        UniqueConstraint("paises", "tipo", "ano", name="uq_importacao_chave_natural"),
+        Index("ix_importacao_tipo_ano", "tipo", "ano"),
+        Index("ix_importacao_ano", "ano"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     paises = Column(String, nullable=False)
     quantidade_kg = Column(Integer, nullable=False)
     valor_dolar = Column(Integer, nullable=False)
     tipo = Column(String, nullable=False)
-    ano = Column(String, nullable=False)
+    ano = Column(Integer, nullable=False)
+
+
+# Agregados materializados de GET /importacao/agregado (ver app.core.rollup).
+ROLLUPS = [
+    Rollup(Importacao, ("ano", "tipo"), ("quantidade_kg", "valor_dolar")),
+    Rollup(Importacao, ("ano", "paises"), ("quantidade_kg", "valor_dolar")),
+]
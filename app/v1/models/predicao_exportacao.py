@@ -10,6 +10,8 @@ class PredicaoExportacao(Base):
     quantidade_kg = Column(Integer, nullable=False)
     tipo = Column(String, nullable=False)
     valor_previsto = Column(Float, nullable=False)
+    # versão do modelo que gerou a predição (ver app.core.model_registry)
+    modelo_versao = Column(String, nullable=True)
     created_at = Column(
         DateTime(timezone=False),
         server_default=func.now(),
@@ -1,13 +1,20 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, UniqueConstraint
 from app.core.database import Base
 
 
 class Processamento(Base):
     __tablename__ = "processamento"
+    __table_args__ = (
+        UniqueConstraint(
+            "cultivar", "tipo", "caracteristica", "ano", name="uq_processamento_chave_natural"
+        ),
+        Index("ix_processamento_tipo_ano", "tipo", "ano"),
+        Index("ix_processamento_ano", "ano"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     cultivar = Column(String, nullable=False)
     quantidade_kg = Column(Integer, nullable=False)
     tipo = Column(String, nullable=False)
     caracteristica = Column(String, nullable=False)
-    ano = Column(String, nullable=False)
+    ano = Column(Integer, nullable=False)
@@ -1,11 +1,16 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, UniqueConstraint
 from app.core.database import Base
 
 class Producao(Base):
     __tablename__ = "producao"
+    __table_args__ = (
+        UniqueConstraint("produto", "tipo", "ano", name="uq_producao_chave_natural"),
+        Index("ix_producao_tipo_ano", "tipo", "ano"),
+        Index("ix_producao_ano", "ano"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     produto = Column(String, nullable=False)
     quantidade_l = Column(Integer, nullable=False)
     tipo = Column(String, nullable=False)
-    ano = Column(String, nullable=False)
+    ano = Column(Integer, nullable=False)
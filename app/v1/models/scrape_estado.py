@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, Integer, String, UniqueConstraint, func
+from app.core.database import Base
+
+
+class ScrapeEstado(Base):
+    """
+    Hash do conteúdo da última tabela importada para cada página
+    (dataset, subopcao, ano), usado pelo modo incremental das rotas /update.
+    """
+    __tablename__ = "scrape_estado"
+    __table_args__ = (UniqueConstraint("dataset", "subopcao", "ano"),)
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    dataset = Column(String, nullable=False)
+    subopcao = Column(String, nullable=False)
+    ano = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=False),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False
+    )
@@ -1,104 +1,259 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.v1.crud.comercializacao import (
-    create_comercializacoes,
     get_comercializacoes as crud_get_comercializacoes,
+    select_comercializacoes as crud_select_comercializacoes,
+    select_comercializacoes_agregado as crud_select_comercializacoes_agregado,
+    DIMENSOES_AGREGADO,
     create_comercializacao as crud_create_comercializacao
 )
-from app.core.database import get_db
-from app.scraper.functions import create_dataframe
+from app.core.database import SessionLocal, get_async_db, get_db
+from app.core.columnar import EXPORT_RESPONSES, ExportFormat, export_query
+from app.core.pagination import Page
+from app.core.query_cache import query_cache
+from app.core.rollup import parse_dimensoes, parse_metricas, refresh_rollups
+from app.core.streaming import STREAM_RESPONSES, stream_format, stream_query
+from app.core.jobs import Job, JobQueueFull, jobs
+from app.v1.crud.bulk import upsert_dataframe
+from app.v1.crud.scrape_estado import delete_paginas, get_hashes, save_hashes
+from app.v1.models.comercializacao import ROLLUPS, Comercializacao
+from app.scraper.datasets import DATASETS
+from app.scraper.functions import (
+    create_dataset_dataframe,
+    create_dataset_dataframe_incremental
+)
 from app.scraper.scraper import EmbrapaScraper
 from app.v1.schemas.comercializacao import ComercializacaoBase, ComercializacaoOut
+from app.v1.schemas.job import JobOut
 
 router = APIRouter(prefix="/comercializacao", tags=["Comercialização"])
 scraper = EmbrapaScraper()
 
 
+def _importar(job: Job, ano: List[int], incremental: bool) -> int:
+    """
+    Executa o scraping e a gravação de /comercializacao/update dentro de um job,
+    com sessão de banco própria.
+    :return: número de linhas gravadas.
+    """
+    dataset = DATASETS["comercializacao"]
+    with SessionLocal() as db:
+        if incremental:
+            df, alterados = create_dataset_dataframe_incremental(
+                scraper=scraper,
+                dataset=dataset,
+                anos=ano,
+                hashes=get_hashes(db, dataset.nome),
+                progress=job.progress,
+                failures=job.failures
+            )
+            delete_paginas(db, Comercializacao, alterados)
+            save_hashes(db, dataset.nome, alterados)
+        else:
+            df = create_dataset_dataframe(
+                scraper=scraper,
+                dataset=dataset,
+                anos=ano,
+                progress=job.progress,
+                failures=job.failures
+            )
+
+        if df.empty and not incremental:
+            anos_str = ", ".join(map(str, ano))
+            raise LookupError(f"Nenhum dado encontrado para o(s) ano(s): {anos_str}")
+
+        job.check_cancelled()
+        total = upsert_dataframe(db, Comercializacao, df)
+        refresh_rollups(db, ROLLUPS, ano)
+        db.commit()
+        query_cache.invalidate(Comercializacao.__tablename__)
+        return total
+
+
 @router.get(
     "/update",
-    response_model=List[ComercializacaoOut],
-    status_code=status.HTTP_201_CREATED
+    response_model=JobOut,
+    status_code=status.HTTP_202_ACCEPTED
 )
 def update_comercializacao(
-    db: Session = Depends(get_db),
     ano: List[int] = Query(
         list(range(1970, 2025)), description="Repita o parâmetro para cada ano"
+    ),
+    incremental: bool = Query(
+        False, description="Importa apenas as páginas (subopção/ano) novas ou alteradas"
     )
 ):
     """
     /comercializacao/update:
-    - Faz scraping de TODOS os anos (default 1970–2024) e salva tudo no banco (sem filtros).
-    - Retorna a lista de objetos ComercializacaoOut criados.
+    - Enfileira o scraping de TODOS os anos (default 1970–2024) e salva tudo no banco (sem filtros).
+    - Com incremental=true, busca só as páginas novas ou alteradas e substitui as linhas
+      antigas dessas páginas (hash do conteúdo guardado em scrape_estado).
+    - Retorna 202 com o job criado; acompanhe o progresso em GET /jobs/{id}.
     """
-    URL = "http://vitibrasil.cnpuv.embrapa.br/index.php"
-    config = {
-        "url": f"{URL}?opcao=opt_04",
-        "main_cols": "produto",
-        "numeric_cols": ["quantidade_l"]
-    }
-
-    df = create_dataframe(
-        scraper=scraper,
-        url=config["url"],
-        main_cols=config["main_cols"],
-        numeric_cols=config["numeric_cols"],
-        anos=ano
-    )
-
-    if df.empty:
-        anos_str = ", ".join(map(str, ano))
+    try:
+        return jobs.submit(
+            "comercializacao",
+            lambda job: _importar(job, ano, incremental),
+            params={"ano": ano, "incremental": incremental}
+        )
+    except JobQueueFull:
         raise HTTPException(
-            status_code=404,
-            detail=f"Nenhum dado encontrado para o(s) ano(s): {anos_str}"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Fila de jobs cheia. Tente novamente mais tarde."
         )
 
-    registros: List[ComercializacaoBase] = []
-    for row in df.to_dict(orient="records"):
-        item = ComercializacaoBase(
-            produto=row["produto"],
-            quantidade_l=int(row["quantidade_l"]),
-            tipo=row["tipo"],
-            ano=str(row["ano"])
+
+@router.get(
+    "/agregado",
+    status_code=status.HTTP_200_OK
+)
+async def read_comercializacoes_agregado(
+    response: Response,
+    por: List[str] = Query(
+        ["ano"], description="Dimensões do agrupamento (ano, tipo, produto), separadas por vírgula"
+    ),
+    metrica: List[str] = Query(
+        ["sum(quantidade_l)"],
+        description="Métricas separadas por vírgula: sum, avg, min ou max de quantidade_l, ou count"
+    ),
+    produto: Optional[List[str]] = Query([], description="Produto(s) para filtrar"),
+    tipo: Optional[List[str]] = Query([], description="Tipo(s) para filtrar"),
+    ano: Optional[List[int]] = Query([], description="Ano(s) para filtrar"),
+    anoInicio: Optional[int] = Query(None, description="Primeiro ano do intervalo"),
+    anoFim: Optional[int] = Query(None, description="Último ano do intervalo"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    GET /comercializacao/agregado:
+    - Totais calculados no banco, por exemplo ?por=ano,tipo&metrica=sum(quantidade_l),count.
+    - Lê os agregados materializados comercializacao_por_ano_tipo e comercializacao_por_ano_produto,
+      recalculados a cada gravação; agrupamentos que eles não cobrem (ex.: por=produto,tipo)
+      agregam a própria tabela. A tabela lida é informada no cabeçalho X-Agregado-Fonte.
+    """
+    try:
+        query, fonte = crud_select_comercializacoes_agregado(
+            por=parse_dimensoes(por, DIMENSOES_AGREGADO),
+            metricas=parse_metricas(metrica, ROLLUPS[0].metricas),
+            produtos=produto or None,
+            tipos=tipo or None,
+            anos=ano or None,
+            ano_inicio=anoInicio,
+            ano_fim=anoFim
         )
-        registros.append(item)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
 
-    dados = create_comercializacoes(db=db, registros=registros)
-    return dados
+    dados = (await db.execute(query)).mappings().all()
+    if len(dados) != 0:
+        response.headers["X-Agregado-Fonte"] = fonte
+        return dados
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Registros não encontrados. Altere os parametros de filtro."
+    )
+
+
+@router.get(
+    "/export.{formato}",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses=EXPORT_RESPONSES
+)
+async def export_comercializacoes(
+    formato: ExportFormat,
+    produto: Optional[List[str]] = Query([], description="Produto(s) para filtrar"),
+    tipo: Optional[List[str]] = Query([], description="Tipo(s) para filtrar"),
+    quantidadeMinima: Optional[int] = Query(None, description="Quantidade mínima"),
+    quantidadeMaxima: Optional[int] = Query(None, description="Quantidade máxima"),
+    ano: Optional[List[int]] = Query([], description="Ano(s) para filtrar"),
+    anoInicio: Optional[int] = Query(None, description="Primeiro ano do intervalo"),
+    anoFim: Optional[int] = Query(None, description="Último ano do intervalo"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    GET /comercializacao/export.parquet e /comercializacao/export.arrow:
+    - Exporta os registros de comercializacao (com os mesmos filtros de GET /comercializacao) em Parquet
+      ou Arrow IPC (stream), colunar e comprimido, para leitura direta no pandas/pyarrow.
+    - Gerado em lotes direto do cursor do banco (EXPORT_BATCH_SIZE linhas por lote).
+    """
+    filtros_anos = ano if ano else None
+
+    filtros = dict(
+        produtos=produto or None,
+        tipos=tipo or None,
+        quantidade_minima=quantidadeMinima,
+        quantidade_maxima=quantidadeMaxima,
+        anos=filtros_anos,
+        ano_inicio=anoInicio,
+        ano_fim=anoFim
+    )
+    return export_query(db, crud_select_comercializacoes(**filtros), ComercializacaoOut, formato, "comercializacao")
 
 
 @router.get(
     "",
     response_model=List[ComercializacaoOut],
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    responses=STREAM_RESPONSES
 )
-def read_comercializacoes(
+async def read_comercializacoes(
+    request: Request,
     produto: Optional[List[str]] = Query([], description="Produto(s) para filtrar"),
     tipo: Optional[List[str]] = Query([], description="Tipo(s) para filtrar"),
     quantidadeMinima: Optional[int] = Query(None, description="Quantidade mínima"),
     quantidadeMaxima: Optional[int] = Query(None, description="Quantidade máxima"),
     ano: Optional[List[int]] = Query([], description="Ano(s) para filtrar"),
-    db: Session = Depends(get_db),
+    anoInicio: Optional[int] = Query(None, description="Primeiro ano do intervalo"),
+    anoFim: Optional[int] = Query(None, description="Último ano do intervalo"),
+    page: Page = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     GET /comercializacao:
     - Lê do banco todos os registros de comercialização.
-    - Aplica os filtros via query params (produto, tipo, quantidade e ano).
+    - Aplica os filtros via query params (produto, tipo, quantidade, ano e intervalo anoInicio–anoFim).
+    - Paginado por cursor: `limit` registros (máx. PAGE_SIZE_MAX) por página; o cursor da
+      próxima página vem em X-Next-Cursor (passe-o em `after`).
+    - Com Accept: application/x-ndjson ou text/csv, envia em streaming todos os registros
+      filtrados (a partir de `after`, sem `limit`).
     """
     filtros_anos = ano if ano else None
 
-    dados = crud_get_comercializacoes(
-        db=db,
+    filtros = dict(
         produtos=produto or None,
         tipos=tipo or None,
         quantidade_minima=quantidadeMinima,
         quantidade_maxima=quantidadeMaxima,
-        anos=filtros_anos
+        anos=filtros_anos,
+        ano_inicio=anoInicio,
+        ano_fim=anoFim
     )
-    if len(dados) != 0:
-        return dados
+    formato = stream_format(request)
+    if formato:
+        return stream_query(
+            db,
+            crud_select_comercializacoes(**filtros, after=page.after),
+            ComercializacaoOut,
+            formato
+        )
+
+    resposta = await query_cache.page(
+        request,
+        db,
+        Comercializacao.__tablename__,
+        filtros,
+        page,
+        crud_select_comercializacoes(**filtros, limit=page.limit + 1, after=page.after),
+        ComercializacaoOut
+    )
+    if resposta is not None:
+        return resposta
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail="Registros não encontrados. Altere os parametros de filtro."
@@ -119,5 +274,11 @@ def create_comercializacao_manual(
     - Recebe manualmente (JSON) um registro ComercializacaoBase e insere no banco.
     - Retorna o registro criado (com id).
     """
-    dados = crud_create_comercializacao(db=db, registro=registro)
+    try:
+        dados = crud_create_comercializacao(db=db, registro=registro)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Já existe um registro com o mesmo produto, tipo e ano."
+        )
     return dados
@@ -1,91 +1,212 @@
 from typing import List, Optional
 
-import pandas as pd
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.v1.crud.importacao import (
-    create_importacoes,
     get_importacoes as crud_get_importacoes,
+    select_importacoes as crud_select_importacoes,
+    select_importacoes_agregado as crud_select_importacoes_agregado,
+    DIMENSOES_AGREGADO,
     create_importacao as crud_create_importacao
 )
-from app.core.database import get_db
-from app.scraper.functions import create_dataframe
+from app.core.database import SessionLocal, get_async_db, get_db
+from app.core.columnar import EXPORT_RESPONSES, ExportFormat, export_query
+from app.core.pagination import Page
+from app.core.query_cache import query_cache
+from app.core.rollup import parse_dimensoes, parse_metricas, refresh_rollups
+from app.core.streaming import STREAM_RESPONSES, stream_format, stream_query
+from app.core.jobs import Job, JobQueueFull, jobs
+from app.v1.crud.bulk import upsert_dataframe
+from app.v1.crud.scrape_estado import delete_paginas, get_hashes, save_hashes
+from app.v1.models.importacao import ROLLUPS, Importacao
+from app.scraper.datasets import DATASETS
+from app.scraper.functions import (
+    create_dataset_dataframe,
+    create_dataset_dataframe_incremental
+)
 from app.scraper.scraper import EmbrapaScraper
 from app.v1.schemas.importacao import ImportacaoBase, ImportacaoOut
+from app.v1.schemas.job import JobOut
 
 router = APIRouter(prefix="/importacao", tags=["Importação"])
 scraper = EmbrapaScraper()
 
 
+def _importar(job: Job, ano: List[int], incremental: bool) -> int:
+    """
+    Executa o scraping e a gravação de /importacao/update dentro de um job,
+    com sessão de banco própria.
+    :return: número de linhas gravadas.
+    """
+    dataset = DATASETS["importacao"]
+    with SessionLocal() as db:
+        if incremental:
+            df, alterados = create_dataset_dataframe_incremental(
+                scraper=scraper,
+                dataset=dataset,
+                anos=ano,
+                hashes=get_hashes(db, dataset.nome),
+                progress=job.progress,
+                failures=job.failures
+            )
+            delete_paginas(db, Importacao, alterados)
+            save_hashes(db, dataset.nome, alterados)
+        else:
+            df = create_dataset_dataframe(
+                scraper=scraper,
+                dataset=dataset,
+                anos=ano,
+                progress=job.progress,
+                failures=job.failures
+            )
+
+        if df.empty and not incremental:
+            anos_str = ", ".join(map(str, ano))
+            raise LookupError(f"Nenhum dado encontrado para o(s) ano(s): {anos_str}")
+
+        job.check_cancelled()
+        total = upsert_dataframe(db, Importacao, df)
+        refresh_rollups(db, ROLLUPS, ano)
+        db.commit()
+        query_cache.invalidate(Importacao.__tablename__)
+        return total
+
+
 @router.get(
     "/update",
-    response_model=List[ImportacaoOut],
-    status_code=status.HTTP_201_CREATED
+    response_model=JobOut,
+    status_code=status.HTTP_202_ACCEPTED
 )
 def update_importacao(
-    db: Session = Depends(get_db),
-    ano: List[int] = Query(list(range(1970, 2025)), description="Repita o parâmetro para cada ano")
+    ano: List[int] = Query(list(range(1970, 2025)), description="Repita o parâmetro para cada ano"),
+    incremental: bool = Query(
+        False, description="Importa apenas as páginas (subopção/ano) novas ou alteradas"
+    )
 ):
     """
     Rota /importacao/update:
-    - Faz o scraping de TODOS os anos informados (default 1970–2024),
+    - Enfileira o scraping de TODOS os anos informados (default 1970–2024),
       gera o DataFrame completo (sem filtros do usuário) e salva tudo no banco.
-    - Retorna a lista de ImportacaoOut dos registros recém-inseridos.
+    - Com incremental=true, busca só as páginas novas ou alteradas e substitui as linhas
+      antigas dessas páginas (hash do conteúdo guardado em scrape_estado).
+    - Retorna 202 com o job criado; acompanhe o progresso em GET /jobs/{id}.
     """
-    URL = "http://vitibrasil.cnpuv.embrapa.br/index.php"
-    config = {
-        "main_cols": "paises",
-        "numeric_cols": ['quantidade_kg', "valor_dolar"]
-    }
-    types = {
-        "vinhos_de_mesa": f'{URL}?opcao=opt_05&subopcao=subopt_01',
-        "espumantes": f'{URL}?opcao=opt_05&subopcao=subopt_02',
-        "uvas_frescas": f'{URL}?opcao=opt_05&subopcao=subopt_03',
-        "uvas_passas": f'{URL}?opcao=opt_05&subopcao=subopt_04',
-        "suco_de_uva": f'{URL}?opcao=opt_05&subopcao=subopt_05',
-    }
-
-    df = pd.DataFrame(columns=['paises', 'quantidade_kg', 'valor_dolar', 'tipo', 'ano'])
-    for tipo_, url in types.items():
-        df_aux = create_dataframe(
-            scraper=scraper,
-            url=url,
-            main_cols=config["main_cols"],
-            numeric_cols=config["numeric_cols"],
-            anos=ano,
-            tipo=tipo_
+    try:
+        return jobs.submit(
+            "importacao",
+            lambda job: _importar(job, ano, incremental),
+            params={"ano": ano, "incremental": incremental}
         )
-        df = pd.concat([df, df_aux], ignore_index=True)
-
-    if df.empty:
-        anos_str = ", ".join(map(str, ano))
+    except JobQueueFull:
         raise HTTPException(
-            status_code=404,
-            detail=f"Nenhum dado encontrado para o(s) ano(s): {anos_str}"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Fila de jobs cheia. Tente novamente mais tarde."
         )
 
-    registros: List[ImportacaoBase] = []
-    for row in df.to_dict(orient="records"):
-        item = ImportacaoBase(
-            paises=row["paises"],
-            quantidade_kg=int(row["quantidade_kg"]),
-            valor_dolar=int(row["valor_dolar"]),
-            tipo=row["tipo"],
-            ano=str(row["ano"]),
+
+@router.get(
+    "/agregado",
+    status_code=status.HTTP_200_OK
+)
+async def read_importacoes_agregado(
+    response: Response,
+    por: List[str] = Query(
+        ["ano"], description="Dimensões do agrupamento (ano, tipo, pais), separadas por vírgula"
+    ),
+    metrica: List[str] = Query(
+        ["sum(valor_dolar)"],
+        description="Métricas separadas por vírgula: sum, avg, min ou max de quantidade_kg ou valor_dolar, ou count"
+    ),
+    pais: Optional[List[str]] = Query([], description="País(es) para filtrar"),
+    tipo: Optional[List[str]] = Query([], description="Tipo(s) para filtrar"),
+    ano: Optional[List[int]] = Query([], description="Ano(s) para filtrar"),
+    anoInicio: Optional[int] = Query(None, description="Primeiro ano do intervalo"),
+    anoFim: Optional[int] = Query(None, description="Último ano do intervalo"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    GET /importacao/agregado:
+    - Totais calculados no banco, por exemplo ?por=ano,tipo&metrica=sum(valor_dolar),count.
+    - Lê os agregados materializados importacao_por_ano_tipo e importacao_por_ano_paises,
+      recalculados a cada gravação; agrupamentos que eles não cobrem (ex.: por=pais,tipo)
+      agregam a própria tabela. A tabela lida é informada no cabeçalho X-Agregado-Fonte.
+    """
+    try:
+        query, fonte = crud_select_importacoes_agregado(
+            por=parse_dimensoes(por, DIMENSOES_AGREGADO),
+            metricas=parse_metricas(metrica, ROLLUPS[0].metricas),
+            paises=pais or None,
+            tipos=tipo or None,
+            anos=ano or None,
+            ano_inicio=anoInicio,
+            ano_fim=anoFim
         )
-        registros.append(item)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
 
-    dados = create_importacoes(db=db, importacoes=registros)
-    return dados
+    dados = (await db.execute(query)).mappings().all()
+    if len(dados) != 0:
+        response.headers["X-Agregado-Fonte"] = fonte
+        return dados
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Registros não encontrados. Altere os parametros de filtro."
+    )
+
+
+@router.get(
+    "/export.{formato}",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses=EXPORT_RESPONSES
+)
+async def export_importacoes(
+    formato: ExportFormat,
+    pais: Optional[List[str]] = Query([], description="País(es) para filtrar"),
+    tipo: Optional[List[str]] = Query([], description="Tipo(s) para filtrar"),
+    quantidadeMinima: Optional[int] = Query(None, description="Quantidade mínima"),
+    quantidadeMaxima: Optional[int] = Query(None, description="Quantidade máxima"),
+    valorMinimo: Optional[int] = Query(None, description="Valor mínimo em dólar"),
+    valorMaximo: Optional[int] = Query(None, description="Valor máximo em dólar"),
+    ano: Optional[List[int]] = Query([], description="Ano(s) para filtrar"),
+    anoInicio: Optional[int] = Query(None, description="Primeiro ano do intervalo"),
+    anoFim: Optional[int] = Query(None, description="Último ano do intervalo"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    GET /importacao/export.parquet e /importacao/export.arrow:
+    - Exporta os registros de importacao (com os mesmos filtros de GET /importacao) em Parquet
+      ou Arrow IPC (stream), colunar e comprimido, para leitura direta no pandas/pyarrow.
+    - Gerado em lotes direto do cursor do banco (EXPORT_BATCH_SIZE linhas por lote).
+    """
+    filtros_anos = ano if ano else None
+
+    filtros = dict(
+        paises=pais or None,
+        tipos=tipo or None,
+        quantidade_minima=quantidadeMinima,
+        quantidade_maxima=quantidadeMaxima,
+        valor_minimo=valorMinimo,
+        valor_maximo=valorMaximo,
+        anos=filtros_anos,
+        ano_inicio=anoInicio,
+        ano_fim=anoFim
+    )
+    return export_query(db, crud_select_importacoes(**filtros), ImportacaoOut, formato, "importacao")
 
 
 @router.get(
     "",
     response_model=List[ImportacaoOut],
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    responses=STREAM_RESPONSES
 )
-def read_importacoes(
+async def read_importacoes(
+    request: Request,
     pais: Optional[List[str]] = Query([], description="País(es) para filtrar"),
     tipo: Optional[List[str]] = Query([], description="Tipo(s) para filtrar"),
     quantidadeMinima: Optional[int] = Query(None, description="Quantidade mínima"),
@@ -93,17 +214,23 @@ def read_importacoes(
     valorMinimo: Optional[int] = Query(None, description="Valor mínimo em dólar"),
     valorMaximo: Optional[int] = Query(None, description="Valor máximo em dólar"),
     ano: Optional[List[int]] = Query([], description="Ano(s) para filtrar"),
-    db: Session = Depends(get_db),
+    anoInicio: Optional[int] = Query(None, description="Primeiro ano do intervalo"),
+    anoFim: Optional[int] = Query(None, description="Último ano do intervalo"),
+    page: Page = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Rota GET /importacao/:
     - Busca no banco todos os registros de importação.
-    - Aplica os filtros fornecidos via query params.
+    - Aplica os filtros fornecidos via query params (inclusive o intervalo anoInicio–anoFim).
+    - Paginado por cursor: `limit` registros (máx. PAGE_SIZE_MAX) por página; o cursor da
+      próxima página vem em X-Next-Cursor (passe-o em `after`).
+    - Com Accept: application/x-ndjson ou text/csv, envia em streaming todos os registros
+      filtrados (a partir de `after`, sem `limit`).
     """
     filtros_anos = ano if ano else None
 
-    dados = crud_get_importacoes(
-        db=db,
+    filtros = dict(
         paises=pais or None,
         tipos=tipo or None,
         quantidade_minima=quantidadeMinima,
@@ -111,9 +238,29 @@ def read_importacoes(
         valor_minimo=valorMinimo,
         valor_maximo=valorMaximo,
         anos=filtros_anos,
+        ano_inicio=anoInicio,
+        ano_fim=anoFim
     )
-    if len(dados) != 0:
-        return dados
+    formato = stream_format(request)
+    if formato:
+        return stream_query(
+            db,
+            crud_select_importacoes(**filtros, after=page.after),
+            ImportacaoOut,
+            formato
+        )
+
+    resposta = await query_cache.page(
+        request,
+        db,
+        Importacao.__tablename__,
+        filtros,
+        page,
+        crud_select_importacoes(**filtros, limit=page.limit + 1, after=page.after),
+        ImportacaoOut
+    )
+    if resposta is not None:
+        return resposta
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail="Registros não encontrados. Altere os parametros de filtro."
@@ -134,5 +281,11 @@ def create_importacao_manual(
     - Recebe manualmente (JSON) um registro ImportacaoBase e insere no banco.
     - Retorna o registro criado (com id).
     """
-    dados = crud_create_importacao(db=db, importacao=importacao)
+    try:
+        dados = crud_create_importacao(db=db, importacao=importacao)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Já existe um registro com o mesmo país, tipo e ano."
+        )
     return dados
@@ -0,0 +1,60 @@
+from typing import List
+
+from fastapi import APIRouter, HTTPException, status
+
+from app.core.jobs import jobs
+from app.v1.schemas.job import JobOut
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get(
+    "",
+    response_model=List[JobOut],
+    status_code=status.HTTP_200_OK
+)
+def read_jobs():
+    """
+    GET /jobs:
+    - Lista os jobs de /update em andamento e os finalizados mais recentes.
+    """
+    return jobs.recent()
+
+
+@router.get(
+    "/{job_id}",
+    response_model=JobOut,
+    status_code=status.HTTP_200_OK
+)
+def read_job(job_id: str):
+    """
+    GET /jobs/{job_id}:
+    - Retorna o status e o progresso do job (páginas concluídas/total e linhas gravadas).
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job não encontrado."
+        )
+    return job
+
+
+@router.post(
+    "/{job_id}/cancel",
+    response_model=JobOut,
+    status_code=status.HTTP_202_ACCEPTED
+)
+def cancel_job(job_id: str):
+    """
+    POST /jobs/{job_id}/cancel:
+    - Solicita o cancelamento do job. Um job na fila é cancelado na hora; um job em
+      execução para na próxima página processada, sem gravar nada no banco.
+    """
+    job = jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job não encontrado."
+        )
+    return job
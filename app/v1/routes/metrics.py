@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Query, status
+
+from app.core.database import async_engine, async_engine_metrics, engine, engine_metrics
+from app.core.inference_cache import inference_cache
+from app.core.inference_scheduler import inference_scheduler
+from app.core.query_cache import query_cache
+
+router = APIRouter(prefix="/metrics", tags=["Métricas"])
+
+
+@router.get(
+    "/db",
+    status_code=status.HTTP_200_OK
+)
+def read_db_metrics(
+    top: int = Query(20, ge=0, le=200, description="Quantidade de SQLs mais demorados")
+):
+    """
+    GET /metrics/db:
+    - Estado dos pools de conexão (em uso, livres, overflow, timeouts) dos engines
+      síncrono e assíncrono.
+    - Histogramas de espera no pool, abertura de conexão, pre-ping, checkout e duração
+      dos comandos, e os `top` SQLs de maior tempo total desde o início do processo.
+    """
+    return {
+        "sync": engine_metrics.snapshot(engine, top),
+        "async": async_engine_metrics.snapshot(async_engine.sync_engine, top),
+    }
+
+
+@router.get(
+    "/cache",
+    status_code=status.HTTP_200_OK
+)
+def read_cache_metrics():
+    """
+    GET /metrics/cache:
+    - Estado do cache de consultas das rotas de leitura (backend, entradas, bytes,
+      remoções por falta de espaço) e acertos/falhas desde o início do processo.
+    """
+    return query_cache.stats()
+
+
+@router.get(
+    "/inference",
+    status_code=status.HTTP_200_OK
+)
+def read_inference_metrics():
+    """
+    GET /metrics/inference:
+    - Estado do cache de inferência das rotas de predição (entradas, remoções por falta
+      de espaço) e acertos/falhas desde o início do processo.
+    - Agrupamento das predições (inference_scheduler): distribuição do tamanho dos
+      lotes (requisições por predict), espera dos pedidos e duração de cada predict.
+    """
+    return {"cache": inference_cache.stats(), "scheduler": inference_scheduler.stats()}
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.model_registry import ModelLoadError, ModelNotFound, model_registry
+
+router = APIRouter(prefix="/admin/modelos", tags=["Modelos"])
+
+
+@router.get(
+    "",
+    status_code=status.HTTP_200_OK
+)
+def read_modelos():
+    """
+    GET /admin/modelos:
+    - Modelos de predição registrados: versão em uso (prefixo do sha256 do artefato),
+      checksum, último erro de carga e histórico das versões carregadas neste worker.
+    """
+    return model_registry.status()
+
+
+@router.post(
+    "/{nome}/reload",
+    status_code=status.HTTP_200_OK
+)
+async def reload_modelo(
+    nome: str,
+    force: bool = Query(False, description="Recarrega mesmo que o artefato não tenha mudado")
+):
+    """
+    POST /admin/modelos/{nome}/reload:
+    - Carrega de novo o artefato do modelo e passa a usá-lo se o conteúdo mudou; as
+      predições em andamento terminam com a versão anterior.
+    - Retorna 404 se o modelo não existe e 500 se o artefato não pode ser carregado
+      (a versão em uso é mantida).
+    - Atinge só o worker que recebe a requisição; para recarregar todos, use
+      MODEL_WATCH_INTERVAL.
+    """
+    try:
+        loaded, trocado = await run_in_threadpool(model_registry.reload, nome, force)
+    except ModelNotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ModelLoadError as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    return {"trocado": trocado, **model_registry.status(loaded.name)[0]}
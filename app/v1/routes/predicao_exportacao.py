@@ -1,13 +1,19 @@
-import pickle
-import os
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 
+from app.core.batch import batch_items, batch_request_body
 from app.core.database import get_db
+from app.core.inference_cache import Features, inference_cache
+from app.core.inference_scheduler import inference_scheduler, predict_rows
+from app.core.model_registry import LoadedModel, ModelLoadError, ModelNotFound, model_registry
+from app.core.serialization import dump_rows
 from app.v1.crud.predicao_exportacao import (
     create_predicao_exportacao,
+    create_predicoes_exportacao,
     get_predicoes_exportacao
 )
 from app.v1.schemas.predicao_exportacao import (
@@ -17,12 +23,35 @@ from app.v1.schemas.predicao_exportacao import (
 
 router = APIRouter(prefix="/predicao/exportacao", tags=["Predição"])
 
-MODEL_PATH = os.path.join("predict_models", "export_value_model.pkl")
-try:
-    with open(MODEL_PATH, "rb") as f:
-        export_value_model = pickle.load(f)
-except FileNotFoundError:
-    export_value_model = None
+model_registry.register("exportacao", "export_value_model.pkl")
+
+
+def _modelo() -> LoadedModel:
+    """
+    Versão atual do modelo de valor de exportação, carregada no primeiro uso (ver model_registry).
+    """
+    try:
+        return model_registry.get("exportacao")
+    except ModelNotFound:
+        raise HTTPException(
+            status_code=500,
+            detail="Modelo de valor de exportação não encontrado no servidor."
+        )
+    except ModelLoadError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+
+FEATURES = ["pais", "quantidade_kg", "tipo"]
+
+
+def _features(dados: PredicaoExportacaoCreate) -> Features:
+    """
+    Features normalizadas da entrada, na ordem de FEATURES (chave do cache de inferência).
+    """
+    return dados.pais, dados.quantidade_kg, dados.tipo
 
 
 @router.post(
@@ -30,55 +59,101 @@ except FileNotFoundError:
     response_model=PredicaoExportacaoOut,
     status_code=status.HTTP_201_CREATED
 )
-def predizer_exportacao(
+async def predizer_exportacao(
     dados: PredicaoExportacaoCreate,
     db: Session = Depends(get_db)
 ):
     """
     Gera a predição de valor de exportação (em dólar) para um dado país, quantidade_kg e tipo.
     1) Recebe JSON { pais, quantidade_kg, tipo }.
-    2) Monta DataFrame ou vetor conforme o modelo export_value_model.
-    3) Chama export_value_model.predict(...) → valor_previsto.
-    4) Salva no banco via create_predicao_exportacao.
-    5) Retorna o registro salvo.
+    2) Busca a predição no cache de inferência (mesmas features e versão do modelo);
+       se ausente, chama export_value_model.predict(...) → valor_previsto, agrupada com
+       as requisições concorrentes em um único predict (ver inference_scheduler).
+    3) Salva no banco via create_predicao_exportacao.
+    4) Retorna o registro salvo.
     """
-    if export_value_model is None:
+    modelo = await run_in_threadpool(_modelo)
+
+    try:
+        valor_previsto = (await inference_cache.predict_async(
+            modelo, [_features(dados)], lambda linhas: inference_scheduler.predict(modelo, FEATURES, linhas)
+        ))[0]
+    except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail="Modelo de valor de exportação não encontrado no servidor."
+            detail=f"Erro ao executar predição: {e}"
         )
 
-    # Para muitos modelos scikit-learn, basta um DataFrame de uma linha
-    import pandas as pd
+    predicao_obj = await run_in_threadpool(
+        create_predicao_exportacao,
+        db=db,
+        predicao_in=dados,
+        valor_previsto=valor_previsto,
+        modelo_versao=modelo.version
+    )
+
+    return predicao_obj
 
-    try:
-        df_input = pd.DataFrame([{
-            "pais": dados.pais,
-            "quantidade_kg": dados.quantidade_kg,
-            "tipo": dados.tipo
-        }])
-    except Exception:
-        raise HTTPException(
-            status_code=422,
-            detail="Dados de entrada inválidos para formar DataFrame."
-        )
 
+def _predizer_lote(
+        db: Session,
+        modelo: LoadedModel,
+        itens: List[PredicaoExportacaoCreate],
+        columns: List[str]
+) -> List[Row]:
+    """
+    Um único predict para os itens do lote ausentes do cache de inferência e um INSERT
+    em lote (sem commit) dos resultados.
+    """
     try:
-        valor_previsto_arr = export_value_model.predict(df_input)
-        valor_previsto = float(valor_previsto_arr[0])
+        valores_previstos = inference_cache.predict(
+            modelo, [_features(item) for item in itens], lambda pendentes: predict_rows(modelo.model, FEATURES, pendentes)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao executar predição: {e}"
         )
-
-    predicao_obj = create_predicao_exportacao(
-        db=db,
-        predicao_in=dados,
-        valor_previsto=valor_previsto
+    return create_predicoes_exportacao(
+        db, itens, valores_previstos, modelo_versao=modelo.version, columns=columns
     )
 
-    return predicao_obj
+
+@router.post(
+    "/batch",
+    response_model=List[PredicaoExportacaoOut],
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=batch_request_body(PredicaoExportacaoCreate)
+)
+async def predizer_exportacao_batch(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Gera em lote as predições de valor de exportação (grade de países, quantidades e tipos).
+    1) Recebe uma lista JSON de { pais, quantidade_kg, tipo } ou NDJSON
+       (Content-Type: application/x-ndjson, um objeto por linha).
+    2) A cada PREDICAO_BATCH_SIZE itens, chama export_value_model.predict uma vez (só
+       para os itens ausentes do cache de inferência) e grava as predições com um
+       INSERT em lote.
+    3) Confirma tudo em um único commit (nenhuma é gravada se algum item for inválido).
+    4) Retorna os registros salvos, na ordem de entrada.
+    """
+    modelo = await run_in_threadpool(_modelo)
+    columns = list(PredicaoExportacaoOut.model_fields)
+    linhas: List[Row] = []
+    try:
+        async for itens in batch_items(request, PredicaoExportacaoCreate):
+            linhas.extend(await run_in_threadpool(_predizer_lote, db, modelo, itens, columns))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    await run_in_threadpool(db.commit)
+
+    return Response(
+        dump_rows(columns, linhas),
+        status_code=status.HTTP_201_CREATED,
+        media_type="application/json"
+    )
 
 
 @router.get(
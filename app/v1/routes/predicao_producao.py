@@ -1,14 +1,19 @@
-import os
-import pickle
-import pandas as pd
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 
+from app.core.batch import batch_items, batch_request_body
 from app.core.database import get_db
+from app.core.inference_cache import Features, inference_cache
+from app.core.inference_scheduler import inference_scheduler, predict_rows
+from app.core.model_registry import LoadedModel, ModelLoadError, ModelNotFound, model_registry
+from app.core.serialization import dump_rows
 from app.v1.crud.predicao_producao import (
     create_predicao_producao,
+    create_predicoes_producao,
     get_predicoes_producao
 )
 from app.v1.schemas.predicao_producao import (
@@ -18,12 +23,36 @@ from app.v1.schemas.predicao_producao import (
 
 router = APIRouter(prefix="/predicao/producao", tags=["Predição"])
 
-MODEL_PATH = os.path.join("predict_models", "production_model.pkl")
-try:
-    with open(MODEL_PATH, "rb") as f:
-        production_model = pickle.load(f)
-except FileNotFoundError:
-    production_model = None
+model_registry.register("producao", "production_model.pkl")
+
+
+def _modelo() -> LoadedModel:
+    """
+    Versão atual do modelo de produção, carregada no primeiro uso (ver model_registry).
+    """
+    try:
+        return model_registry.get("producao")
+    except ModelNotFound:
+        raise HTTPException(
+            status_code=500,
+            detail="Modelo de produção não encontrado no servidor."
+        )
+    except ModelLoadError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+
+FEATURES = ["produto", "tipo", "ano"]
+
+
+def _features(dados: PredicaoProducaoCreate) -> Features:
+    """
+    Features normalizadas da entrada, na ordem de FEATURES (chave do cache de inferência).
+    :raises ValueError: ano não numérico.
+    """
+    return dados.produto, dados.tipo, int(dados.ano)
 
 
 @router.post(
@@ -31,54 +60,121 @@ except FileNotFoundError:
     response_model=PredicaoProducaoOut,
     status_code=status.HTTP_201_CREATED
 )
-def predizer_producao(
+async def predizer_producao(
     dados: PredicaoProducaoCreate,
     db: Session = Depends(get_db)
 ):
     """
     Gera a predição de produção (em litros) para um determinado produto, tipo e ano.
     1) Recebe JSON { produto, tipo, ano }.
-    2) Usa o modelo carregado (production_model.predict) para estimar valor_previsto.
+    2) Busca a predição no cache de inferência (mesmas features e versão do modelo);
+       se ausente, usa o modelo carregado (production_model.predict) para estimar
+       valor_previsto, agrupada com as requisições concorrentes em um único predict
+       (ver inference_scheduler).
     3) Salva no banco (tabela predicao_producao) com create_predicao_producao.
-    4) Retorna o objeto com id, produto, tipo, ano, valor_previsto e created_at.
+    4) Retorna o objeto com id, produto, tipo, ano, valor_previsto, modelo_versao e created_at.
     """
 
-    if production_model is None:
-        raise HTTPException(
-            status_code=500,
-            detail="Modelo de produção não encontrado no servidor."
-        )
+    modelo = await run_in_threadpool(_modelo)
 
     try:
-        df_input = pd.DataFrame([{
-            "produto": dados.produto,
-            "tipo": dados.tipo,
-            "ano": int(dados.ano)
-        }])
-    except Exception:
+        linha = _features(dados)
+    except ValueError:
         raise HTTPException(
             status_code=422,
             detail="Ano deve ser algo que possa converter para inteiro."
         )
 
     try:
-        valor_previsto_arr = production_model.predict(df_input)
-        valor_previsto = float(valor_previsto_arr[0])
+        valor_previsto = (await inference_cache.predict_async(
+            modelo, [linha], lambda linhas: inference_scheduler.predict(modelo, FEATURES, linhas)
+        ))[0]
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao executar predição: {e}"
         )
 
-    predicao_obj = create_predicao_producao(
+    predicao_obj = await run_in_threadpool(
+        create_predicao_producao,
         db=db,
         predicao_in=dados,
-        valor_previsto=valor_previsto
+        valor_previsto=valor_previsto,
+        modelo_versao=modelo.version
     )
 
     return predicao_obj
 
 
+def _predizer_lote(
+        db: Session,
+        modelo: LoadedModel,
+        itens: List[PredicaoProducaoCreate],
+        columns: List[str]
+) -> List[Row]:
+    """
+    Um único predict para os itens do lote ausentes do cache de inferência e um INSERT
+    em lote (sem commit) dos resultados.
+    """
+    try:
+        linhas = [_features(item) for item in itens]
+    except ValueError:
+        raise HTTPException(
+            status_code=422,
+            detail="Ano deve ser algo que possa converter para inteiro."
+        )
+
+    try:
+        valores_previstos = inference_cache.predict(
+            modelo, linhas, lambda pendentes: predict_rows(modelo.model, FEATURES, pendentes)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao executar predição: {e}"
+        )
+    return create_predicoes_producao(
+        db, itens, valores_previstos, modelo_versao=modelo.version, columns=columns
+    )
+
+
+@router.post(
+    "/batch",
+    response_model=List[PredicaoProducaoOut],
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=batch_request_body(PredicaoProducaoCreate)
+)
+async def predizer_producao_batch(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Gera em lote as predições de produção (grade de produtos, tipos e anos).
+    1) Recebe uma lista JSON de { produto, tipo, ano } ou NDJSON
+       (Content-Type: application/x-ndjson, um objeto por linha).
+    2) A cada PREDICAO_BATCH_SIZE itens, chama production_model.predict uma vez (só
+       para os itens ausentes do cache de inferência) e grava as predições com um
+       INSERT em lote.
+    3) Confirma tudo em um único commit (nenhuma é gravada se algum item for inválido).
+    4) Retorna os registros salvos, na ordem de entrada.
+    """
+    modelo = await run_in_threadpool(_modelo)
+    columns = list(PredicaoProducaoOut.model_fields)
+    linhas: List[Row] = []
+    try:
+        async for itens in batch_items(request, PredicaoProducaoCreate):
+            linhas.extend(await run_in_threadpool(_predizer_lote, db, modelo, itens, columns))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    await run_in_threadpool(db.commit)
+
+    return Response(
+        dump_rows(columns, linhas),
+        status_code=status.HTTP_201_CREATED,
+        media_type="application/json"
+    )
+
+
 @router.get(
     "",
     response_model=List[PredicaoProducaoOut]
@@ -2,105 +2,206 @@
 from typing import List, Optional
 
 import pandas as pd
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.v1.crud.producao import (
-    create_producoes,
     get_producoes as crud_get_producoes,
+    select_producoes as crud_select_producoes,
     create_producao as crud_create_producao
 )
-from app.core.database import get_db
-from app.scraper.functions import create_dataframe
+from app.core.database import SessionLocal, get_async_db, get_db
+from app.core.columnar import EXPORT_RESPONSES, ExportFormat, export_query
+from app.core.pagination import Page
+from app.core.query_cache import query_cache
+from app.core.streaming import STREAM_RESPONSES, stream_format, stream_query
+from app.core.jobs import Job, JobQueueFull, jobs
+from app.v1.crud.bulk import upsert_dataframe
+from app.v1.crud.scrape_estado import delete_paginas, get_hashes, save_hashes
+from app.v1.models.producao import Producao
+from app.scraper.datasets import DATASETS
+from app.scraper.functions import (
+    create_dataset_dataframe,
+    create_dataset_dataframe_incremental
+)
 from app.scraper.scraper import EmbrapaScraper
 from app.v1.schemas.producao import ProducaoBase, ProducaoOut
+from app.v1.schemas.job import JobOut
 
 router = APIRouter(prefix="/producao", tags=["Produção"])
 scraper = EmbrapaScraper()
 
 
+def _importar(job: Job, ano: List[int], incremental: bool) -> int:
+    """
+    Executa o scraping e a gravação de /producao/update dentro de um job,
+    com sessão de banco própria.
+    :return: número de linhas gravadas.
+    """
+    dataset = DATASETS["producao"]
+    with SessionLocal() as db:
+        if incremental:
+            df, alterados = create_dataset_dataframe_incremental(
+                scraper=scraper,
+                dataset=dataset,
+                anos=ano,
+                hashes=get_hashes(db, dataset.nome),
+                progress=job.progress,
+                failures=job.failures
+            )
+            delete_paginas(db, Producao, alterados)
+            save_hashes(db, dataset.nome, alterados)
+        else:
+            df = create_dataset_dataframe(
+                scraper=scraper,
+                dataset=dataset,
+                anos=ano,
+                progress=job.progress,
+                failures=job.failures
+            )
+
+        if df.empty and not incremental:
+            anos_str = ", ".join(map(str, ano))
+            raise LookupError(f"Nenhum dado encontrado para o(s) ano(s): {anos_str}")
+
+        job.check_cancelled()
+        total = upsert_dataframe(db, Producao, df)
+        db.commit()
+        query_cache.invalidate(Producao.__tablename__)
+        return total
+
+
 @router.get(
     "/update",
-    response_model=List[ProducaoOut],
-    status_code=status.HTTP_201_CREATED
+    response_model=JobOut,
+    status_code=status.HTTP_202_ACCEPTED
 )
 def update_producao(
-    db: Session = Depends(get_db),
     ano: List[int] = Query(
         list(range(1970, 2025)), description="Repita o parâmetro para cada ano"
+    ),
+    incremental: bool = Query(
+        False, description="Importa apenas as páginas (subopção/ano) novas ou alteradas"
     )
 ):
     """
     /producao/update:
-    - Faz scraping de TODOS os anos (default 1970–2024) e salva tudo no banco (sem filtros).
-    - Retorna a lista de objetos ProducaoOut criados.
+    - Enfileira o scraping de TODOS os anos (default 1970–2024) e salva tudo no banco (sem filtros).
+    - Com incremental=true, busca só as páginas novas ou alteradas e substitui as linhas
+      antigas dessas páginas (hash do conteúdo guardado em scrape_estado).
+    - Retorna 202 com o job criado; acompanhe o progresso em GET /jobs/{id}.
     """
-    URL = "http://vitibrasil.cnpuv.embrapa.br/index.php"
-    config = {
-        "url": f"{URL}?opcao=opt_02",
-        "main_cols": "produto",
-        "numeric_cols": ["quantidade_l"],
-    }
-
-    df = create_dataframe(
-        scraper=scraper,
-        url=config["url"],
-        main_cols=config["main_cols"],
-        numeric_cols=config["numeric_cols"],
-        anos=ano
-    )
-
-    if df.empty:
-        anos_str = ", ".join(map(str, ano))
+    try:
+        return jobs.submit(
+            "producao",
+            lambda job: _importar(job, ano, incremental),
+            params={"ano": ano, "incremental": incremental}
+        )
+    except JobQueueFull:
         raise HTTPException(
-            status_code=404,
-            detail=f"Nenhum dado encontrado para o(s) ano(s): {anos_str}"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Fila de jobs cheia. Tente novamente mais tarde."
         )
 
-    registros: List[ProducaoBase] = []
-    for row in df.to_dict(orient="records"):
-        item = ProducaoBase(
-            produto=row["produto"],
-            quantidade_l=int(row["quantidade_l"]),
-            tipo=row["tipo"],
-            ano=str(row["ano"])
-        )
-        registros.append(item)
 
-    dados = create_producoes(db=db, registros=registros)
-    return dados
+@router.get(
+    "/export.{formato}",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses=EXPORT_RESPONSES
+)
+async def export_producoes(
+    formato: ExportFormat,
+    produto: Optional[List[str]] = Query([], description="Produto(s) para filtrar"),
+    tipo: Optional[List[str]] = Query([], description="Tipo(s) para filtrar"),
+    quantidadeMinima: Optional[int] = Query(None, description="Quantidade mínima"),
+    quantidadeMaxima: Optional[int] = Query(None, description="Quantidade máxima"),
+    ano: Optional[List[int]] = Query([], description="Ano(s) para filtrar"),
+    anoInicio: Optional[int] = Query(None, description="Primeiro ano do intervalo"),
+    anoFim: Optional[int] = Query(None, description="Último ano do intervalo"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    GET /producao/export.parquet e /producao/export.arrow:
+    - Exporta os registros de producao (com os mesmos filtros de GET /producao) em Parquet
+      ou Arrow IPC (stream), colunar e comprimido, para leitura direta no pandas/pyarrow.
+    - Gerado em lotes direto do cursor do banco (EXPORT_BATCH_SIZE linhas por lote).
+    """
+    filtros_anos = ano if ano else None
+
+    filtros = dict(
+        produtos=produto or None,
+        tipos=tipo or None,
+        quantidade_minima=quantidadeMinima,
+        quantidade_maxima=quantidadeMaxima,
+        anos=filtros_anos,
+        ano_inicio=anoInicio,
+        ano_fim=anoFim
+    )
+    return export_query(db, crud_select_producoes(**filtros), ProducaoOut, formato, "producao")
 
 
 @router.get(
     "",
     response_model=List[ProducaoOut],
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    responses=STREAM_RESPONSES
 )
-def read_producoes(
+async def read_producoes(
+    request: Request,
     produto: Optional[List[str]] = Query([], description="Produto(s) para filtrar"),
     tipo: Optional[List[str]] = Query([], description="Tipo(s) para filtrar"),
     quantidadeMinima: Optional[int] = Query(None, description="Quantidade mínima"),
     quantidadeMaxima: Optional[int] = Query(None, description="Quantidade máxima"),
     ano: Optional[List[int]] = Query([], description="Ano(s) para filtrar"),
-    db: Session = Depends(get_db),
+    anoInicio: Optional[int] = Query(None, description="Primeiro ano do intervalo"),
+    anoFim: Optional[int] = Query(None, description="Último ano do intervalo"),
+    page: Page = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     GET /producao:
     - Lê do banco todos os registros de produção.
-    - Aplica os filtros via query params (produto, tipo, quantidade e ano).
+    - Aplica os filtros via query params (produto, tipo, quantidade, ano e intervalo anoInicio–anoFim).
+    - Paginado por cursor: `limit` registros (máx. PAGE_SIZE_MAX) por página; o cursor da
+      próxima página vem em X-Next-Cursor (passe-o em `after`).
+    - Com Accept: application/x-ndjson ou text/csv, envia em streaming todos os registros
+      filtrados (a partir de `after`, sem `limit`).
     """
     filtros_anos = ano if ano else None
 
-    dados = crud_get_producoes(
-        db=db,
+    filtros = dict(
         produtos=produto or None,
         tipos=tipo or None,
         quantidade_minima=quantidadeMinima,
         quantidade_maxima=quantidadeMaxima,
-        anos=filtros_anos
+        anos=filtros_anos,
+        ano_inicio=anoInicio,
+        ano_fim=anoFim
     )
-    if len(dados) != 0:
-        return dados
+    formato = stream_format(request)
+    if formato:
+        return stream_query(
+            db,
+            crud_select_producoes(**filtros, after=page.after),
+            ProducaoOut,
+            formato
+        )
+
+    resposta = await query_cache.page(
+        request,
+        db,
+        Producao.__tablename__,
+        filtros,
+        page,
+        crud_select_producoes(**filtros, limit=page.limit + 1, after=page.after),
+        ProducaoOut
+    )
+    if resposta is not None:
+        return resposta
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail="Registros não encontrados. Altere os parametros de filtro."
@@ -121,5 +222,11 @@ def create_producao_manual(
     - Recebe manualmente (JSON) um registro ProducaoBase e insere no banco.
     - Retorna o registro criado (com id).
     """
-    dados = crud_create_producao(db=db, registro=registro)
+    try:
+        dados = crud_create_producao(db=db, registro=registro)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Já existe um registro com o mesmo produto, tipo e ano."
+        )
     return dados
@@ -6,7 +6,7 @@ class ExportacaoBase(BaseModel):
     quantidade_kg: int
     valor_dolar: int
     tipo: str
-    ano: str
+    ano: int
 
 
 class ExportacaoOut(ExportacaoBase):
@@ -6,7 +6,7 @@ class ImportacaoBase(BaseModel):
     quantidade_kg: int
     valor_dolar: int
     tipo: str
-    ano: str
+    ano: int
 
 
 class ImportacaoOut(ImportacaoBase):
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class FetchFailureOut(BaseModel):
+    url: str
+    reason: str
+    attempts: int
+    status_code: Optional[int] = None
+    detail: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
+class JobOut(BaseModel):
+    id: str
+    dataset: str
+    status: str
+    params: dict
+    pages_done: int
+    pages_total: Optional[int] = None
+    rows_written: int
+    failures: List[FetchFailureOut] = []
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -14,7 +17,8 @@ class PredicaoExportacaoCreate(PredicaoExportacaoBase):
 class PredicaoExportacaoOut(PredicaoExportacaoBase):
     id: int
     valor_previsto: float
-    created_at: str
+    modelo_versao: Optional[str] = None
+    created_at: datetime
 
     class Config:
         orm_mode = True
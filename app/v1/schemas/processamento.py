@@ -6,7 +6,7 @@ class ProcessamentoBase(BaseModel):
     quantidade_kg: int
     tipo: str
     caracteristica: str
-    ano: str
+    ano: int
 
 
 class ProcessamentoOut(ProcessamentoBase):
@@ -5,7 +5,7 @@ class ProducaoBase(BaseModel):
     produto: str
     quantidade_l: int
     tipo: str
-    ano: str
+    ano: int
 
 
 class ProducaoOut(ProducaoBase):
@@ -0,0 +1,165 @@
+"""
+Benchmark das formas de gravar as linhas de um /update no banco.
+
+- orm: caminho anterior das funções create_* (db.add por linha, commit e um
+  db.refresh por objeto);
+- returning: create_* atual (INSERT em lote com RETURNING, app.v1.crud.bulk.insert_returning);
+- dataframe: insert_dataframe direto do DataFrame (COPY no PostgreSQL, INSERT em
+  lote nos demais bancos);
+- upsert: upsert_dataframe, como nas rotas /update (ON CONFLICT na chave natural);
+- reupsert: upsert_dataframe repetido sobre a tabela já carregada, como um /update
+  sem mudanças (o tamanho da tabela não muda).
+
+Por padrão usa um SQLite em arquivo temporário; passe --database-url para medir em um
+PostgreSQL (onde o caminho dataframe usa COPY).
+
+Uso: python -m benchmarks.bulk_insert [--rows 50000] [--chunk-size 5000] [--database-url postgresql://...]
+"""
+import argparse
+import itertools
+import math
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import pandas as pd
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database import Base
+from app.v1.crud.bulk import insert_dataframe, upsert_dataframe
+from app.v1.crud.exportacao import create_exportacoes
+from app.v1.models.exportacao import Exportacao
+from app.v1.schemas.exportacao import ExportacaoBase
+
+TIPOS = ["vinhos_de_mesa", "espumantes", "uvas_frescas", "suco_de_uva"]
+
+
+def make_dataframe(rows: int) -> pd.DataFrame:
+    """
+    Gera linhas no formato de exportação (saída de assemble_dataframe), sem repetir
+    a chave natural (paises, tipo, ano).
+    """
+    rng = random.Random(42)
+    anos = [str(ano) for ano in range(1970, 2025)]
+    paises = [f"pais_{i}" for i in range(math.ceil(rows / (len(TIPOS) * len(anos))))]
+    chaves = list(itertools.islice(itertools.product(paises, TIPOS, anos), rows))
+    return pd.DataFrame({
+        "paises": [pais for pais, _, _ in chaves],
+        "quantidade_kg": [float(rng.randrange(10 ** 7)) for _ in range(rows)],
+        "valor_dolar": [float(rng.randrange(10 ** 7)) for _ in range(rows)],
+        "tipo": [tipo for _, tipo, _ in chaves],
+        "ano": [ano for _, _, ano in chaves],
+    })
+
+
+def to_schemas(df: pd.DataFrame) -> List[ExportacaoBase]:
+    return [
+        ExportacaoBase(
+            paises=row["paises"],
+            quantidade_kg=int(row["quantidade_kg"]),
+            valor_dolar=int(row["valor_dolar"]),
+            tipo=row["tipo"],
+            ano=int(row["ano"])
+        )
+        for row in df.to_dict(orient="records")
+    ]
+
+
+def insert_orm(db: Session, df: pd.DataFrame, chunk_size: int) -> int:
+    objetos = []
+    for item in to_schemas(df):
+        obj = Exportacao(**item.model_dump())
+        db.add(obj)
+        objetos.append(obj)
+    db.commit()
+    for obj in objetos:
+        db.refresh(obj)
+    return len(objetos)
+
+
+def insert_returning(db: Session, df: pd.DataFrame, chunk_size: int) -> int:
+    return len(create_exportacoes(db=db, registros=to_schemas(df)))
+
+
+def insert_from_dataframe(db: Session, df: pd.DataFrame, chunk_size: int) -> int:
+    total = insert_dataframe(db, Exportacao, df, chunk_size=chunk_size)
+    db.commit()
+    return total
+
+
+def upsert_from_dataframe(db: Session, df: pd.DataFrame, chunk_size: int) -> int:
+    total = upsert_dataframe(db, Exportacao, df, chunk_size=chunk_size)
+    db.commit()
+    return total
+
+
+METHODS: Dict[str, Callable[[Session, pd.DataFrame, int], int]] = {
+    "orm": insert_orm,
+    "returning": insert_returning,
+    "dataframe": insert_from_dataframe,
+    "upsert": upsert_from_dataframe,
+    "reupsert": upsert_from_dataframe,
+}
+
+
+def benchmark(args) -> List[dict]:
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=[Exportacao.__table__])
+    session_factory = sessionmaker(bind=engine)
+    df = make_dataframe(args.rows)
+
+    results = []
+    try:
+        for name in args.method or list(METHODS):
+            elapsed = []
+            for _ in range(args.repeat):
+                with session_factory() as db:
+                    db.execute(delete(Exportacao))
+                    db.commit()
+                    if name == "reupsert":
+                        upsert_from_dataframe(db, df, args.chunk_size)
+                    start = time.perf_counter()
+                    total = METHODS[name](db, df, args.chunk_size)
+                    elapsed.append(time.perf_counter() - start)
+                    table_rows = db.scalar(select(func.count()).select_from(Exportacao))
+            best = min(elapsed)
+            results.append({
+                "method": name,
+                "rows": total,
+                "table_rows": table_rows,
+                "best_s": best,
+                "rows_per_s": total / best
+            })
+        with session_factory() as db:
+            db.execute(delete(Exportacao))
+            db.commit()
+    finally:
+        engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--method", action="append", choices=list(METHODS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--database-url", help="banco de destino (padrão: SQLite temporário)")
+    args = parser.parse_args()
+
+    print(f"{'method':<12}{'rows':>8}{'table':>8}{'best s':>10}{'rows/s':>12}")
+    for r in benchmark(args):
+        print(
+            f"{r['method']:<12}{r['rows']:>8}{r['table_rows']:>8}"
+            f"{r['best_s']:>10.3f}{r['rows_per_s']:>12.0f}"
+        )
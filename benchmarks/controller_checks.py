@@ -0,0 +1,159 @@
+"""
+Verificações do circuit breaker do HostController (app.scraper.controller).
+
+Cada cenário monta um HostController com cooldown curto, reproduz uma sequência de
+acquire/release/abandon e confere o estado resultante. Cobre em especial as requisições
+iniciadas antes da abertura do breaker que terminam durante o teste (HALF_OPEN): elas
+não podem fechar nem reabrir o breaker, nem liberar uma segunda requisição de teste.
+Termina com código 1 se alguma verificação falhar.
+
+Uso: python -m benchmarks.controller_checks [-v]
+"""
+import argparse
+import logging
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from app.scraper.controller import CLOSED, HALF_OPEN, OPEN, CircuitOpen, HostController
+
+COOLDOWN = 0.05
+
+
+def new_host() -> HostController:
+    return HostController("stub", 10, initial=10, breaker_threshold=2, breaker_cooldown=COOLDOWN)
+
+
+def trip(host: HostController) -> None:
+    """
+    Abre o breaker com `breaker_threshold` falhas seguidas.
+    """
+    for started in [host.acquire() for _ in range(host.breaker_threshold)]:
+        host.release(started, ok=False)
+    assert host.state == OPEN, host.state
+
+
+def admit_probe(host: HostController) -> float:
+    time.sleep(COOLDOWN * 1.5)
+    probe = host.acquire()
+    assert host.state == HALF_OPEN, host.state
+    return probe
+
+
+def assert_no_second_probe(host: HostController) -> None:
+    try:
+        host.acquire()
+    except CircuitOpen:
+        return
+    raise AssertionError("segunda requisição de teste admitida")
+
+
+def check_stale_ok_during_probe() -> None:
+    host = new_host()
+    stale = host.acquire()
+    trip(host)
+    probe = admit_probe(host)
+    host.release(stale, ok=True)
+    assert host.state == HALF_OPEN, host.state
+    assert_no_second_probe(host)
+    host.release(probe, ok=True)
+    assert host.state == CLOSED, host.state
+    assert host.in_flight == 0, host.in_flight
+
+
+def check_stale_failure_during_probe() -> None:
+    host = new_host()
+    stale = host.acquire()
+    trip(host)
+    probe = admit_probe(host)
+    opened_at = host._opened_at
+    host.release(stale, ok=False)
+    assert host.state == HALF_OPEN, host.state
+    assert host._opened_at == opened_at
+    assert_no_second_probe(host)
+    host.release(probe, ok=False)
+    assert host.state == OPEN, host.state
+    assert host.in_flight == 0, host.in_flight
+
+
+def check_stale_failure_after_cooldown() -> None:
+    """
+    Timeout antigo que termina depois do cooldown, antes de o teste ser admitido.
+    """
+    host = new_host()
+    stale = host.acquire()
+    trip(host)
+    time.sleep(COOLDOWN * 1.5)
+    host.release(stale, ok=False)
+    probe = host.acquire()
+    assert host.state == HALF_OPEN, host.state
+    assert_no_second_probe(host)
+    host.release(probe, ok=True)
+    assert host.state == CLOSED, host.state
+
+
+def check_stale_failures_after_recovery() -> None:
+    host = new_host()
+    stale = [host.acquire() for _ in range(host.breaker_threshold)]
+    trip(host)
+    host.release(admit_probe(host), ok=True)
+    for started in stale:
+        host.release(started, ok=False)
+    assert host.state == CLOSED, host.state
+    assert host.consecutive_errors == 0, host.consecutive_errors
+
+
+def check_stale_abandon_keeps_probe() -> None:
+    host = new_host()
+    stale = host.acquire()
+    trip(host)
+    probe = admit_probe(host)
+    host.abandon(stale)
+    assert_no_second_probe(host)
+    host.abandon(probe)
+    assert host.state == HALF_OPEN, host.state
+    host.release(host.acquire(), ok=True)
+    assert host.state == CLOSED, host.state
+    assert host.in_flight == 0, host.in_flight
+
+
+CHECKS: Dict[str, Callable[[], None]] = {
+    "stale_ok_durante_teste": check_stale_ok_during_probe,
+    "stale_falha_durante_teste": check_stale_failure_during_probe,
+    "stale_falha_apos_cooldown": check_stale_failure_after_cooldown,
+    "stale_falhas_apos_fechar": check_stale_failures_after_recovery,
+    "stale_abandon_mantem_teste": check_stale_abandon_keeps_probe,
+}
+
+
+def run() -> List[Tuple[str, str]]:
+    """
+    :return: lista de (verificação, erro) das que falharam.
+    """
+    failures = []
+    for name, check in CHECKS.items():
+        try:
+            check()
+        except AssertionError as e:
+            failures.append((name, str(e) or "falhou"))
+        except Exception as e:
+            failures.append((name, f"{type(e).__name__}: {e}"))
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-v", "--verbose", action="store_true", help="lista as verificações")
+    args = parser.parse_args()
+
+    # as aberturas e fechamentos do breaker são esperados nos cenários
+    logging.getLogger("app.scraper.controller").setLevel(logging.ERROR)
+    failures = run()
+    if args.verbose:
+        falhas = {name for name, _ in failures}
+        for name in CHECKS:
+            print(f"{'FALHOU' if name in falhas else 'ok':<8}{name}")
+    for name, erro in failures:
+        print(f"{name}: {erro}", file=sys.stderr)
+    print(f"{len(CHECKS)} verificações: {len(failures)} falha(s).")
+    sys.exit(1 if failures else 0)
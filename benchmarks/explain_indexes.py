@@ -0,0 +1,163 @@
+"""
+Verifica com EXPLAIN que os filtros de GET /exportacao usam os índices criados pelas
+migrações (app/migrations) em uma tabela sintética com milhões de linhas.
+
+O esquema é criado pelas próprias migrações (upgrade_schema). Cada consulta é a que
+get_exportacoes envia ao banco (capturada na execução) para a primeira página da rota
+(ordem de id, PAGE_SIZE registros), e o seu plano é obtido com EXPLAIN (PostgreSQL) ou
+EXPLAIN QUERY PLAN (SQLite). O script termina com código 1 se alguma consulta fizer
+varredura completa da tabela, inclusive percorrendo a chave primária em ordem de id.
+
+Por padrão usa um SQLite em arquivo temporário; passe --database-url para verificar
+em um PostgreSQL. O banco deve ser de teste: a tabela exportacao precisa estar vazia
+e as linhas sintéticas são removidas ao final.
+
+Uso: python -m benchmarks.explain_indexes [--rows 2000000] [--database-url postgresql://...]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, delete, event, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import sessionmaker
+
+from app.core.pagination import PAGE_SIZE
+from app.core.schema import upgrade_schema
+from app.v1.crud.bulk import insert_dataframe
+from app.v1.crud.exportacao import get_exportacoes
+from app.v1.models.exportacao import Exportacao
+
+TIPOS = ["vinhos_de_mesa", "espumantes", "uvas_frescas", "suco_de_uva"]
+ANOS = list(range(1970, 2025))
+
+# (descrição, filtros de get_exportacoes)
+CONSULTAS: List[Tuple[str, dict]] = [
+    ("ano", {"anos": [2020]}),
+    ("anoInicio/anoFim", {"ano_inicio": 2019, "ano_fim": 2020}),
+    ("tipo + ano", {"tipos": ["espumantes"], "anos": [2020]}),
+    ("tipo + anoInicio/anoFim", {"tipos": ["espumantes"], "ano_inicio": 2015, "ano_fim": 2020}),
+    ("pais", {"paises": ["pais_42"]}),
+    ("pais + anoInicio/anoFim", {"paises": ["pais_42", "pais_43"], "ano_inicio": 2000}),
+    ("pais + tipo + ano", {"paises": ["pais_42"], "tipos": ["espumantes"], "anos": [2020]}),
+    ("ano + valor", {"anos": [2020], "valor_minimo": 1_000_000}),
+]
+
+INDEX_SCAN = re.compile(r"(Index Scan|Index Only Scan|Bitmap Index Scan|USING (COVERING )?INDEX)")
+FULL_SCAN = re.compile(rf"(Seq Scan on {Exportacao.__tablename__}|^SCAN {Exportacao.__tablename__}\b)")
+INDEX_NAME = re.compile(r"(?:using|on|INDEX) (\w+_\w+)")
+# índices que só servem à ordenação por id: usá-los sozinhos é uma varredura completa
+ID_INDEXES = {f"{Exportacao.__tablename__}_pkey", f"ix_{Exportacao.__tablename__}_id"}
+
+
+def synthetic_frames(rows: int, block: int = 200_000) -> Iterator[pd.DataFrame]:
+    """
+    Gera as linhas em blocos, sem repetir a chave natural (paises, tipo, ano):
+    a linha i é do país i // (tipos * anos).
+    """
+    rng = np.random.default_rng(42)
+    por_pais = len(TIPOS) * len(ANOS)
+    for start in range(0, rows, block):
+        i = np.arange(start, min(start + block, rows))
+        yield pd.DataFrame({
+            "paises": pd.Series(i // por_pais).map("pais_{}".format),
+            "quantidade_kg": rng.integers(0, 10 ** 7, len(i)),
+            "valor_dolar": rng.integers(0, 10 ** 7, len(i)),
+            "tipo": np.array(TIPOS)[(i // len(ANOS)) % len(TIPOS)],
+            "ano": np.array(ANOS)[i % len(ANOS)],
+        })
+
+
+def explain(connection: Connection, statement: str, parameters) -> List[str]:
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+    return [row[0] for row in rows]
+
+
+def run(args) -> List[dict]:
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'explain.db')}"
+    engine = create_engine(url)
+    upgrade_schema(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    capturadas = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            capturadas.append((statement, parameters))
+
+    with session_factory() as db:
+        if db.scalar(select(func.count()).select_from(Exportacao)):
+            engine.dispose()
+            raise SystemExit("A tabela exportacao não está vazia; use um banco de teste.")
+
+    results = []
+    try:
+        with session_factory() as db:
+            start = time.perf_counter()
+            for df in synthetic_frames(args.rows):
+                insert_dataframe(db, Exportacao, df)
+            db.commit()
+            print(f"{args.rows} linhas geradas em {time.perf_counter() - start:.1f}s")
+            db.execute(text("ANALYZE"))
+            db.commit()
+
+            for descricao, filtros in CONSULTAS:
+                capturadas.clear()
+                start = time.perf_counter()
+                linhas = len(get_exportacoes(db, **filtros, limit=PAGE_SIZE + 1))
+                elapsed = time.perf_counter() - start
+                statement, parameters = capturadas[-1]
+                plano = explain(db.connection(), statement, parameters)
+                texto = "\n".join(plano)
+                indices = set(INDEX_NAME.findall(texto))
+                usa_indice = bool(INDEX_SCAN.search(texto) and indices - ID_INDEXES) and not any(
+                    FULL_SCAN.search(linha.strip()) for linha in plano
+                )
+                results.append({
+                    "consulta": descricao,
+                    "linhas": linhas,
+                    "tempo_s": elapsed,
+                    "indices": sorted(indices),
+                    "usa_indice": usa_indice,
+                    "plano": plano,
+                })
+    finally:
+        with session_factory() as db:
+            db.execute(delete(Exportacao))
+            db.commit()
+        engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--database-url", help="banco de teste (padrão: SQLite temporário)")
+    parser.add_argument("--plan", action="store_true", help="mostra o plano completo de cada consulta")
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"{'consulta':<26}{'linhas':>8}{'tempo s':>10}  índice")
+    for r in results:
+        indices = ", ".join(r["indices"]) if r["usa_indice"] else "VARREDURA COMPLETA"
+        print(f"{r['consulta']:<26}{r['linhas']:>8}{r['tempo_s']:>10.3f}  {indices}")
+        if args.plan or not r["usa_indice"]:
+            for linha in r["plano"]:
+                print(f"    {linha}")
+    sys.exit(0 if all(r["usa_indice"] for r in results) else 1)
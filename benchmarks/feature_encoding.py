@@ -0,0 +1,122 @@
+"""
+Micro-benchmark da predição de uma requisição (e de um lote do inference_scheduler),
+comparando:
+
+- dataframe: o caminho anterior das rotas, pd.DataFrame([{...}]) + model.predict;
+- encoder: o caminho atual (app.core.inference_scheduler.predict_rows), que codifica
+  as features direto em NumPy com o FeatureEncoder compilado do pipeline.
+
+Mede a latência (p50/p99, em µs) de cada chamada, só com o modelo, sem HTTP nem banco.
+Sem --model, treina um pipeline sintético (OneHotEncoder das colunas categóricas,
+passthrough das numéricas e o estimador de --estimator); com --model, usa o artefato
+informado (ex.: app/predict_models/production_model.pkl).
+
+Uso: python -m benchmarks.feature_encoding [--dataset producao] [--model caminho.pkl] [--rows 1 64]
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import make_column_transformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from app.core.feature_encoding import feature_encoder
+from app.core.inference_scheduler import predict_rows
+
+# features (na ordem das rotas) e colunas categóricas de cada modelo
+DATASETS = {
+    "exportacao": (["pais", "quantidade_kg", "tipo"], ["pais", "tipo"]),
+    "producao": (["produto", "tipo", "ano"], ["produto", "tipo"]),
+}
+ESTIMATORS = {
+    "linear": LinearRegression,
+    "forest": lambda: RandomForestRegressor(n_estimators=50, max_depth=8, random_state=42),
+}
+
+
+def synthetic_rows(dataset: str, n: int, seed: int = 42) -> List[tuple]:
+    rng = np.random.default_rng(seed)
+    categorias = [f"cat_{i}" for i in rng.integers(0, 60, n)]
+    tipos = [f"tipo_{i}" for i in rng.integers(0, 8, n)]
+    if dataset == "exportacao":
+        return list(zip(categorias, rng.integers(0, 10 ** 7, n).tolist(), tipos))
+    return list(zip(categorias, tipos, rng.integers(1970, 2024, n).tolist()))
+
+
+def train(dataset: str, estimator: str):
+    columns, categoricas = DATASETS[dataset]
+    df = pd.DataFrame(synthetic_rows(dataset, 5000), columns=columns)
+    y = np.random.default_rng(0).normal(size=len(df))
+    model = make_pipeline(
+        make_column_transformer(
+            (OneHotEncoder(handle_unknown="ignore"), categoricas),
+            remainder="passthrough",
+            force_int_remainder_cols=False,
+        ),
+        ESTIMATORS[estimator](),
+    )
+    return model.fit(df, y)
+
+
+def measure(funcao: Callable[[], object], repeat: int) -> dict:
+    for _ in range(min(repeat, 100)):  # aquecimento
+        funcao()
+    tempos = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - start) * 1e6)
+    tempos.sort()
+    return {
+        "p50_us": statistics.median(tempos),
+        "p99_us": tempos[min(len(tempos) - 1, int(len(tempos) * 0.99))],
+    }
+
+
+def benchmark(args) -> List[dict]:
+    columns, _ = DATASETS[args.dataset]
+    model = joblib.load(args.model) if args.model else train(args.dataset, args.estimator)
+    if feature_encoder(model, columns) is None:
+        raise SystemExit("Modelo não suportado pelo FeatureEncoder (as duas variantes usariam o DataFrame).")
+    linhas = synthetic_rows(args.dataset, max(args.rows), seed=7)
+
+    results = []
+    for n in args.rows:
+        lote = linhas[:n]
+        if not np.allclose(predict_rows(model, columns, lote), model.predict(pd.DataFrame(lote, columns=columns))):
+            raise RuntimeError("As variantes divergem.")
+        variantes = {
+            # como as rotas faziam: uma lista de dicts por requisição
+            "dataframe": lambda: model.predict(pd.DataFrame([dict(zip(columns, linha)) for linha in lote])),
+            "encoder": lambda: predict_rows(model, columns, lote),
+        }
+        for nome, funcao in variantes.items():
+            results.append({"variante": nome, "rows": n, **measure(funcao, args.repeat)})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dataset", choices=list(DATASETS), default="producao")
+    parser.add_argument("--model", help="artefato do modelo (joblib/pickle); padrão: pipeline sintético")
+    parser.add_argument("--estimator", choices=list(ESTIMATORS), default="linear",
+                        help="estimador do pipeline sintético")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 64], help="linhas por predict")
+    parser.add_argument("--repeat", type=int, default=2000, help="chamadas por medida")
+    args = parser.parse_args()
+
+    results = benchmark(args)
+    base = {r["rows"]: r for r in results if r["variante"] == "dataframe"}
+    print(f"{'variante':<11}{'linhas':>7}{'p50 µs':>10}{'p99 µs':>10}{'x p50':>8}")
+    for r in results:
+        print(
+            f"{r['variante']:<11}{r['rows']:>7}{r['p50_us']:>10.1f}{r['p99_us']:>10.1f}"
+            f"{r['p50_us'] / base[r['rows']]['p50_us']:>8.2f}"
+        )
@@ -0,0 +1,138 @@
+"""
+Verificação de equivalência dos parsers de tabela (app.scraper.parsers.PARSERS).
+
+Aplica cada backend a todas as páginas do corpus (fixtures/vitibrasil) e a trechos de
+HTML malformado (células aninhadas, comentários, entidades, tabela sem <thead>/<tbody>,
+tags não fechadas) e compara o build_dataframe de cada um com o do parser de referência
+(bs4) usando pd.testing.assert_frame_equal. Termina com código 1 se algum divergir.
+
+Uso: python -m benchmarks.parser_equivalence [--reference bs4] [-v]
+"""
+import argparse
+import os
+import sys
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from app.scraper.parsers import PARSERS, build_dataframe
+from benchmarks.stub_server import FIXTURES_DIR
+
+TABLE = '<table class="tb_base tb_dados">{}</table>'
+HEAD = "<thead><tr><th>Produto</th><th>Quantidade (L.)</th></tr></thead>"
+
+# Trechos malformados ou atípicos; o nome identifica o caso no relatório.
+SNIPPETS: Dict[str, str] = {
+    "sem_tabela": "<html><body><p>Sem dados</p></body></html>",
+    "sem_thead": TABLE.format("<tbody><tr><td>Vinho</td><td>1.000</td></tr></tbody>"),
+    "sem_tbody": TABLE.format(HEAD),
+    "tbody_vazio": TABLE.format(HEAD + "<tbody></tbody>"),
+    "linhas_simples": TABLE.format(
+        "<thead><tr><th>Países</th><th>Quantidade (Kg)</th><th>Valor (US$)</th></tr></thead>"
+        "<tbody><tr><td>África do Sul</td><td>1.234</td><td>5.678</td></tr>"
+        "<tr><td>Alemanha</td><td>-</td><td>nd</td></tr></tbody>"
+    ),
+    "item_e_subitens": TABLE.format(
+        HEAD + "<tbody>"
+        '<tr><td class="tb_item">VINHO DE MESA</td><td class="tb_item">10</td></tr>'
+        '<tr><td class="tb_subitem">Tinto</td><td class="tb_subitem">7</td></tr>'
+        '<tr><td class="tb_subitem">Branco</td><td class="tb_subitem">3</td></tr>'
+        '<tr><td class="tb_item">SUCO</td><td class="tb_item">*</td></tr>'
+        "</tbody>"
+    ),
+    "comentarios": TABLE.format(
+        HEAD + "<tbody><!-- início -->"
+        '<tr><td class="tb_item">Vi<!-- x -->nho</td><td class="tb_item"> 1.0<!-- y -->00 </td></tr>'
+        "</tbody>"
+    ),
+    "entidades": TABLE.format(
+        HEAD + "<tbody>"
+        '<tr><td class="tb_item">Uva &amp; Suco&nbsp;</td><td class="tb_item">&#49;.000</td></tr>'
+        '<tr><td class="tb_subitem">Ma&ccedil;&atilde;</td><td class="tb_subitem">2</td></tr>'
+        "</tbody>"
+    ),
+    "celulas_aninhadas": TABLE.format(
+        HEAD + "<tbody>"
+        '<tr><td class="tb_item">Vinho <td class="tb_subitem">Tinto</td></td>'
+        '<td class="tb_item">5</td></tr>'
+        '<tr><td class="tb_subitem"><span>Rosé <b>seco</b></span></td><td class="tb_subitem">3</td></tr>'
+        "</tbody>"
+    ),
+    "tabela_aninhada": TABLE.format(
+        HEAD + "<tbody>"
+        '<tr><td class="tb_item">A<table><tr><td>interna</td></tr></table></td><td class="tb_item">1</td></tr>'
+        "</tbody>"
+    ),
+    "tags_nao_fechadas": TABLE.format(
+        HEAD + "<tbody>"
+        '<tr><td class="tb_item">Vinho<td class="tb_item">4'
+        '<tr><td class="tb_item">Suco</td><td class="tb_item">2</td>'
+    ),
+    "fechamento_extra": TABLE.format(
+        HEAD + "<tbody>"
+        '<tr><td class="tb_item">Vinho</span></td><td class="tb_item">4</td></tr></tr>'
+        "</tbody>"
+    ),
+    "void_e_autofechadas": TABLE.format(
+        HEAD + "<tbody>"
+        '<tr><td class="tb_item">Vi<br>nho<br/></td><td class="tb_item">4<img src="x"></td></tr>'
+        '<tr><td class="tb_item"/><td class="tb_item">5</td></tr>'
+        "</tbody>"
+    ),
+    "outra_tabela_antes": (
+        '<table class="tb_base"><tr><td>menu</td></tr></table>'
+        + TABLE.format(HEAD + '<tbody><tr><td class="tb_item">Vinho</td><td class="tb_item">9</td></tr></tbody>')
+    ),
+    "classes_extras": (
+        '<table class="tb_base  tb_dados"><thead><tr><th>Produto</th><th>Quantidade (L.)</th></tr></thead>'
+        '<tbody><tr><td class="tb_item destaque">Vinho</td><td class="tb_item">9</td></tr></tbody></table>'
+    ),
+}
+
+
+def load_cases() -> List[Tuple[str, str]]:
+    """
+    Páginas do corpus (em ordem de nome) seguidas dos trechos de SNIPPETS.
+    """
+    cases = []
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        if name.endswith(".html"):
+            with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+                cases.append((name, f.read()))
+    return cases + list(SNIPPETS.items())
+
+
+def compare(reference: str, cases: List[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
+    """
+    :return: lista de (caso, parser, erro) dos backends cujo DataFrame diverge do de `reference`.
+    """
+    failures = []
+    for case, html in cases:
+        expected = build_dataframe(PARSERS[reference](html))
+        for name, parse in PARSERS.items():
+            if name == reference:
+                continue
+            try:
+                pd.testing.assert_frame_equal(build_dataframe(parse(html)), expected)
+            except AssertionError as e:
+                failures.append((case, name, str(e)))
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reference", default="bs4", choices=list(PARSERS))
+    parser.add_argument("-v", "--verbose", action="store_true", help="lista os casos verificados")
+    args = parser.parse_args()
+
+    cases = load_cases()
+    failures = compare(args.reference, cases)
+    if args.verbose:
+        falhos = {case for case, _, _ in failures}
+        for case, _ in cases:
+            print(f"{'FALHOU' if case in falhos else 'ok':<8}{case}")
+    for case, name, erro in failures:
+        print(f"{case}: {name} diverge de {args.reference}\n{erro}\n", file=sys.stderr)
+    print(f"{len(cases)} casos, {len(PARSERS) - 1} parser(es) comparado(s) com {args.reference}: "
+          f"{len(failures)} divergência(s).")
+    sys.exit(1 if failures else 0)
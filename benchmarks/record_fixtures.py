@@ -0,0 +1,43 @@
+"""
+Grava no corpus (fixtures/vitibrasil) as páginas do vitibrasil usadas pelas rotas /update.
+
+Sem --ano, grava a página genérica de cada opção/subopção (servida pelo stub para
+qualquer ano); com --ano, grava também as versões específicas de cada ano.
+
+Uso: python -m benchmarks.record_fixtures [--ano 2023 --ano 1970]
+"""
+import argparse
+import os
+from urllib.parse import parse_qs
+
+from app.scraper.datasets import DATASETS
+from app.scraper.scraper import EmbrapaScraper
+from benchmarks.stub_server import FIXTURES_DIR, fixture_name
+
+
+def record(anos: list) -> None:
+    scraper = EmbrapaScraper(cache=None)
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    jobs = []
+    for dataset in DATASETS.values():
+        for url in dataset.urls().values():
+            query = parse_qs(url.split("?", 1)[1])
+            base = fixture_name(query["opcao"][0], query.get("subopcao", [None])[0])
+            jobs.append((f"{base}.html", url))
+            jobs.extend((f"{base}_{ano}.html", f"{url}&ano={ano}") for ano in anos)
+
+    pages = scraper.request_many([url for _, url in jobs])
+    for (name, url), html in zip(jobs, pages):
+        if html is None:
+            print(f"Falha ao gravar {url}")
+            continue
+        with open(os.path.join(FIXTURES_DIR, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"{name} <- {url}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ano", type=int, action="append", default=[])
+    args = parser.parse_args()
+    record(args.ano)
@@ -0,0 +1,180 @@
+"""
+Benchmark da montagem do DataFrame das rotas /update a partir das tabelas já extraídas,
+comparando:
+
+- loop: a implementação anterior de create_dataframe, que limpava cada ano, fazia o
+  pd.concat dentro do loop de anos e renormalizava toda a coluna paises acumulada a cada
+  iteração; as rotas concatenavam de novo o resultado de cada tipo;
+- assemble: o caminho atual (tag_frames + assemble_dataframe, um único concat e
+  passadas vetorizadas).
+
+As páginas vêm do corpus (fixtures/vitibrasil, com o ano trocado como no stub) e são
+extraídas uma única vez antes das medidas: só a montagem é cronometrada, sem HTTP nem
+parse. Antes de medir, confere que as duas variantes produzem o mesmo DataFrame.
+
+Uso: python -m benchmarks.scraper_assembly [--anos 1970-2024] [--dataset exportacao] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+import warnings
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import numpy as np
+import pandas as pd
+from unidecode import unidecode
+
+from app.scraper.datasets import DATASETS, Dataset
+from app.scraper.functions import assemble_dataframe, tag_frames
+from app.scraper.parsers import PARSERS, build_dataframe
+from benchmarks.scraper_pipeline import parse_anos
+from benchmarks.stub_server import load_page
+
+Table = Tuple[Optional[str], int, pd.DataFrame]
+
+
+def load_tables(dataset: Dataset, anos: List[int], parser: str) -> List[Table]:
+    """
+    Extrai, uma vez, a tabela de cada (tipo, ano) do dataset a partir do corpus.
+    """
+    tables = []
+    for tipo, url in dataset.urls().items():
+        query = parse_qs(url.split("?", 1)[1])
+        for ano in anos:
+            html = load_page(query["opcao"][0], query.get("subopcao", [None])[0], str(ano))
+            if html is None:
+                raise SystemExit(f"Página ausente do corpus: {url}&ano={ano}")
+            tables.append((tipo, ano, build_dataframe(PARSERS[parser](html))))
+    return tables
+
+
+def legacy_create_dataframe(
+        tables: List[Tuple[int, pd.DataFrame]],
+        main_cols: str,
+        numeric_cols: list,
+        other_cols: list,
+        tipo: Optional[str],
+        caracteristica: bool
+) -> pd.DataFrame:
+    """
+    create_dataframe anterior, sem o fetch/parse (recebe as tabelas de cada ano).
+    """
+    pd.set_option('future.no_silent_downcasting', True)
+
+    columns = [main_cols] + numeric_cols + other_cols
+    df = pd.DataFrame(columns=columns)
+
+    for ano, raw_data in tables:
+        for col in numeric_cols:
+            raw_data[col] = (
+                raw_data[col]
+                .str.replace(".", "", regex=False)
+                .replace("-", np.nan)
+                .replace("nd", np.nan)
+                .replace("*", np.nan)
+                .astype(float)
+            )
+        raw_data = raw_data.dropna(subset=numeric_cols, how="all")
+        if raw_data.empty:
+            continue
+
+        if '__item' in raw_data.columns:
+            raw_data['tipo'] = tipo if tipo else raw_data['__item']
+            if caracteristica:
+                raw_data['caracteristica'] = raw_data['__item']
+        else:
+            raw_data['tipo'] = tipo if tipo else None
+            if caracteristica:
+                raw_data['caracteristica'] = None
+
+        raw_data['ano'] = f"{ano}"
+        raw_data[main_cols] = [line.lower() for line in raw_data[main_cols]]
+
+        if '__item' in raw_data.columns:
+            raw_data = raw_data.drop(columns=['__item'])
+
+        df = pd.concat([df, raw_data], ignore_index=True)
+        if "paises" in df.columns:
+            df["paises"] = df["paises"].apply(lambda x: unidecode(x).replace(" ", "_"))
+
+    return df
+
+
+def legacy(dataset: Dataset, tables: List[Table]) -> pd.DataFrame:
+    """
+    Montagem anterior das rotas: um create_dataframe por tipo, concatenados em seguida
+    (producao e comercializacao, com um único tipo, usavam o create_dataframe direto).
+    Os avisos do pandas que essa implementação emitia são silenciados.
+    """
+    columns = [dataset.main_cols] + dataset.numeric_cols + ['tipo', 'ano']
+    if dataset.caracteristica:
+        columns.append('caracteristica')
+    df = pd.DataFrame(columns=columns)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", (FutureWarning, pd.errors.SettingWithCopyWarning))
+        for tipo in dataset.queries:
+            df_aux = legacy_create_dataframe(
+                [(ano, table.copy()) for t, ano, table in tables if t == tipo],
+                dataset.main_cols, dataset.numeric_cols, ['tipo', 'ano'], tipo, dataset.caracteristica
+            )
+            df = pd.concat([df, df_aux], ignore_index=True) if len(dataset.queries) > 1 else df_aux
+    return df
+
+
+def current(dataset: Dataset, tables: List[Table]) -> pd.DataFrame:
+    frames = tag_frames([(tipo, ano) for tipo, ano, _ in tables], [table.copy() for _, _, table in tables])
+    return assemble_dataframe(
+        frames, dataset.main_cols, dataset.numeric_cols, ['tipo', 'ano'], dataset.caracteristica
+    )
+
+
+def measure(funcao: Callable[[], pd.DataFrame], repeat: int) -> float:
+    tempos = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - start)
+    return statistics.median(tempos)
+
+
+def benchmark(args) -> List[dict]:
+    anos = parse_anos(args.anos)
+    results = []
+    for nome in args.dataset or ["exportacao"]:
+        dataset = DATASETS[nome]
+        tables = load_tables(dataset, anos, args.parser)
+        antigo, atual = legacy(dataset, tables), current(dataset, tables)
+        # a variante antiga não fixava a ordem das colunas nem os dtypes do DataFrame vazio inicial
+        pd.testing.assert_frame_equal(
+            antigo[list(atual.columns)].infer_objects(), atual.infer_objects(), check_dtype=False
+        )
+        loop = measure(lambda: legacy(dataset, tables), args.repeat)
+        assemble = measure(lambda: current(dataset, tables), args.repeat)
+        results.append({
+            "dataset": nome,
+            "tipos": len(dataset.queries),
+            "anos": len(anos),
+            "rows": len(atual),
+            "loop_s": loop,
+            "assemble_s": assemble,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--anos", default="1970-2024", help="intervalo de anos, ex.: 1970-2024")
+    parser.add_argument("--dataset", action="append", choices=list(DATASETS),
+                        help="dataset (repetível); padrão: exportacao")
+    parser.add_argument("--parser", default="stream", choices=list(PARSERS))
+    parser.add_argument("--repeat", type=int, default=5, help="execuções por variante (mediana)")
+    args = parser.parse_args()
+
+    results = benchmark(args)
+    print(f"{'dataset':<16}{'tipos':>6}{'anos':>6}{'rows':>8}{'loop s':>10}{'assemble s':>12}{'x':>7}")
+    for r in results:
+        print(
+            f"{r['dataset']:<16}{r['tipos']:>6}{r['anos']:>6}{r['rows']:>8}{r['loop_s']:>10.3f}"
+            f"{r['assemble_s']:>12.3f}{r['loop_s'] / r['assemble_s']:>7.1f}"
+        )
@@ -0,0 +1,176 @@
+"""
+Benchmark offline do pipeline de scrape das rotas /update.
+
+Para cada dataset de app.scraper.datasets.DATASETS, serve o corpus gravado por um
+stub HTTP local e mede cada etapa: fetch (requisições), parse (extração das
+tabelas), clean (montagem/limpeza do DataFrame), validate (conversão para os tipos do
+modelo, como nas rotas) e insert (insert_dataframe em um SQLite em memória). Reporta páginas/s,
+linhas/s, tempo por etapa e pico de memória (tracemalloc, em uma execução à parte).
+
+Com --capacity/--error-rate o stub simula um site sobrecarregado (429/503); o relatório
+inclui as páginas perdidas e as respostas recusadas pelo stub.
+
+Uso: python -m benchmarks.scraper_pipeline [--anos 1970-2024] [--dataset exportacao] [--json saida.json]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.scraper.controller import RequestController
+from app.scraper.datasets import DATASETS, Dataset
+from app.scraper.functions import assemble_dataframe, fetch_pages, parse_pages
+from app.scraper.parsers import PARSERS
+from app.scraper.scraper import EmbrapaScraper
+from app.v1.crud.bulk import coerce_dataframe, insert_dataframe
+from app.v1.models.comercializacao import Comercializacao
+from app.v1.models.exportacao import Exportacao
+from app.v1.models.importacao import Importacao
+from app.v1.models.processamento import Processamento
+from app.v1.models.producao import Producao
+from benchmarks.stub_server import StubServer
+
+STAGES = ["fetch", "parse", "clean", "validate", "insert"]
+
+MODELS: Dict[str, type] = {
+    "producao": Producao,
+    "processamento": Processamento,
+    "comercializacao": Comercializacao,
+    "importacao": Importacao,
+    "exportacao": Exportacao,
+}
+
+
+def parse_anos(value: str) -> List[int]:
+    inicio, _, fim = value.partition("-")
+    return list(range(int(inicio), int(fim or inicio) + 1))
+
+
+def validate(dataset: Dataset, df):
+    """
+    Converte as colunas para os tipos do modelo, como faz insert_dataframe nas rotas /update.
+    """
+    return coerce_dataframe(MODELS[dataset.nome], df)
+
+
+def run_pipeline(
+        dataset: Dataset,
+        scraper: EmbrapaScraper,
+        base_url: str,
+        anos: List[int],
+        session_factory: Callable,
+        timings: Dict[str, float]
+) -> Dict[str, int]:
+    """
+    Executa o pipeline completo de um dataset, acumulando o tempo de cada etapa em `timings`.
+    """
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+        return result
+
+    pages = timed("fetch", fetch_pages, scraper, dataset.urls(base_url), anos)
+    failed = sum(1 for _, _, page in pages if page is None)
+    frames = timed("parse", parse_pages, scraper, pages)
+    df = timed(
+        "clean", assemble_dataframe, frames, dataset.main_cols, dataset.numeric_cols,
+        ['tipo', 'ano'], dataset.caracteristica
+    )
+    df = timed("validate", validate, dataset, df)
+    if session_factory is not None:
+        with session_factory() as db:
+            timed("insert", insert_dataframe, db, MODELS[dataset.nome], df)
+            db.commit()
+    return {"pages": len(pages), "failed": failed, "rows": len(df)}
+
+
+def benchmark(args) -> List[dict]:
+    anos = parse_anos(args.anos)
+    results = []
+    with StubServer(
+            latency=args.latency, capacity=args.capacity, error_rate=args.error_rate
+    ) as server:
+        for nome in args.dataset or list(DATASETS):
+            dataset = DATASETS[nome]
+            scraper = EmbrapaScraper(
+                cache=None,
+                parser=args.parser,
+                max_concurrency=args.concurrency,
+                controller=RequestController()
+            )
+            rejected = server.rejected
+            timings: Dict[str, float] = {}
+            counts = {}
+            for _ in range(args.repeat):
+                session_factory = None
+                if not args.no_insert:
+                    engine = create_engine("sqlite://")
+                    Base.metadata.create_all(engine)
+                    session_factory = sessionmaker(bind=engine)
+                counts = run_pipeline(
+                    dataset, scraper, server.base_url, anos, session_factory, timings
+                )
+
+            tracemalloc.start()
+            run_pipeline(dataset, scraper, server.base_url, anos, None, {})
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            stages = {stage: timings.get(stage, 0.0) / args.repeat for stage in STAGES}
+            total = sum(stages.values())
+            results.append({
+                "dataset": nome,
+                "pages": counts["pages"],
+                "failed": counts["failed"],
+                "rejected": server.rejected - rejected,
+                "rows": counts["rows"],
+                "pages_per_s": counts["pages"] / (stages["fetch"] + stages["parse"]),
+                "rows_per_s": counts["rows"] / total if total else 0.0,
+                "peak_mem_mb": peak / 2 ** 20,
+                "total_s": total,
+                "stages_s": stages,
+            })
+    return results
+
+
+def print_report(results: List[dict]) -> None:
+    header = (
+        f"{'dataset':<16}{'pages':>7}{'failed':>8}{'429/503':>9}{'rows':>8}{'pages/s':>10}{'rows/s':>10}"
+        f"{'peak MB':>9}" + "".join(f"{stage:>10}" for stage in STAGES) + f"{'total':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['dataset']:<16}{r['pages']:>7}{r['failed']:>8}{r['rejected']:>9}{r['rows']:>8}{r['pages_per_s']:>10.1f}"
+            f"{r['rows_per_s']:>10.0f}{r['peak_mem_mb']:>9.1f}"
+            + "".join(f"{r['stages_s'][stage]:>10.3f}" for stage in STAGES)
+            + f"{r['total_s']:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--anos", default="1970-2024", help="intervalo de anos, ex.: 1970-2024")
+    parser.add_argument("--dataset", action="append", choices=list(DATASETS))
+    parser.add_argument("--parser", default="stream", choices=list(PARSERS))
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="atraso por requisição (s)")
+    parser.add_argument("--capacity", type=int, default=0, help="requisições simultâneas aceitas pelo stub")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 503 do stub")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-insert", action="store_true", help="pula a etapa de insert")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    results = benchmark(args)
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,168 @@
+"""
+Servidor HTTP local que imita o vitibrasil a partir do corpus em fixtures/vitibrasil.
+
+Cada página é procurada como `<opcao>[_<subopcao>]_<ano>.html` e, se não existir,
+como `<opcao>[_<subopcao>].html`; o ano exibido na página é trocado pelo ano pedido.
+Responde com ETag e atende requisições condicionais (304). Para simular um site
+sobrecarregado, `capacity` limita as requisições simultâneas (as excedentes recebem 429)
+e `error_rate` devolve 503 para uma fração aleatória das requisições.
+
+Uso: python -m benchmarks.stub_server --port 8081 [--capacity 4] [--error-rate 0.05]
+"""
+import argparse
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "vitibrasil")
+YEAR_RE = re.compile(r"\[\d{4}\]")
+
+
+def fixture_name(opcao: str, subopcao: Optional[str]) -> str:
+    return f"{opcao}_{subopcao}" if subopcao else opcao
+
+
+def load_page(opcao: str, subopcao: Optional[str], ano: Optional[str]) -> Optional[str]:
+    """
+    Lê a página gravada para a opção/subopção e o ano pedidos.
+    """
+    base = fixture_name(opcao, subopcao)
+    for name in (f"{base}_{ano}.html", f"{base}.html"):
+        path = os.path.join(FIXTURES_DIR, name)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                html = f.read()
+            return YEAR_RE.sub(f"[{ano}]", html, count=1) if ano else html
+    return None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    capacity = 0
+    error_rate = 0.0
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            overloaded = bool(self.capacity) and server.in_flight > self.capacity
+            failed = not overloaded and random.random() < self.error_rate
+            if overloaded or failed:
+                server.rejected += 1
+        try:
+            if overloaded:
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            elif failed:
+                self.send_error(503)
+            else:
+                self._serve()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _serve(self):
+        query = parse_qs(urlparse(self.path).query)
+        opcao = query.get("opcao", ["opt_01"])[0]
+        subopcao = query.get("subopcao", [None])[0]
+        ano = query.get("ano", [None])[0]
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        html = load_page(opcao, subopcao, ano)
+        if html is None:
+            self.send_error(404)
+            return
+
+        body = html.encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """
+    Sobe o servidor em uma thread; use como context manager.
+    :param latency: atraso artificial (segundos) por requisição.
+    :param capacity: máximo de requisições simultâneas atendidas (0 = sem limite).
+    :param error_rate: fração das requisições respondidas com 503.
+    """
+
+    def __init__(
+            self,
+            port: int = 0,
+            latency: float = 0.0,
+            capacity: int = 0,
+            error_rate: float = 0.0
+    ) -> None:
+        handler = type("Handler", (StubHandler,), {
+            "latency": latency, "capacity": capacity, "error_rate": error_rate
+        })
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.requests = 0
+        self.httpd.in_flight = 0
+        self.httpd.rejected = 0
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}/index.php"
+
+    @property
+    def requests(self) -> int:
+        return self.httpd.requests
+
+    @property
+    def rejected(self) -> int:
+        """
+        Requisições respondidas com 429/503 (capacity/error_rate).
+        """
+        return self.httpd.rejected
+
+    def __enter__(self) -> "StubServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--capacity", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    with StubServer(args.port, args.latency, args.capacity, args.error_rate) as server:
+        print(f"Servindo {FIXTURES_DIR} em {server.base_url}")
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass